@@ -0,0 +1,44 @@
+"""import time of package without side effects on current directory.
+Run from project root: python -m bench.bench_import [module] [max_own_ms]. Exit 1 if own import time more than <max_own_ms>"""
+import os
+import sys
+import tempfile
+import subprocess
+from pathlib import Path
+
+PACKAGE = "src.DLMSAdapter"
+
+
+def measure(module: str) -> tuple[dict[str, int], list[str]]:
+    """return self import time in us by module and entries created in empty current directory"""
+    work = tempfile.mkdtemp(prefix="dlms_bench_")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join((os.getcwd(), os.environ.get("PYTHONPATH", ""))))
+    res = subprocess.run(
+        (sys.executable, "-X", "importtime", "-c", F"import {module}"),
+        cwd=work,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True)
+    ret = dict()
+    for line in res.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                ret[name.strip()] = int(self_us)
+    return ret, sorted(p.name for p in Path(work).iterdir())
+
+
+def main(module: str = F"{PACKAGE}.pool", max_own_ms: float = None):
+    times, created = measure(module)
+    own = {name: us for name, us in times.items() if name.startswith(PACKAGE)}
+    print(F"total: {sum(times.values()) / 1000:.1f}ms, {PACKAGE}: {sum(own.values()) / 1000:.1f}ms")
+    for name, us in sorted(own.items(), key=lambda item: -item[1]):
+        print(F"  {name:40s} {us / 1000:.2f}ms")
+    print(F"created in current directory: {created or 'nothing'}")
+    if created or (max_own_ms is not None and sum(own.values()) / 1000 > max_own_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *map(float, sys.argv[2:3]))
@@ -0,0 +1,45 @@
+"""cold vs snapshot type loading. Run from project root: python -m bench.bench_snapshot [n_types] [n_objects]"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+work = tempfile.mkdtemp(prefix="dlms_bench_")
+os.chdir(work)
+for d in ("Types", "XML_devices", "Templates"):
+    Path(d).mkdir()
+
+from src.DLMSAdapter.xml_ import Xml50, snapshot
+from bench.synthetic import make_collection, get_id
+
+os.environ.setdefault(snapshot.KEY_ENV, "bench")  # snapshots disabled without key
+
+
+def main(n_types: int = 10, n_objects: int = 500):
+    ids = [get_id(n) for n in range(n_types)]
+    for col_id in ids:
+        Xml50.set_collection(make_collection(n_objects, col_id))
+    paths = [Xml50.get_col_path(col_id) for col_id in ids]
+    # cold: xml parsing
+    for path in paths:
+        snapshot.get_path(path).unlink(missing_ok=True)
+    Xml50._load_collection.cache_clear()
+    t = time.perf_counter()
+    for col_id in ids:
+        Xml50._get_collection(col_id)
+    cold = time.perf_counter() - t
+    # snapshot, written by previous loading
+    Xml50._load_collection.cache_clear()
+    t = time.perf_counter()
+    for col_id in ids:
+        Xml50._get_collection(col_id)
+    snap = time.perf_counter() - t
+    print(F"types: {n_types}, objects: {n_objects}")
+    print(F"cold(xml):  {cold:.3f}s, {cold / n_types * 1000:.1f}ms per type")
+    print(F"snapshot:   {snap:.3f}s, {snap / n_types * 1000:.1f}ms per type")
+    print(F"speedup:    {cold / snap:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""Xml50 file per meter vs Sqlite: data write throughput and lookup latency. Meters written by batches, 1M scale is
+python -m bench.bench_sqlite 1000000.
+Run from project root: python -m bench.bench_sqlite [n_meters] [n_objects] [n_lookups] [batch]"""
+import sys
+import time
+import random
+import tempfile
+from src.DLMSAdapter import config
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter.sqlite_ import Sqlite
+from src.DLMSAdapter.view import CowCollection
+from bench.synthetic import make_collection
+
+
+def ldn(n: int) -> bytearray:
+    return bytearray(F"XXX{n:014d}".encode("ascii"))
+
+
+def meters(parent, start: int, stop: int) -> list[CowCollection]:
+    ret = list()
+    for n in range(start, stop):
+        col = CowCollection(parent)
+        col.LDN.set_attr(2, ldn(n))
+        col.get_object("0.0.1.0.0.255").set_attr(3, n % 720)
+        ret.append(col)
+    return ret
+
+
+def write(adp, parent, n_meters: int, batch: int) -> float:
+    """meters/s, batch of meters build before each <set_data_many>, building not measured"""
+    total = 0.0
+    for start in range(0, n_meters, batch):
+        cols = meters(parent, start, min(start + batch, n_meters))
+        t = time.perf_counter()
+        adp.set_data_many(cols)
+        total += time.perf_counter() - t
+    return n_meters / total
+
+
+def lookup(adp, parent, numbers: list[int]) -> float:
+    t = time.perf_counter()
+    for n in numbers:
+        col = CowCollection(parent)
+        col.LDN.set_attr(2, ldn(n))
+        adp.get_data(col)
+    return (time.perf_counter() - t) / len(numbers)
+
+
+def main(n_meters: int = 2000, n_objects: int = 50, n_lookups: int = 200, batch: int = 10000):
+    store = config.StoreConfig(root=tempfile.mkdtemp(prefix="dlms_bench_"))
+    type_col = make_collection(n_objects)
+    xml = Xml50(store)
+    db = Sqlite(store=store)
+    xml.set_collection(type_col)
+    db.set_collection(type_col)
+    parent = xml._get_collection(type_col.id)
+    numbers = random.sample(range(n_meters), min(n_lookups, n_meters))
+    print(F"store: {store.root}, meters: {n_meters}, objects: {n_objects}, lookups: {len(numbers)}, batch: {batch}")
+    for name, adp in (("Xml50", xml), ("Sqlite", db)):
+        rate = write(adp, parent, n_meters, batch)
+        latency = lookup(adp, parent, numbers)
+        print(F"{name:7s} write: {rate:.0f} meters/s, lookup: {latency * 1000:.2f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
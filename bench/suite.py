@@ -0,0 +1,117 @@
+"""timing of adapter operations with synthetic collections for all xml format versions. Result is JSON, compare with baseline flag regressions.
+Run from project root: python -m bench.suite [--objects N] [--associations N] [--profiles N] [--repeat N] [--out FILE] [--baseline FILE] [--threshold X]
+Exit 1 if any median more than baseline by <threshold> part"""
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from typing import Callable
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, Template, cst
+from src.DLMSAdapter import config
+from src.DLMSAdapter.xml_ import Base, Xml3, Xml40, Xml41, Xml50, snapshot
+from bench.synthetic import make_collection, register_ln, get_id, write_legacy
+
+ADAPTERS: tuple[type[Base], ...] = (Xml3, Xml40, Xml41, Xml50)
+LEGACY: tuple[type[Base], ...] = (Xml3, Xml40)
+"""without type and data writers, files prepared by <write_legacy>. Other operations not supported is reported as error"""
+type Result = dict[str, float | str]
+"""min, median in seconds, or error"""
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Callable[[], object] = None) -> Result:
+    times = list()
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            t = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t)
+    except Exception as e:
+        return {"error": F"{e.__class__.__name__}: {e}"}
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def clear_type(adp: Base, col: Collection):
+    """drop parsed type from memory and snapshot"""
+    adp._load_collection.cache_clear()
+    snapshot.get_path(adp.get_col_path(col.id)).unlink(missing_ok=True)
+
+
+def fresh(adp: Base, col: Collection) -> Collection:
+    ret, _ = adp.get_collection(col.id)
+    ret.LDN.set_attr(2, col.LDN.value.encoding)
+    return ret
+
+
+def run_adapter(adp: Base, col: Collection, template: Template, repeat: int) -> dict[str, Result]:
+    ret = dict()
+    if type(adp)._origin in LEGACY:
+        write_legacy(adp, col)
+    ret["set_collection"] = measure(lambda: adp.set_collection(col), repeat)
+    ret["get_collection_cold"] = measure(lambda: adp.get_collection(col.id), repeat, setup=lambda: clear_type(adp, col))
+    ret["get_collection_warm"] = measure(lambda: adp.get_collection(col.id), repeat)
+    ret["set_data"] = measure(lambda: adp.set_data(col), repeat)
+    target: list[Collection] = list()
+    ret["get_data"] = measure(lambda: adp.get_data(target[-1]), repeat, setup=lambda: target.append(fresh(adp, col)))
+    ret["set_template"] = measure(lambda: adp.set_template(template), repeat)
+    ret["get_template"] = measure(lambda: adp.get_template(template.name), repeat)
+    return ret
+
+
+def run(n_objects: int = 100, n_associations: int = 1, n_profiles: int = 2, repeat: int = 5) -> dict:
+    col = make_collection(n_objects, get_id(), n_associations=n_associations, n_profiles=n_profiles)
+    template = Template(
+        name="bench",
+        collections=[col],
+        used={cst.LogicalName(bytearray(register_ln(n))): {2} for n in range(min(10, n_objects))})
+    return {
+        "params": {"objects": n_objects, "associations": n_associations, "profiles": n_profiles, "repeat": repeat},
+        "python": platform.python_version(),
+        "results": {adp.__name__: run_adapter(adp(config.StoreConfig(root=tempfile.mkdtemp(prefix="dlms_bench_"))), col, template, repeat) for adp in ADAPTERS}}
+
+
+def compare(result: dict, baseline: dict, threshold: float = 0.2) -> list[str]:
+    """return regressions: median more than baseline by <threshold> part"""
+    ret = list()
+    for adp, ops in result["results"].items():
+        for op, res in ops.items():
+            if (base := baseline.get("results", dict()).get(adp, dict()).get(op)) is None:
+                continue
+            elif "error" in res and "error" not in base:
+                ret.append(F"{adp}.{op}: {res['error']}")
+            elif "median" in res and "median" in base and res["median"] > base["median"] * (1 + threshold):
+                ret.append(F"{adp}.{op}: {res['median'] * 1000:.2f}ms, baseline {base['median'] * 1000:.2f}ms")
+    return ret
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.suite", description="adapter operations benchmark")
+    parser.add_argument("--objects", type=int, default=100)
+    parser.add_argument("--associations", type=int, default=1)
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="write result JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with result JSON")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    result = run(args.objects, args.associations, args.profiles, args.repeat)
+    text = json.dumps(result, indent=2)
+    if args.out is None:
+        print(text)
+    else:
+        args.out.write_text(text)
+    if args.baseline is not None:
+        if regressions := compare(result, json.loads(args.baseline.read_text()), args.threshold):
+            for r in regressions:
+                print(F"regression {r}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
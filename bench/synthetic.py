@@ -0,0 +1,133 @@
+"""synthetic Collection generator for benchmarks. Type and data files of legacy xml formats without writers(Xml3, Xml40)"""
+from DLMS_SPODES.cosem_interface_classes import collection, overview
+from DLMS_SPODES.types import cdt, cst
+from src.DLMSAdapter.xml_ import Base, Xml3, Xml40, Xml41, Xml50, SavePlan, ET
+
+
+def _object_list_element(class_id: int, version: int, ln: bytes, attrs: list[tuple[int, int]]) -> bytes:
+    """return encoding of ObjectListElement. attrs: (attribute_id, access_mode)"""
+    ret = bytearray(b"\x02\x04\x12") + class_id.to_bytes(2, "big") + b"\x11" + bytes([version]) + b"\x09\x06" + ln
+    ret += b"\x02\x02\x01" + bytes([len(attrs)])
+    for i, mode in attrs:
+        ret += b"\x02\x03\x0f" + bytes([i]) + b"\x16" + bytes([mode]) + b"\x00"
+    ret += b"\x01\x00"
+    return bytes(ret)
+
+
+def _array(elements: list[bytes]) -> bytes:
+    if len(elements) < 0x80:
+        length = bytes([len(elements)])
+    else:
+        length = b"\x82" + len(elements).to_bytes(2, "big")
+    return b"\x01" + length + b"".join(elements)
+
+
+def register_ln(n: int) -> bytes:
+    return bytes((1, 0, 1 + n // 250, 8, n % 250, 255))
+
+
+def get_id(n: int = 0) -> collection.ID:
+    return collection.ID(
+        man=b"XXX",
+        f_id=collection.ParameterValue(b"\x00\x00\x60\x01\x01\xff\x02", cdt.OctetString(bytearray(b"BENCH")).encoding),
+        f_ver=collection.ParameterValue(b"\x00\x00\x00\x02\x01\xff\x02", cdt.OctetString(bytearray(F"1.0.{n}".encode("ascii"))).encoding))
+
+
+SPODES_3 = collection.ParameterValue(b"\x00\x00\x60\x01\x06\xff\x02", cdt.OctetString(bytearray(b"3.0")).encoding)
+"""country version 0.0.96.1.6.255:2"""
+
+
+def profile_ln(n: int) -> bytes:
+    return bytes((1, 0, 99, 1, n, 255))
+
+
+def association_ln(n: int) -> bytes:
+    """from 0.0.40.0.3.255, the association of set_data"""
+    return bytes((0, 0, 40, 0, 3 + n, 255))
+
+
+def _capture_object(class_id: int, ln: bytes, i: int) -> bytes:
+    return b"\x02\x04\x12" + class_id.to_bytes(2, "big") + b"\x09\x06" + ln + b"\x0f" + bytes([i]) + b"\x12\x00\x00"
+
+
+def make_collection(
+        n_objects: int = 100,
+        col_id: collection.ID = None,
+        ldn: bytes = b"XXX00000000000001",
+        n_associations: int = 1,
+        n_profiles: int = 0,
+        n_captures: int = 8) -> collection.Collection:
+    """return Collection with Clock, <n_associations> AssociationLN, <n_objects> Register objects and <n_profiles> ProfileGeneric
+    with Clock and <n_captures> first Register in capture_objects. Country is set for header of all xml versions"""
+    col = collection.Collection(
+        id_=get_id() if col_id is None else col_id,
+        country=overview.CountrySpecificIdentifiers.RUSSIA,
+        cntr_ver=SPODES_3)
+    clock_ln = bytes((0, 0, 1, 0, 0, 255))
+    elements = [_object_list_element(15, 1, association_ln(k), [(1, 1), (2, 1), (3, 1)]) for k in range(n_associations)]
+    elements.extend((
+        _object_list_element(1, 0, bytes((0, 0, 42, 0, 0, 255)), [(1, 1), (2, 1)]),
+        _object_list_element(8, 0, clock_ln, [(1, 1), (2, 3), (3, 3)])))
+    for n in range(n_objects):
+        elements.append(_object_list_element(3, 0, register_ln(n), [(1, 1), (2, 1), (3, 1)]))
+    for n in range(n_profiles):
+        elements.append(_object_list_element(7, 1, profile_ln(n), [(1, 1), (2, 1), (3, 1), (4, 3), (5, 1), (6, 1), (7, 1), (8, 1)]))
+    object_list = _array(elements)
+    for k in range(n_associations):
+        ass = col.add(overview.ClassID.ASSOCIATION_LN, overview.Version.V1, cst.LogicalName(bytearray(association_ln(k))))
+        ass.set_attr(2, object_list)
+        ass.set_attr(3, bytes((2, 2, 0x0f, 0x30 + k, 0x12, 0, 1)))
+    for el in col.getASSOCIATION(3).object_list:
+        col.add_if_missing(el.class_id, el.version, el.logical_name)
+    for n in range(n_objects):
+        reg = col.get_object(register_ln(n))
+        reg.set_attr(3, bytes((2, 2, 0x0f, 0, 0x16, 30)))
+        reg.set_attr(2, cdt.DoubleLongUnsigned(n).encoding)
+    capture_objects = _array([_capture_object(8, clock_ln, 2)] + [_capture_object(3, register_ln(n), 2) for n in range(min(n_captures, n_objects))])
+    for n in range(n_profiles):
+        profile = col.get_object(profile_ln(n))
+        profile.set_attr(6, _capture_object(8, clock_ln, 2))
+        profile.set_attr(5, b"\x16\x01")
+        profile.set_attr(4, cdt.DoubleLongUnsigned(1800).encoding)
+        profile.set_attr(3, capture_objects)
+        profile.set_attr(8, cdt.DoubleLongUnsigned(1000).encoding)
+    col.get_object(clock_ln).set_attr(3, 180)
+    col.LDN.set_attr(2, bytearray(ldn))
+    return col
+
+
+def legacy_type(adp: type[Base], col: collection.Collection) -> ET.Element:
+    """type root node of <adp> format: Xml40 as Xml41 with own header, Xml3 with <object> of all attributes"""
+    if adp.VERSION >= Xml40.VERSION:
+        r_n = Xml41.collection2root(col)
+        r_n.set("version", str(adp.VERSION))
+        return r_n
+    r_n = Xml3._get_root_node(col, Xml3.TYPE_ROOT_TAG)
+    for obj in col:
+        object_node = ET.SubElement(r_n, "object", attrib={"ln": obj.logical_name.get_report().msg})
+        ET.SubElement(object_node, "class_id").text = str(int(obj.CLASS_ID))
+        if obj.VERSION is not None:
+            ET.SubElement(object_node, "version").text = str(int(obj.VERSION))
+        for i, attr in obj.get_index_with_attributes():
+            if i != 1 and attr is not None:
+                ET.SubElement(object_node, "attribute", attrib={"index": str(i)}).text = attr.encoding.hex()
+    return r_n
+
+
+def legacy_data(adp: type[Base], col: collection.Collection, ass_id: int = 3) -> ET.Element:
+    """data root node of <adp> format with attributes keeping by <ass_id>"""
+    r_n = adp._get_root_node(col, adp.DATA_ROOT_TAG)
+    attr_tag = "attr" if adp.VERSION >= Xml40.VERSION else "attribute"
+    objects, _ = Xml50.col2objects(col, SavePlan.compile(col, ass_id))
+    for ln, attrs in objects:
+        object_node = ET.SubElement(r_n, "object", attrib={"ln": ".".join(map(str, ln))})
+        for i, encoding in attrs:
+            ET.SubElement(object_node, attr_tag, attrib={"index": str(i)}).text = encoding.hex()
+    return r_n
+
+
+def write_legacy(adp: Base, col: collection.Collection):
+    """type and data files of <col> in <adp> format, for adapter without writers. Type is placed by Xml41 to store of <adp>"""
+    Xml41(adp.store).set_collection(col)
+    adp._write(adp.get_col_path(col.id), adp._encode(legacy_type(type(adp), col), "cp1251"))
+    adp._write(adp._get_keep_path(col), adp._encode(legacy_data(type(adp), col), "cp1251"))
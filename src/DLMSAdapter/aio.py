@@ -0,0 +1,117 @@
+"""asyncio counterpart of Adapter. Parsing and file I/O run in bounded executor, sync adapters keep working as before"""
+import asyncio
+import logging
+from functools import partial
+from typing import Callable, Iterable, Any
+from concurrent.futures import Executor, ThreadPoolExecutor
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ID, ParameterValue, Template
+from DLMS_SPODES import exceptions as exc
+from .main import Adapter, Manufacturer, dedupe_by_ldn
+from .catalog import Catalog
+from .pool import AdapterPool
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAdapter:
+    """async wrapper of sync <adapter>. Calls run in <executor>(own ThreadPoolExecutor with <max_workers> if None).
+    Not more than <max_pending> calls submitted at once, other wait in event loop(backpressure)"""
+    __adapter: Adapter
+    __executor: Executor
+    __own_executor: bool
+    __max_pending: int
+    __sem: asyncio.Semaphore | None
+
+    def __init__(self, adapter: Adapter,
+                 executor: Executor = None,
+                 max_workers: int = 4,
+                 max_pending: int = 16):
+        if max_pending < 1:
+            raise ValueError(F"{max_pending=}, expected >= 1")
+        self.__adapter = adapter
+        if executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=F"{self.__class__.__name__}")
+            self.__own_executor = True
+        else:
+            self.__executor = executor
+            self.__own_executor = False
+        self.__max_pending = max_pending
+        self.__sem = None
+
+    @property
+    def adapter(self) -> Adapter:
+        return self.__adapter
+
+    async def _run[T](self, func: Callable[..., T], *args: Any) -> T:
+        if self.__sem is None:
+            self.__sem = asyncio.Semaphore(self.__max_pending)
+        async with self.__sem:
+            return await asyncio.get_running_loop().run_in_executor(self.__executor, partial(func, *args))
+
+    async def set_collection(self, col: Collection):
+        return await self._run(self.__adapter.set_collection, col)
+
+    async def get_collection(self, col_id: ID) -> tuple[Collection, list[Exception]]:
+        return await self._run(self.__adapter.get_collection, col_id)
+
+    async def get_collectionIDs(self) -> list[ID]:
+        return await self._run(self.__adapter.get_collectionIDs)
+
+    async def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        return await self._run(self.__adapter.get_ID_tree)
+
+    async def get_catalog(self) -> Catalog:
+        return await self._run(self.__adapter.get_catalog)
+
+    async def set_data(self, col: Collection, ass_id: int = 3) -> list[Exception]:
+        return await self._run(self.__adapter.set_data, col, ass_id)
+
+    async def get_data(self, col: Collection):
+        return await self._run(self.__adapter.get_data, col)
+
+    async def set_data_many(self, cols: Iterable[Collection], ass_id: int = 3) -> list[list[Exception]]:
+        """async <set_data> for several collections. Collections dedupe by LDN, the last is keeping. Return errors for each collection"""
+        keys, unique = dedupe_by_ldn(cols)
+        res = await asyncio.gather(*(self.set_data(col, ass_id) for col in unique.values()), return_exceptions=True)
+        errors: dict[bytes, list[Exception]] = dict()
+        for ldn, r in zip(unique.keys(), res):
+            if isinstance(r, Exception):
+                errors[ldn] = [r]
+            elif r is not None:
+                errors[ldn] = list(r)
+        return [[exc.EmptyObj("No LDN value in collection")] if key is None else list(errors.get(key, ())) for key in keys]
+
+    async def get_data_many(self, cols: Iterable[Collection]) -> list[list[Exception]]:
+        """async <get_data> for several collections. Return errors for each collection"""
+        res = await asyncio.gather(*(self.get_data(col) for col in cols), return_exceptions=True)
+        return [[r] if isinstance(r, Exception) else list(r or ()) for r in res]
+
+    async def set_template(self, template: Template):
+        return await self._run(self.__adapter.set_template, template)
+
+    async def get_template(self, name: str, forced_col: Collection = None) -> Template:
+        if forced_col is None:
+            return await self._run(self.__adapter.get_template, name)
+        return await self._run(self.__adapter.get_template, name, forced_col)
+
+    async def get_templates(self) -> list[str]:
+        return await self._run(self.__adapter.get_templates)
+
+    def close(self, wait: bool = True):
+        """shutdown own executor. Given executor is not shutdown"""
+        if self.__own_executor:
+            self.__executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+class AsyncPool(AsyncAdapter):
+    """async Pool: adapters fallback from toml(or given <pool>) as in AdapterPool"""
+
+    def __init__(self, executor: Executor = None, max_workers: int = 4, max_pending: int = 16, pool: AdapterPool = None):
+        super().__init__(AdapterPool() if pool is None else pool, executor, max_workers, max_pending)
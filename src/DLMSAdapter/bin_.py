@@ -0,0 +1,230 @@
+"""compact binary data format: versioned header and length-prefixed records with raw attribute encoding, without hex and xml.
+Layout, integers little-endian:
+    header: MAGIC, VERSION(u8), dlms_ver(u8, 0xff if absence), country(u16, 0xffff if absence),
+            country_ver, manufacturer, firm_id, firm_ver: (u16 length, bytes), empty if absence
+    record: LN(6 bytes), attribute index(u8), encoding(u32 length, bytes)
+Types keep in Xml50 format"""
+import os
+import struct
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ParameterValue, ID
+from DLMS_SPODES.cosem_interface_classes import collection
+from DLMS_SPODES import exceptions as exc
+from .main import AdapterException
+from .xml_ import Xml50, Xml40, DataRecord
+from .version_index import VersionIndex
+
+
+logger = logging.getLogger(__name__)
+MAGIC: bytes = b"DLMSDATA"
+VERSION: int = 1
+"""format version. Increase with change of layout"""
+SUFFIX: str = ".bin"
+_head = struct.Struct("<BBH")
+_len16 = struct.Struct("<H")
+_record = struct.Struct("<6sBI")
+type Record = tuple[memoryview, int, memoryview]
+"""LN, attribute index, encoding"""
+
+
+@dataclass(frozen=True)
+class Header:
+    col_id: ID
+    dlms_ver: int | None = None
+    country: int | None = None
+    country_ver: ParameterValue | None = None
+
+    @classmethod
+    def from_root(cls, r_n: ET.Element) -> "Header":
+        """from DLMSServerData root node"""
+        try:
+            return cls(
+                col_id=collection.ID(
+                    man=bytes.fromhex(r_n.findtext("manufacturer")),
+                    f_id=Xml50.node2parval(r_n.find("firm_id")),
+                    f_ver=Xml50.node2parval(r_n.find("firm_ver"))),
+                dlms_ver=None if (dlms_ver := r_n.findtext("dlms_ver")) is None else int(dlms_ver),
+                country=None if (country := r_n.findtext("country")) is None else int(country),
+                country_ver=None if (country_ver_el := r_n.find("country_ver")) is None else Xml50.node2parval(country_ver_el))
+        except (TypeError, AttributeError, ValueError) as e:
+            raise AdapterException(F"wrong data header: {e}")
+
+    def to_root(self) -> ET.Element:
+        """return DLMSServerData root node with header"""
+        r_n = Xml50._create_root_node(Xml50.DATA_ROOT_TAG)
+        if self.dlms_ver is not None:
+            ET.SubElement(r_n, "dlms_ver").text = str(self.dlms_ver)
+        if self.country is not None:
+            ET.SubElement(r_n, "country").text = str(self.country)
+            if self.country_ver is not None:
+                Xml50.parval2node(r_n, "country_ver", self.country_ver)
+        ET.SubElement(r_n, "manufacturer").text = self.col_id.man.hex()
+        Xml50.parval2node(r_n, "firm_id", self.col_id.f_id)
+        Xml50.parval2node(r_n, "firm_ver", self.col_id.f_ver)
+        return r_n
+
+    def __bytes__(self):
+        ret = bytearray(MAGIC)
+        ret.extend(_head.pack(
+            VERSION,
+            0xff if self.dlms_ver is None else self.dlms_ver,
+            0xffff if self.country is None else self.country))
+        for value in (
+            b"" if self.country_ver is None else bytes(self.country_ver),
+            self.col_id.man,
+            bytes(self.col_id.f_id),
+            bytes(self.col_id.f_ver)
+        ):
+            ret.extend(_len16.pack(len(value)))
+            ret.extend(value)
+        return bytes(ret)
+
+    @classmethod
+    def parse(cls, data: memoryview) -> tuple["Header", int]:
+        """return header and offset of first record"""
+        if data[:len(MAGIC)] != MAGIC:
+            raise AdapterException("not binary data: wrong magic")
+        ver, dlms_ver, country = _head.unpack_from(data, offset := len(MAGIC))
+        if ver != VERSION:
+            raise AdapterException(F"unknown binary data version {ver}, expected {VERSION}")
+        offset += _head.size
+        values = list()
+        for _ in range(4):
+            length, = _len16.unpack_from(data, offset)
+            offset += _len16.size
+            values.append(bytes(data[offset: offset + length]))
+            offset += length
+        country_ver, man, f_id, f_ver = values
+        return cls(
+            col_id=collection.ID(
+                man=man,
+                f_id=ParameterValue.parse(f_id),
+                f_ver=ParameterValue.parse(f_ver)),
+            dlms_ver=None if dlms_ver == 0xff else dlms_ver,
+            country=None if country == 0xffff else country,
+            country_ver=ParameterValue.parse(country_ver) if country_ver else None), offset
+
+
+def dumps(header: Header, objects: list[tuple[bytes, list[tuple[int, bytes]]]]) -> bytes:
+    """return file content by <objects> as LN: [(attribute index, encoding)]"""
+    ret = bytearray(bytes(header))
+    for ln, attrs in objects:
+        for i, encoding in attrs:
+            ret.extend(_record.pack(ln, i, len(encoding)))
+            ret.extend(encoding)
+    return bytes(ret)
+
+
+def write(path: Path, header: Header, objects: list[tuple[bytes, list[tuple[int, bytes]]]]):
+    tmp = path.with_suffix(F"{SUFFIX}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(dumps(header, objects))
+    os.replace(tmp, path)
+
+
+def loads(data: bytes) -> tuple[Header, Iterator[Record]]:
+    """return header and records as memoryview slices of <data>"""
+    mv = memoryview(data)
+    header, offset = Header.parse(mv)
+    return header, _iter_records(mv, offset)
+
+
+def _iter_records(mv: memoryview, offset: int) -> Iterator[Record]:
+    end = len(mv)
+    while offset < end:
+        if offset + _record.size > end:
+            raise AdapterException(F"truncated record at {offset}")
+        ln, i, length = _record.unpack_from(mv, offset)
+        offset += _record.size
+        if offset + length > end:
+            raise AdapterException(F"truncated encoding at {offset}")
+        yield mv[offset - _record.size: offset - _record.size + 6], i, mv[offset: offset + length]
+        offset += length
+
+
+def read(path: Path) -> tuple[Header, Iterator[Record]]:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def xml2bin(src: Path, dst: Path):
+    """convert DLMSServerData xml file to binary"""
+    r_n = ET.parse(src).getroot()
+    if not Xml50._is_header(r_n, Xml50.DATA_ROOT_TAG, Xml50.VERSION):
+        raise AdapterException(F"{src} is not {Xml50.DATA_ROOT_TAG} {Xml50.VERSION}")
+    objects = list()
+    for obj_el in r_n.iterfind("object"):
+        objects.append((
+            bytes(map(int, obj_el.attrib["ln"].split("."))),
+            [(int(attr_el.attrib["index"]), bytes.fromhex(attr_el.text)) for attr_el in obj_el.iterfind("attr")]))
+    write(dst, Header.from_root(r_n), objects)
+
+
+def bin2xml(src: Path, dst: Path):
+    """convert binary data file to DLMSServerData xml"""
+    header, records = read(src)
+    r_n = header.to_root()
+    object_node, last_ln = None, None
+    for ln, i, encoding in records:
+        if ln != last_ln:
+            object_node = ET.SubElement(r_n, "object", attrib={'ln': ".".join(map(str, ln))})
+            last_ln = ln
+        ET.SubElement(object_node, "attr", attrib={'index': str(i)}).text = encoding.hex()
+    with open(dst, "wb") as f:
+        f.write(ET.tostring(r_n, encoding="UTF-8", method="xml"))
+
+
+class Bin50(Xml50):
+    """Xml50 with binary data files"""
+
+    @classmethod
+    def get_manufactures_container(cls) -> dict[bytes, dict[bytes, dict[bytes, Path]]]:
+        """types of Xml50 on same store"""
+        return cls._on_store(Xml50).get_manufactures_container()
+
+    @classmethod
+    def get_version_index(cls) -> dict[tuple[bytes, bytes], VersionIndex]:
+        return cls._on_store(Xml50).get_version_index()
+
+    @classmethod
+    def _get_keep_path(cls, col: Collection) -> Path:
+        if (ldn := col.LDN.value) is None:
+            raise exc.EmptyObj(F"No LDN value in collection")
+        return (cls.store.data / ldn.contents.hex()).with_suffix(SUFFIX)
+
+    @classmethod
+    def _keep_record(cls, record: DataRecord) -> list[Exception]:
+        changed, errors = cls.changed_objects(cls.get_parent_encodings(record.col_id), record.objects)
+        if len(changed) != 0:
+            write(record.path, Header.from_root(record.r_n), changed)
+        else:
+            logger.warning("nothing save. all attributes according with origin collection")
+        return errors
+
+    @classmethod
+    def get_data(cls, col: Collection):
+        path = cls._get_keep_path(col)
+        logger.info(F"find data {path=}")
+        try:
+            header, records = read(path)
+        except FileNotFoundError as e:
+            raise AdapterException(F"not find data for {col}: {e}")
+        cls.set_parameters(header.to_root(), col)
+        obj, skip_ln = None, None
+        for ln, i, encoding in records:
+            if ln == skip_ln:
+                continue
+            elif obj is None or obj.logical_name.contents != ln:
+                if (obj := col.get(bytes(ln))) is None:
+                    logger.error(F"got object with ln={ln.hex()} not find in collection. Abort attribute setting")
+                    skip_ln = ln
+                    continue
+            if not Xml40.set_attr_data(obj, i, bytes(encoding)):
+                skip_ln = ln
+
+
+bin50 = Bin50()
@@ -0,0 +1,368 @@
+"""memory-bounded LRU cache for parsed types, their encodings and type paths. Evict by estimated footprint, not by entries count.
+TTL-bounded negative cache for failed lookups"""
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Hashable, Any
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ID
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+OBJECT_BYTES: int = 4096
+"""estimated memory of one COSEM object without attribute values, measured with tracemalloc"""
+ENCODING_FACTOR: int = 8
+"""estimated memory of attribute value per encoding byte"""
+ENTRY_BYTES: int = 100
+"""estimated memory of dict entry with key and bytes header"""
+
+
+def sizeof_collection(col: Collection) -> int:
+    """estimated memory of collection"""
+    ret = 0
+    for obj in col:
+        ret += OBJECT_BYTES
+        for _, attr in obj.get_index_with_attributes():
+            if attr is not None:
+                ret += ENCODING_FACTOR * len(attr.encoding)
+    return ret
+
+
+def sizeof_loaded(value: tuple[Collection, tuple[Exception, ...]]) -> int:
+    """estimated memory of parsed type with failures"""
+    return sizeof_collection(value[0]) + ENTRY_BYTES * len(value[1])
+
+
+def sizeof_encodings(index: dict[bytes, dict[int, bytes]]) -> int:
+    """estimated memory of parent encodings index"""
+    return sum(ENTRY_BYTES + sum(ENTRY_BYTES + len(encoding) for encoding in attrs.values()) for attrs in index.values())
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    resident_bytes: int
+    entries: int
+    max_bytes: int
+    waits: int = 0
+    """misses joined to load of other thread"""
+
+
+class _Flight:
+    """load of one key by leader thread, other threads wait result"""
+    __slots__ = ("stale", "done", "value", "error")
+
+    def __init__(self):
+        self.stale = False
+        """key invalidated while loading: value returned, not kept"""
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+    def result(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class TypeCache:
+    """thread-safe LRU with memory budget <max_bytes> and optional <max_entries>. <sizeof> estimate value memory.
+    Value bigger than budget is returned but not kept. <load> is single-flight: one loader by key, others wait it.
+    Value of load started before invalidation of its key is returned to callers but not kept"""
+    __data: OrderedDict[Hashable, tuple[Any, int]]
+    __flights: dict[Hashable, _Flight]
+
+    def __init__(self, max_bytes: int,
+                 max_entries: int = None,
+                 sizeof: Callable[[Any], int] = sys.getsizeof):
+        self.__data = OrderedDict()
+        self.__flights = dict()
+        self.__lock = threading.RLock()
+        self.__sizeof = sizeof
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.__resident = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__waits = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            if (item := self.__data.get(key)) is None:
+                self.__misses += 1
+                return default
+            self.__data.move_to_end(key)
+            self.__hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = self.__sizeof(value)
+        with self.__lock:
+            self.__pop(key)
+            if size > self.max_bytes:
+                logger.warning(F"not keep {key=} in cache: {size=} more than {self.max_bytes=}")
+                return
+            self.__data[key] = (value, size)
+            self.__resident += size
+            self.__shrink()
+
+    def load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """return kept value or result of <loader>. Concurrent calls with one key run <loader> once"""
+        with self.__lock:
+            if (item := self.__data.get(key)) is not None:
+                self.__data.move_to_end(key)
+                return item[0]
+            if (flight := self.__flights.get(key)) is not None:
+                self.__waits += 1
+                leader = False
+            else:
+                flight = self.__flights[key] = _Flight()
+                leader = True
+        if not leader:
+            return flight.result()
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            with self.__lock:
+                if not flight.stale:
+                    self.put(key, flight.value)
+            return flight.value
+        finally:
+            with self.__lock:
+                if self.__flights.get(key) is flight:
+                    del self.__flights[key]
+            flight.done.set()
+
+    def invalidate(self, key: Hashable) -> bool:
+        """remove one entry, return True if it was. Result of in-flight load of <key> not kept"""
+        with self.__lock:
+            if (flight := self.__flights.pop(key, None)) is not None:
+                flight.stale = True
+            return self.__pop(key)
+
+    def invalidate_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """remove entries with key matching <predicate>, return amount. Result of matching in-flight loads not kept"""
+        with self.__lock:
+            for k in [k for k in self.__flights if predicate(k)]:
+                self.__flights.pop(k).stale = True
+            keys = [k for k in self.__data if predicate(k)]
+            for k in keys:
+                self.__pop(k)
+            return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            for flight in self.__flights.values():
+                flight.stale = True
+            self.__flights.clear()
+            self.__data.clear()
+            self.__resident = 0
+
+    def resize(self, max_bytes: int = None, max_entries: int = None):
+        """change limits, evict if need"""
+        with self.__lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self.__shrink()
+
+    def __pop(self, key: Hashable) -> bool:
+        if (item := self.__data.pop(key, None)) is None:
+            return False
+        self.__resident -= item[1]
+        return True
+
+    def __shrink(self):
+        while (
+            self.__resident > self.max_bytes
+            or (self.max_entries is not None and len(self.__data) > self.max_entries)
+        ):
+            _, (_, size) = self.__data.popitem(last=False)
+            self.__resident -= size
+            self.__evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__data
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                resident_bytes=self.__resident,
+                entries=len(self.__data),
+                max_bytes=self.max_bytes,
+                waits=self.__waits)
+
+    def cached[**P, T](self, func: Callable[P, T]) -> Callable[P, T]:
+        """decorator as <functools.lru_cache> with key by positional arguments. Add <cache_clear>, <cache_invalidate_if> by arguments and <cache_info>.
+        Entries of several decorated functions are independent. Concurrent misses of one key call <func> once"""
+        hit, miss = F"cache.{func.__name__}.hit", F"cache.{func.__name__}.miss"
+
+        @wraps(func)
+        def wrapper(*args):
+            key = (func, *args)
+            if (ret := self.get(key, _MISS)) is _MISS:
+                metrics.count(miss)
+                ret = self.load(key, lambda: func(*args))
+            else:
+                metrics.count(hit)
+            return ret
+
+        wrapper.cache_clear = lambda: self.invalidate_if(lambda k: k[0] is func)
+        wrapper.cache_invalidate_if = lambda predicate: self.invalidate_if(lambda k: k[0] is func and predicate(k[1:]))
+        wrapper.cache_info = lambda: self.stats
+        return wrapper
+
+
+@dataclass(frozen=True)
+class NegativeStats:
+    hits: int
+    """raised from cache"""
+    misses: int
+    """failures kept"""
+    expired: int
+    invalidated: int
+    entries: int
+    ttl: float
+
+
+class NegativeCache:
+    """thread-safe keeper of failures by key for <ttl> seconds, not more than <max_entries> (oldest dropped).
+    Keep exception type and arguments, raise new instance on hit"""
+    __data: OrderedDict[Hashable, tuple[type[Exception], tuple, float]]
+
+    def __init__(self, ttl: float = 60.0,
+                 max_entries: int = 10_000):
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.__hits = 0
+        self.__misses = 0
+        self.__expired = 0
+        self.__invalidated = 0
+
+    def check(self, key: Hashable):
+        """raise kept failure if it is not expired"""
+        with self.__lock:
+            if (item := self.__data.get(key)) is None:
+                return
+            exc_type, args, expires = item
+            if expires <= time.monotonic():
+                del self.__data[key]
+                self.__expired += 1
+                return
+            self.__hits += 1
+        raise exc_type(*args)
+
+    def put(self, key: Hashable, e: Exception):
+        with self.__lock:
+            self.__data.pop(key, None)
+            self.__data[key] = (type(e), e.args, time.monotonic() + self.ttl)
+            self.__misses += 1
+            while len(self.__data) > self.max_entries:
+                self.__data.popitem(last=False)
+
+    def invalidate_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """remove failures with key matching <predicate>, return amount"""
+        with self.__lock:
+            keys = [k for k in self.__data if predicate(k)]
+            for k in keys:
+                del self.__data[k]
+            self.__invalidated += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.__invalidated += len(self.__data)
+            self.__data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__data
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @property
+    def stats(self) -> NegativeStats:
+        with self.__lock:
+            return NegativeStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                expired=self.__expired,
+                invalidated=self.__invalidated,
+                entries=len(self.__data),
+                ttl=self.ttl)
+
+    def cached[**P, T](self, *exc_types: type[Exception]) -> Callable[[Callable[P, T]], Callable[P, T]]:
+        """decorator: keep <exc_types> raised by function with key by positional arguments. Add <miss_clear>"""
+        def decorator(func: Callable[P, T]) -> Callable[P, T]:
+            negative_hit = F"cache.{func.__name__}.negative_hit"
+
+            @wraps(func)
+            def wrapper(*args):
+                key = (func, *args)
+                try:
+                    self.check(key)
+                except exc_types:
+                    metrics.count(negative_hit)
+                    raise
+                try:
+                    return func(*args)
+                except exc_types as e:
+                    self.put(key, e)
+                    raise
+
+            wrapper.miss_clear = lambda: self.invalidate_if(lambda k: k[0] is func)
+            return wrapper
+        return decorator
+
+
+_MISS = object()
+type_cache = TypeCache(
+    max_bytes=256 * 1024 ** 2,
+    sizeof=sizeof_loaded)
+"""parsed type collections with failures of parsing"""
+encoding_cache = TypeCache(
+    max_bytes=64 * 1024 ** 2,
+    sizeof=sizeof_encodings)
+"""parent type attribute encodings by LN and index"""
+plan_cache = TypeCache(
+    max_bytes=16 * 1024 ** 2,
+    max_entries=1000)
+"""compiled save plans by type and association"""
+path_cache = TypeCache(
+    max_bytes=4 * 1024 ** 2,
+    max_entries=10_000)
+"""type file paths by ID"""
+template_cache = TypeCache(
+    max_bytes=16 * 1024 ** 2,
+    max_entries=256)
+"""parsed templates by path and modification time"""
+miss_cache = NegativeCache(
+    ttl=60.0,
+    max_entries=10_000)
+"""failed type path lookups by ID. Key end with ID"""
+
+
+def invalidate_misses(col_id: ID) -> int:
+    """remove failed lookups which may be resolved by added type <col_id>: with same manufacturer"""
+    return miss_cache.invalidate_if(lambda k: isinstance(k[-1], ID) and k[-1].man == col_id.man)
@@ -0,0 +1,183 @@
+"""immutable catalog of type IDs with indexes by manufacturer, firm_id and version. Cached by layout, marked stale by type
+store change and built again from previous: keys parsed only for new or changed firm_id families"""
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Self, Hashable
+from semver import Version as SemVer
+from DLMS_SPODES.cosem_interface_classes.collection import ID, ParameterValue, cdt
+from DLMS_SPODES import exceptions as exc
+from . import metrics
+from .main import Manufacturer
+from .version_index import VersionIndex
+
+
+logger = logging.getLogger(__name__)
+type Container = dict[Manufacturer, dict[bytes, dict[bytes | SemVer, Path]]]
+"""adapter container: manufacturer -> firm_id key -> firm_ver key -> type file"""
+
+
+def ver2semver(f_ver: ParameterValue) -> SemVer | None:
+    """decode firmware version, None if it is not SemVer"""
+    try:
+        d = cdt.get_instance_and_pdu_from_value(f_ver.value)[0].contents
+        if SemVer.is_valid(d.decode("utf-8", "ignore")):
+            return SemVer.parse(d, True)
+    except (exc.ITEApplication, ValueError, TypeError, AttributeError):  # wrong parsing
+        pass
+    return None
+
+
+@dataclass(frozen=True, eq=False)
+class Family:
+    """IDs of one manufacturer and firm_id"""
+    man: Manufacturer
+    f_id: ParameterValue
+    ids: tuple[ID, ...]
+    """sorted by version, not SemVer versions at end"""
+    index: VersionIndex[ID]
+    keys: frozenset = frozenset()
+    """container version keys, for reuse by next build"""
+
+    @classmethod
+    def from_ids(cls, man: Manufacturer, f_id: ParameterValue, ids: Iterable[ID], keys: frozenset = frozenset()) -> Self:
+        versioned: list[tuple[SemVer, ID]] = list()
+        other: list[ID] = list()
+        for col_id in ids:
+            if (semver := ver2semver(col_id.f_ver)) is None:
+                other.append(col_id)
+            else:
+                versioned.append((semver, col_id))
+        index = VersionIndex(versioned)
+        return cls(man, f_id, tuple(col_id for _, col_id in index) + tuple(other), index, keys)
+
+
+class Catalog:
+    """read-only indexed IDs. Query results are tuples, <as_tree> return new dict"""
+    __families: dict[tuple[Manufacturer, ParameterValue], Family]
+    __by_man: dict[Manufacturer, tuple[Family, ...]]
+    __ids: tuple[ID, ...]
+
+    def __init__(self, families: Iterable[Family] = ()):
+        self.__families = dict()
+        by_man: dict[Manufacturer, list[Family]] = dict()
+        for f in families:
+            self.__families[(f.man, f.f_id)] = f
+            by_man.setdefault(f.man, list()).append(f)
+        self.__by_man = {m: tuple(fs) for m, fs in by_man.items()}
+        self.__ids = tuple(col_id for f in self.__families.values() for col_id in f.ids)
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[ID]) -> Self:
+        tree: dict[tuple[Manufacturer, ParameterValue], list[ID]] = dict()
+        for col_id in ids:
+            tree.setdefault((col_id.man, col_id.f_id), list()).append(col_id)
+        return cls(Family.from_ids(man, f_id, f_ids) for (man, f_id), f_ids in tree.items())
+
+    @classmethod
+    def from_container(cls, container: Container,
+                       key2id: Callable[[Manufacturer, ParameterValue, bytes | SemVer], ID],
+                       prev: Self = None) -> Self:
+        """build by adapter <container>, reuse families of <prev> with same version keys. Not parsed keys skipped with log"""
+        prev_families: dict[tuple[Manufacturer, bytes], Family] = dict() if prev is None else {(f.man, bytes(f.f_id)): f for f in prev.__families.values()}
+        families: list[Family] = list()
+        for man, m_v in tuple(container.items()):
+            for f_id_k, f_v in tuple(m_v.items()):
+                keys = frozenset(f_v.keys())
+                if (f := prev_families.get((man, f_id_k))) is not None and f.keys == keys:
+                    families.append(f)
+                    continue
+                try:
+                    f_id = ParameterValue.parse(f_id_k)
+                except (exc.ITEApplication, IndexError, TypeError) as e:
+                    logger.error(F"skip firm_id {f_id_k.hex()} of {man}: {e}")
+                    continue
+                ids: list[ID] = list()
+                for f_ver in keys:
+                    try:
+                        ids.append(key2id(man, f_id, f_ver))
+                    except (exc.ITEApplication, IndexError, TypeError) as e:
+                        logger.error(F"skip version {f_ver} of {man}, {f_id}: {e}")
+                families.append(Family.from_ids(man, f_id, ids, keys))
+        return cls(families)
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def __iter__(self) -> Iterator[ID]:
+        return iter(self.__ids)
+
+    def __contains__(self, col_id: ID) -> bool:
+        return (f := self.__families.get((col_id.man, col_id.f_id))) is not None and col_id in f.ids
+
+    @property
+    def ids(self) -> tuple[ID, ...]:
+        return self.__ids
+
+    @property
+    def manufacturers(self) -> tuple[Manufacturer, ...]:
+        return tuple(self.__by_man.keys())
+
+    def by_manufacturer(self, man: Manufacturer) -> tuple[ID, ...]:
+        return tuple(col_id for f in self.__by_man.get(man, ()) for col_id in f.ids)
+
+    def firm_ids(self, man: Manufacturer) -> tuple[ParameterValue, ...]:
+        return tuple(f.f_id for f in self.__by_man.get(man, ()))
+
+    def by_firm_id(self, man: Manufacturer, f_id: ParameterValue) -> tuple[ID, ...]:
+        """IDs sorted by version"""
+        if (f := self.__families.get((man, f_id))) is None:
+            return ()
+        return f.ids
+
+    def by_version(self, man: Manufacturer, f_id: ParameterValue, min_ver: SemVer = None, max_ver: SemVer = None) -> tuple[ID, ...]:
+        """IDs with SemVer version in [<min_ver>, <max_ver>), sorted"""
+        if (f := self.__families.get((man, f_id))) is None:
+            return ()
+        return tuple(col_id for v, col_id in f.index if (min_ver is None or v >= min_ver) and (max_ver is None or v < max_ver))
+
+    def latest_compatible(self, col_id: ID) -> ID | None:
+        """ID with max version compatible with <col_id> version, as adapter fallback lookup"""
+        if (f := self.__families.get((col_id.man, col_id.f_id))) is None or (semver := ver2semver(col_id.f_ver)) is None:
+            return None
+        return f.index.max_compatible(semver)
+
+    def as_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        """as Adapter.get_ID_tree"""
+        ret = dict()
+        for (man, f_id), f in self.__families.items():
+            ret.setdefault(man, dict())[f_id] = set(f.ids)
+        return ret
+
+
+_lock = threading.Lock()
+_generation: int = 0
+_catalogs: dict[Hashable, tuple[int, Catalog]] = dict()
+"""last catalog with generation by layout"""
+
+
+def changed():
+    """mark all catalogs stale, call by type store change"""
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+def get(layout: Hashable,
+        container: Callable[[], Container],
+        key2id: Callable[[Manufacturer, ParameterValue, bytes | SemVer], ID]) -> Catalog:
+    """cached catalog of <layout>(adapter class, bound to store), built from previous if stale"""
+    with _lock:
+        gen = _generation
+        entry = _catalogs.get(layout)
+    if entry is not None and entry[0] == gen:
+        metrics.count("cache.catalog.hit")
+        return entry[1]
+    metrics.count("cache.catalog.miss")
+    with metrics.timer("catalog.build"):
+        ret = Catalog.from_container(container(), key2id, None if entry is None else entry[1])
+    with _lock:
+        if (cur := _catalogs.get(layout)) is None or cur[0] <= gen:
+            _catalogs[layout] = (gen, ret)
+    return ret
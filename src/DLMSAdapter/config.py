@@ -0,0 +1,80 @@
+"""store roots configuration. Resolved on first use by argument, environment or config.toml [DLMSAdapter.Store], directories created on first use"""
+import os
+import logging
+import threading
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+ENV_PREFIX: str = "DLMSADAPTER_"
+"""environment: DLMSADAPTER_ROOT, DLMSADAPTER_TYPES, DLMSADAPTER_DATA, DLMSADAPTER_TEMPLATES"""
+DEFAULTS: dict[str, str] = {
+    "types": "Types",
+    "data": "XML_devices",
+    "templates": "Templates"
+}
+"""store directories relative to root"""
+
+
+def get_toml_values(*args: str) -> dict | None:
+    """values of config.toml, parsed by DLMS_SPODES on first call"""
+    from DLMS_SPODES.config_parser import get_values
+    return get_values(*args)
+
+
+class StoreConfig:
+    """roots of store. Not given argument search in environment, next in config.toml, relative paths from <root>(default current directory)"""
+
+    def __init__(self, root: Path | str = None,
+                 types: Path | str = None,
+                 data: Path | str = None,
+                 templates: Path | str = None):
+        self.__args: dict[str, Path | str | None] = {"root": root, "types": types, "data": data, "templates": templates}
+        self.__paths: dict[str, Path] = dict()
+        self.__lock = threading.RLock()
+
+    def __resolve(self, name: str) -> Path:
+        if (value := self.__args[name]) is None and (value := os.environ.get(F"{ENV_PREFIX}{name.upper()}")) is None:
+            toml_val = get_toml_values("DLMSAdapter", "Store") or dict()
+            value = toml_val.get(name, "." if name == "root" else DEFAULTS[name])
+        if name == "root":
+            return Path(value)
+        return self.root / value
+
+    def __get(self, name: str, create: bool) -> Path:
+        if (path := self.__paths.get(name)) is None:
+            with self.__lock:
+                if (path := self.__paths.get(name)) is None:
+                    path = self.__resolve(name)
+                    if create and not path.exists():
+                        path.mkdir(parents=True)
+                        logger.info(F"create store directory {path}")
+                    self.__paths[name] = path
+        return path
+
+    @property
+    def root(self) -> Path:
+        return self.__get("root", False)
+
+    @property
+    def types(self) -> Path:
+        return self.__get("types", True)
+
+    @property
+    def data(self) -> Path:
+        return self.__get("data", True)
+
+    @property
+    def templates(self) -> Path:
+        return self.__get("templates", True)
+
+    def __reduce__(self):
+        """by arguments, for use in other process"""
+        return self.__class__, tuple(self.__args.values())
+
+    def __repr__(self):
+        return F"{self.__class__.__name__}({", ".join(F"{k}={v!r}" for k, v in self.__args.items() if v is not None)})"
+
+
+store = StoreConfig()
+"""default for all adapters"""
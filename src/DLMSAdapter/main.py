@@ -1,9 +1,15 @@
+import os
+import threading
 from abc import ABC, abstractmethod
+from typing import Iterable, Hashable, Any
+from contextlib import nullcontext, AbstractContextManager
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, Future
 import logging
 from DLMS_SPODES.cosem_interface_classes.collection import (
     Collection, ID,
     ParameterValue,
     Template)
+from DLMS_SPODES import exceptions as exc
 from semver import Version as SemVer
 
 
@@ -37,6 +43,11 @@ class Adapter(ABC):
     def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
         """return tree used CollectionID"""
 
+    def get_catalog(self) -> "Catalog":
+        """return immutable catalog of used CollectionID with indexed queries"""
+        from .catalog import Catalog
+        return Catalog.from_ids(self.get_collectionIDs())
+
     @classmethod
     @abstractmethod
     def set_data(cls, col: Collection, ass_id: int = 3) -> list[Exception]:
@@ -47,6 +58,37 @@ class Adapter(ABC):
     def get_data(cls, col: Collection):
         """ set attribute values from file by. validation ID's. AdapterException if not find data by ID"""
 
+    @classmethod
+    def prepare_data(cls, col: Collection, ass_id: int = 3) -> tuple[Any, list[Exception]]:
+        """return data of <col> for later keeping by <keep_prepared> and errors. Values captured at call: default keep copy of collection,
+        override for lighter record"""
+        new, errors = col.copy()
+        return (new, ass_id), errors
+
+    @classmethod
+    def keep_prepared(cls, record: Any) -> list[Exception]:
+        """keep result of <prepare_data>"""
+        col, ass_id = record
+        return cls.set_data(col, ass_id)
+
+    @classmethod
+    def set_data_many(cls, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        """Save data of several collections with <set_data> in <executor>(<default_executor> if None). Collections dedupe by LDN, the last is keeping.
+        Return errors for each collection"""
+        keys, unique = dedupe_by_ldn(cols)
+        with get_executor(executor) as ex:
+            return gather_errors(keys, dict(), {ldn: ex.submit(cls.set_data, col, ass_id) for ldn, col in unique.items()})
+
+    @classmethod
+    def get_data_many(cls, cols: Iterable[Collection], executor: Executor = None) -> list[list[Exception]]:
+        """Fill several collections with <get_data> in <executor>(<default_executor> if None). Collections filled in place, so need thread executor.
+        Return errors for each collection"""
+        if isinstance(executor, ProcessPoolExecutor):
+            raise AdapterException(F"{cls.__name__} <get_data_many> fill collections in place, need thread executor")
+        cols = list(cols)
+        with get_executor(executor) as ex:
+            return gather_errors(list(range(len(cols))), dict(), {n: ex.submit(cls.get_data, col) for n, col in enumerate(cols)})
+
     @abstractmethod
     def set_template(self, template: Template):
         """keep used values to template by collections"""
@@ -66,6 +108,62 @@ class AdapterException(Exception):
     """"""
 
 
+def dedupe_by_ldn(cols: Iterable[Collection]) -> tuple[list[bytes | None], dict[bytes, Collection]]:
+    """return LDN for each collection(None if absence) and unique collections by LDN, the last is keeping"""
+    keys: list[bytes | None] = list()
+    unique: dict[bytes, Collection] = dict()
+    for col in cols:
+        if (ldn := col.LDN.value) is None:
+            keys.append(None)
+        else:
+            keys.append(key := bytes(ldn.contents))
+            unique[key] = col
+    return keys, unique
+
+
+_default_executor: ThreadPoolExecutor | None = None
+"""shared by calls without executor, created by first use"""
+_executor_lock = threading.Lock()
+
+
+def default_executor() -> ThreadPoolExecutor:
+    """module ThreadPoolExecutor for <*_many> calls without executor"""
+    global _default_executor
+    with _executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(thread_name_prefix="DLMSAdapter")
+        return _default_executor
+
+
+def _reset_default_executor():
+    """threads of parent executor absent in forked child"""
+    global _default_executor, _executor_lock
+    _default_executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # not in Windows
+    os.register_at_fork(after_in_child=_reset_default_executor)
+
+
+def get_executor(executor: Executor | None) -> AbstractContextManager[Executor]:
+    """return context with <default_executor> if <executor> is None. Executor not shutdown after"""
+    return nullcontext(default_executor() if executor is None else executor)
+
+
+def gather_errors(keys: list[Hashable | None],
+                  errors: dict[Hashable, list[Exception]],
+                  futures: dict[Hashable, Future]) -> list[list[Exception]]:
+    """wait <futures>(result is errors or None) and return errors for each key. For None key return EmptyObj(collection without LDN)"""
+    for key, f in futures.items():
+        try:
+            if (res := f.result()) is not None:
+                errors.setdefault(key, list()).extend(res)
+        except Exception as e:
+            errors.setdefault(key, list()).append(e)
+    return [[exc.EmptyObj("No LDN value in collection")] if key is None else list(errors.get(key, ())) for key in keys]
+
+
 class __Gag(Adapter):
     @classmethod
     def set_collection(cls, col: Collection):
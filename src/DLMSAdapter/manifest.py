@@ -0,0 +1,155 @@
+"""persistent manifest of type store: relative paths of type files by layout(adapter name). Loaded in one read instead of
+Types directory walk, updated by <set_collection> under lock shared by processes. Rebuild/verify for drift:
+python -m DLMSAdapter.manifest [rebuild|verify]"""
+import os
+import json
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from .main import AdapterException
+
+
+logger = logging.getLogger(__name__)
+FILE_NAME: str = "manifest.json"
+LOCK_NAME: str = "manifest.lock"
+"""sidecar file locked by read-modify-write of manifest from all processes"""
+VERSION: int = 1
+"""manifest format version. Increase with change of structure"""
+LOCK_TIMEOUT: float = 30.0
+"""seconds of waiting for lock of other process"""
+LOCK_DELAY: float = 0.5
+"""max delay between lock attempts"""
+_lock = threading.Lock()
+"""serialize read-modify-write in process"""
+
+
+def get_path(root: Path) -> Path:
+    """return manifest path by type store <root>"""
+    return root / FILE_NAME
+
+
+def _try_lock(f) -> bool:
+    """exclusive lock of first byte without waiting, False if locked by other process"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def _locked(root: Path) -> Iterator[None]:
+    """serialize read-modify-write of manifest: threads by <_lock>, processes by exclusive lock of sidecar file. Attempts with growing
+    delay, AdapterException after <LOCK_TIMEOUT>"""
+    with _lock, open(root / LOCK_NAME, "a+b") as f:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        delay = 0.01
+        while not _try_lock(f):
+            if (left := deadline - time.monotonic()) <= 0:
+                raise AdapterException(F"manifest of {root} locked by other process more than {LOCK_TIMEOUT}s")
+            time.sleep(min(delay, left))
+            delay = min(delay * 2, LOCK_DELAY)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read(root: Path) -> dict[str, list[str]] | None:
+    path = get_path(root)
+    try:
+        with open(path, "rb") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        logger.warning(F"skip broken manifest {path=}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != VERSION or not isinstance(data.get("layouts"), dict):
+        logger.info(F"skip manifest {path=}: unknown format")
+        return None
+    return data["layouts"]
+
+
+def _write(root: Path, layouts: dict[str, list[str]]):
+    path = get_path(root)
+    tmp = path.with_suffix(F".tmp{os.getpid()}.{threading.get_ident()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION, "layouts": layouts}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+    logger.info(F"write manifest {path=}")
+
+
+def load(root: Path, layout: str) -> list[Path] | None:
+    """return type file paths of <layout> from manifest, or None if manifest or layout absence"""
+    if (layouts := _read(root)) is None or (rel_paths := layouts.get(layout)) is None:
+        return None
+    return [root / p for p in rel_paths]
+
+
+def update(root: Path, layout: str, paths: list[Path]):
+    """replace <layout> content by <paths>, keep other layouts"""
+    with _locked(root):
+        layouts = _read(root) or dict()
+        layouts[layout] = sorted(p.relative_to(root).as_posix() for p in paths)
+        _write(root, layouts)
+
+
+def add(root: Path, layout: str, path: Path):
+    """add one type file of <layout>. If manifest absence it not created: first load make it by full scan"""
+    rel = path.relative_to(root).as_posix()
+    with _locked(root):
+        if (layouts := _read(root)) is None or (rel_paths := layouts.get(layout)) is None:
+            return
+        elif rel in rel_paths:
+            return
+        rel_paths.append(rel)
+        rel_paths.sort()
+        _write(root, layouts)
+
+
+def diff(root: Path, layout: str, scanned: list[Path]) -> tuple[list[Path], list[Path]]:
+    """compare manifest with <scanned> store. Return (not in manifest, absent in store)"""
+    listed = set(load(root, layout) or ())
+    scanned = set(scanned)
+    return sorted(scanned - listed), sorted(listed - scanned)
+
+
+def main(argv: list[str] = None) -> int:
+    import argparse
+    from . import xml_
+    parser = argparse.ArgumentParser(prog="python -m DLMSAdapter.manifest", description="type store manifest")
+    parser.add_argument("command", choices=("rebuild", "verify"))
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        xml_.rebuild_manifest()
+        return 0
+    ret = 0
+    for layout, (new, lost) in xml_.verify_manifest().items():
+        for path in new:
+            print(F"{layout}: not in manifest {path}")
+        for path in lost:
+            print(F"{layout}: absent in store {path}")
+        if new or lost:
+            ret = 1
+    return ret
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
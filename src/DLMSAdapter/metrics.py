@@ -0,0 +1,160 @@
+"""pluggable instrumentation: counters and latency histograms by name. Default is no-op with one attribute check by call.
+Install Registry for collecting in process, export with <as_dict>"""
+import time
+import bisect
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Any
+
+
+BUCKETS: tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+"""upper bounds of latency histogram in seconds, last bucket is infinity"""
+
+
+class Metrics:
+    """no-op sink"""
+    enabled: bool = False
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def observe(self, name: str, seconds: float):
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.min: float = float("inf")
+        self.max: float = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "buckets": {str(le): c for le, c in zip((*self.buckets, "inf"), self.counts)}}
+
+
+_collectors: dict[str, Callable[[], Any]] = dict()
+"""values of other caches, called by export"""
+
+
+def register_collector(name: str, func: Callable[[], Any]):
+    _collectors[name] = func
+
+
+class Registry(Metrics):
+    """thread-safe in-process counters and histograms"""
+    enabled = True
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.__buckets = buckets
+        self.__lock = threading.Lock()
+        self.__counters: dict[str, int] = dict()
+        self.__histograms: dict[str, Histogram] = dict()
+
+    def count(self, name: str, value: int = 1):
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self.__lock:
+            if (h := self.__histograms.get(name)) is None:
+                h = self.__histograms[name] = Histogram(self.__buckets)
+            h.observe(seconds)
+
+    def reset(self):
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        with self.__lock:
+            ret = {
+                "counters": dict(self.__counters),
+                "histograms": {name: h.as_dict() for name, h in self.__histograms.items()}}
+        ret["collectors"] = {name: func() for name, func in _collectors.items()}
+        return ret
+
+
+NOOP = Metrics()
+_current: Metrics = NOOP
+
+
+def install(sink: Metrics = None) -> Metrics:
+    """set <sink>(no-op if None) for all adapters, return previous"""
+    global _current
+    prev, _current = _current, sink or NOOP
+    return prev
+
+
+def get() -> Metrics:
+    return _current
+
+
+def count(name: str, value: int = 1):
+    if _current.enabled:
+        _current.count(name, value)
+
+
+def count_file(name: str, path: Path):
+    """add file size to counter <name>"""
+    if _current.enabled:
+        try:
+            _current.count(name, path.stat().st_size)
+        except OSError:
+            pass
+
+
+class _Timer:
+    __slots__ = ("name", "sink", "start")
+
+    def __init__(self, name: str, sink: Metrics):
+        self.name = name
+        self.sink = sink
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.sink.observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.sink.count(F"{self.name}.errors")
+
+
+_null = nullcontext()
+
+
+def timer(name: str):
+    """context manager observing latency of block in histogram <name>, failures in counter <name>.errors"""
+    if _current.enabled:
+        return _Timer(name, _current)
+    return _null
+
+
+def timed[**P, T](name: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
+    """decorator as <timer> for all calls"""
+    def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _current.enabled:
+                return func(*args, **kwargs)
+            with _Timer(name, _current):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
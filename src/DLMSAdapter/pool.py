@@ -1,13 +1,20 @@
+import logging
 from .main import (
-    Adapter, AdapterException,
-    Collection, ParameterValue, Template,
+    Adapter, AdapterException, Manufacturer,
+    Collection, ParameterValue, Template, ID
 )
 from .xml_ import (
     Xml50, Xml40, Xml41, Xml3, xml50
 )
-from DLMS_SPODES.config_parser import get_values
+from .sqlite_ import Sqlite, sqlite
+from .bin_ import Bin50, bin50
+from typing import Iterable, Any
+from concurrent.futures import Executor
+from functools import lru_cache
+from . import config, metrics
 
 
+logger = logging.getLogger(__name__)
 CREATE_TYPE = "create_type"
 GET_COLLECTION = "get_collection"
 KEEP_DATA = "keep_data"
@@ -16,7 +23,7 @@ CREATE_TEMPLATE = "create_template"
 GET_TEMPLATE = "get_template"
 
 
-_container: dict[str, list[str]] = {
+DEFAULTS: dict[str, list[str]] = {
     CREATE_TYPE: ["Xml50"],
     GET_COLLECTION: ["Xml50"],
     KEEP_DATA: ["Xml50"],
@@ -24,71 +31,217 @@ _container: dict[str, list[str]] = {
     CREATE_TEMPLATE: ["Xml50"],
     GET_TEMPLATE: ["Xml50"]
 }
-"""default parameters from toml"""
-_adapters: dict[str, list[Adapter]] = {
-    CREATE_TYPE: list(),
-    GET_COLLECTION: list(),
-    KEEP_DATA: list(),
-    GET_DATA: list(),
-    CREATE_TEMPLATE: list(),
-    GET_TEMPLATE: list()
-}
+"""default parameters, updated from toml"""
 
-"""Pool parameters"""
 
-if toml_val := get_values("DLMSAdapter", "Pool"):
-    _container.update(toml_val)
-for n, c in _container.items():
-    for val in c:
-        if isinstance((adapter := vars().get(val)), Adapter):
-            _adapters[n].append(adapter)
+@lru_cache(1)
+def get_adapters() -> dict[str, list[Adapter]]:
+    """Pool parameters by toml, read on first use. Adapter class name is used as its instance on default store"""
+    container = dict(DEFAULTS)
+    if toml_val := config.get_toml_values("DLMSAdapter", "Pool"):
+        container.update(toml_val)
+    ret: dict[str, list[Adapter]] = {n: list() for n in DEFAULTS}
+    for n, c in container.items():
+        for val in c:
+            if isinstance(adapter := globals().get(val), type) and issubclass(adapter, Adapter):
+                adapter = adapter()
+            if isinstance(adapter, Adapter):
+                ret[n].append(adapter)
+            else:
+                logger.error(F"skip unknown adapter {val} for <{n}>")
+    return ret
 
-del _container
 
+class AdapterPool(Adapter):
+    """adapters by operation: <adapters>(from toml by default). Read with fallback to next adapter by AdapterException, write to all.
+    Instance API for AsyncPool and other stores, class API of Pool use module <pool>"""
 
-class Pool(Adapter):
-    """"""
+    def __init__(self, adapters: dict[str, list[Adapter]] = None):
+        self.__adapters = adapters
 
-    @classmethod
-    def set_collection(cls, col: Collection):
-        for adp in _adapters[CREATE_TYPE]:
+    @property
+    def adapters(self) -> dict[str, list[Adapter]]:
+        if self.__adapters is None:
+            self.__adapters = get_adapters()
+        return self.__adapters
+
+    def __get(self, operation: str) -> list[Adapter]:
+        if len(ret := self.adapters.get(operation, ())) == 0:
+            raise AdapterException(F"{self.__class__.__name__} has no adapters for <{operation}>")
+        return ret
+
+    @metrics.timed("pool.set_collection")
+    def set_collection(self, col: Collection):
+        for adp in self.__get(CREATE_TYPE):
             adp.set_collection(col)
 
-    @classmethod
-    def get_collection(cls, m: bytes, f_id: ParameterValue, ver: ParameterValue) -> tuple[Collection, list[Exception]]:
+    @metrics.timed("pool.get_collection")
+    def get_collection(self, col_id: ID) -> tuple[Collection, list[Exception]]:
         ret = None
-        for adp in _adapters[GET_COLLECTION]:
+        for adp in self.__get(GET_COLLECTION):
             try:
-                return adp.get_collection(m, f_id, ver)
+                return adp.get_collection(col_id)
             except AdapterException as e:
+                metrics.count("pool.fallback.get_collection")
                 ret = e
         else:
             raise ret
 
-    @classmethod
-    def set_data(cls, col: Collection, ass_id: int = 3) -> bool:
-        ret = False
-        for adp in _adapters[KEEP_DATA]:
-            if tmp := adp.set_data(col, ass_id):
-                ret = tmp
+    def get_collectionIDs(self) -> list[ID]:
+        """IDs of all <get_collection> adapters without repeats"""
+        ret: dict[ID, None] = dict()
+        for adp in self.__get(GET_COLLECTION):
+            ret.update(dict.fromkeys(adp.get_collectionIDs()))
+        return list(ret)
+
+    def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        """merged tree of all <get_collection> adapters"""
+        ret: dict[Manufacturer, dict[ParameterValue, set[ID]]] = dict()
+        for adp in self.__get(GET_COLLECTION):
+            for man, f_ids in adp.get_ID_tree().items():
+                for f_id, ids in f_ids.items():
+                    ret.setdefault(man, dict()).setdefault(f_id, set()).update(ids)
         return ret
 
-    @classmethod
-    def get_data(cls, col: Collection):
+    @metrics.timed("pool.set_data")
+    def set_data(self, col: Collection, ass_id: int = 3) -> list[Exception]:
+        """keep to all <keep_data> adapters, return errors of all"""
+        ret: list[Exception] = list()
+        for adp in self.__get(KEEP_DATA):
+            ret.extend(adp.set_data(col, ass_id))
+        return ret
+
+    def prepare_data(self, col: Collection, ass_id: int = 3) -> tuple[list[tuple[Adapter, Any]], list[Exception]]:
+        """records of all <keep_data> adapters"""
+        record: list[tuple[Adapter, Any]] = list()
+        ret: list[Exception] = list()
+        for adp in self.__get(KEEP_DATA):
+            adp_record, errors = adp.prepare_data(col, ass_id)
+            record.append((adp, adp_record))
+            ret.extend(errors)
+        return record, ret
+
+    def keep_prepared(self, record: list[tuple[Adapter, Any]]) -> list[Exception]:
+        ret: list[Exception] = list()
+        for adp, adp_record in record:
+            ret.extend(adp.keep_prepared(adp_record))
+        return ret
+
+    @metrics.timed("pool.get_data")
+    def get_data(self, col: Collection):
         ret = None
-        for adp in _adapters[GET_DATA]:
+        for adp in self.__get(GET_DATA):
             try:
                 adp.get_data(col)
                 break
             except AdapterException as e:
+                metrics.count("pool.fallback.get_data")
+                ret = e
+        else:
+            raise ret
+
+    @metrics.timed("pool.set_data_many")
+    def set_data_many(self, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        cols = list(cols)
+        ret: list[list[Exception]] = [list() for _ in cols]
+        for adp in self.__get(KEEP_DATA):
+            for errors, adp_errors in zip(ret, adp.set_data_many(cols, ass_id, executor)):
+                errors.extend(adp_errors)
+        return ret
+
+    @metrics.timed("pool.get_data_many")
+    def get_data_many(self, cols: Iterable[Collection], executor: Executor = None) -> list[list[Exception]]:
+        """for each collection use next adapter if AdapterException"""
+        cols = list(cols)
+        ret: list[list[Exception]] = [list() for _ in cols]
+        indexes = list(range(len(cols)))
+        """not filled collections"""
+        for adp in self.__get(GET_DATA):
+            res = adp.get_data_many([cols[n] for n in indexes], executor)
+            for n, errors in zip(indexes, res):
+                ret[n] = errors
+            indexes = [n for n, errors in zip(indexes, res) if any(isinstance(e, AdapterException) for e in errors)]
+            if len(indexes) == 0:
+                break
+            metrics.count("pool.fallback.get_data", len(indexes))
+        return ret
+
+    @metrics.timed("pool.set_template")
+    def set_template(self, template: Template):
+        for adp in self.__get(CREATE_TEMPLATE):
+            adp.set_template(template)
+
+    @metrics.timed("pool.get_template")
+    def get_template(self, name: str, forced_col: Collection = None) -> Template:
+        ret = None
+        for adp in self.__get(GET_TEMPLATE):
+            try:
+                return adp.get_template(name, forced_col)
+            except (AdapterException, FileNotFoundError) as e:
+                metrics.count("pool.fallback.get_template")
                 ret = e
         else:
             raise ret
 
+    def get_templates(self) -> list[str]:
+        """names of all <get_template> adapters without repeats. Adapters without templates skipped"""
+        ret: dict[str, None] = dict()
+        for adp in self.__get(GET_TEMPLATE):
+            try:
+                ret.update(dict.fromkeys(adp.get_templates()))
+            except AdapterException as e:
+                logger.info(F"skip {adp}: {e}")
+        return list(ret)
+
+
+pool = AdapterPool()
+"""adapters from toml, used by Pool"""
+
+
+class Pool(Adapter):
+    """class API over module <pool>, signatures as before AdapterPool"""
+
+    @classmethod
+    def set_collection(cls, col: Collection):
+        pool.set_collection(col)
+
+    @classmethod
+    def get_collection(cls, m: bytes, f_id: ParameterValue, ver: ParameterValue) -> tuple[Collection, list[Exception]]:
+        return pool.get_collection(ID(man=m, f_id=f_id, f_ver=ver))
+
+    @classmethod
+    def get_collectionIDs(cls) -> list[ID]:
+        return pool.get_collectionIDs()
+
+    @classmethod
+    def get_ID_tree(cls) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        return pool.get_ID_tree()
+
+    @classmethod
+    def set_data(cls, col: Collection, ass_id: int = 3) -> list[Exception]:
+        return pool.set_data(col, ass_id)
+
+    @classmethod
+    def get_data(cls, col: Collection):
+        pool.get_data(col)
+
+    @classmethod
+    def set_data_many(cls, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        return pool.set_data_many(cols, ass_id, executor)
+
+    @classmethod
+    def get_data_many(cls, cols: Iterable[Collection], executor: Executor = None) -> list[list[Exception]]:
+        return pool.get_data_many(cols, executor)
+
     @classmethod
     def set_template(cls, name: str, template: Template):
-        pass
+        """<name> is not used: template keep by own name"""
+        pool.set_template(template)
+
+    @classmethod
+    def get_template(cls, name: str, forced_col: Collection = None) -> Template:
+        return pool.get_template(name, forced_col)
 
     @classmethod
-    def get_template(cls, name: str) -> Template:
-        pass
+    def get_templates(cls) -> list[str]:
+        return pool.get_templates()
@@ -0,0 +1,114 @@
+"""background refresh of type store: poll directory and type file mtimes, apply added, removed and changed types written by
+other nodes to adapter containers. Only cache entries of affected types are invalidated"""
+import logging
+import threading
+from pathlib import Path
+from . import metrics
+from .xml_ import Xml3, Xml50, apply_type_changes
+
+
+logger = logging.getLogger(__name__)
+DEPTH: int = 2
+"""watched directories below Types root: manufacturer, firm_id"""
+
+
+class TypeRefresher:
+    """poll type store of <layouts>(bound to other store by <bind> if need) each <interval> seconds in background thread. Store walked again only by change of
+    directory mtime, type files stat by each poll for content changes"""
+
+    def __init__(self, layouts: tuple[type[Xml3] | type[Xml50], ...] = (Xml3, Xml50),
+                 interval: float = 5.0):
+        self.__layouts = layouts
+        self.__interval = interval
+        self.__dirs: dict[Path, int] = dict()
+        """mtime of watched directories by last poll, empty for walk by first poll"""
+        self.__subdirs: dict[Path, list[Path]] = dict()
+        """listing of watched directories, read again by mtime change"""
+        self.__files: dict[str, dict[Path, int]] = {adp.__name__: self.__stat_files(self.__known(adp)) for adp in layouts}
+        """mtime of type files by layout"""
+        self.__poll_lock = threading.Lock()
+        self.__cond = threading.Condition()
+        self.__closed = False
+        self.polls: int = 0
+        self.applied: int = 0
+        self.__thread = threading.Thread(target=self.__run, name=F"{self.__class__.__name__}", daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def __known(adp: type[Xml3] | type[Xml50]) -> list[Path]:
+        return [path for m_v in adp.get_manufactures_container().values() for f_v in m_v.values() for path in f_v.values()]
+
+    @staticmethod
+    def __stat_files(paths) -> dict[Path, int]:
+        ret: dict[Path, int] = dict()
+        for path in paths:
+            try:
+                ret[path] = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return ret
+
+    def __stat_dirs(self) -> dict[Path, int]:
+        """mtime of Types roots with subdirectories to <DEPTH>. Listing read only for new or changed directory"""
+        ret: dict[Path, int] = dict()
+        stack = [(root, 0) for root in {adp.store.types for adp in self.__layouts}]
+        while stack:
+            path, depth = stack.pop()
+            try:
+                ret[path] = mtime = path.stat().st_mtime_ns
+                if depth < DEPTH and (self.__dirs.get(path) != mtime or path not in self.__subdirs):
+                    self.__subdirs[path] = [p for p in path.iterdir() if p.is_dir()]
+            except (FileNotFoundError, NotADirectoryError):
+                ret.pop(path, None)
+                self.__subdirs.pop(path, None)
+                continue
+            if depth < DEPTH:
+                stack.extend((p, depth + 1) for p in self.__subdirs[path])
+        return ret
+
+    def poll(self) -> int:
+        """check store now, return count of applied type files"""
+        ret = 0
+        with self.__poll_lock, metrics.timer("refresh.poll"):
+            dirs = self.__stat_dirs()
+            walk = dirs != self.__dirs
+            self.__dirs = dirs
+            for adp in self.__layouts:
+                old = self.__files[adp.__name__]
+                new = self.__stat_files(adp.scan_types() if walk else old.keys())
+                added = [path for path in new if path not in old]
+                removed = [path for path in old if path not in new]
+                changed = [path for path, mtime in new.items() if path in old and old[path] != mtime]
+                if added or removed or changed:
+                    ret += apply_type_changes(adp, added, removed, changed)
+                self.__files[adp.__name__] = new
+            self.polls += 1
+            self.applied += ret
+        if ret:
+            metrics.count("refresh.applied", ret)
+        return ret
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                if not self.__closed:
+                    self.__cond.wait(self.__interval)
+                if self.__closed:
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(F"type store refresh failed: {e}")
+
+    def close(self):
+        """stop background thread"""
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,186 @@
+"""compiled snapshot of parsed type Collection. Keep next to source type file(xml, typ) for fast loading without xml parsing and
+attribute decoding.
+Trust model: snapshot is pickle, loading it run code of writer. Snapshot signed by HMAC-SHA256 with key from environment
+DLMSADAPTER_SNAPSHOT_KEY, file with wrong signature not unpickled. Without the key snapshots are disabled: not written and not loaded"""
+import os
+import hmac
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterable
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ID, ParameterValue, cst, ut, cdt, ic
+from DLMS_SPODES.cosem_interface_classes import collection
+from DLMS_SPODES import exceptions as exc
+from . import config
+
+
+logger = logging.getLogger(__name__)
+SUFFIX: str = ".snap"
+VERSION: int = 3
+"""snapshot format version. Increase with change of record structure"""
+KEY_ENV: str = F"{config.ENV_PREFIX}SNAPSHOT_KEY"
+"""environment with key of snapshot signature"""
+DIGEST_SIZE: int = hashlib.sha256().digest_size
+"""signature before pickle"""
+
+type AttrRecord = tuple[int, cdt.CommonDataType | bytes]
+"""index, value or encoding if value not picklable"""
+type ObjRecord = tuple[int, int | None, bytes, tuple[AttrRecord, ...]]
+"""class_id, version, logical_name, attributes"""
+
+
+def get_key() -> bytes | None:
+    """key of signature, None if snapshots disabled"""
+    return os.environ.get(KEY_ENV, "").encode("utf-8") or None
+
+
+def enabled() -> bool:
+    return get_key() is not None
+
+
+def _sign(key: bytes, payload: bytes) -> bytes:
+    return hmac.digest(key, payload, hashlib.sha256)
+
+
+def get_path(src: Path) -> Path:
+    """return snapshot path by source type file"""
+    return src.with_suffix(SUFFIX)
+
+
+def _col2header(col: Collection) -> tuple:
+    return (
+        col.dlms_ver,
+        None if col.country is None else int(col.country.value),
+        None if col.country_ver is None else (col.country_ver.par, col.country_ver.value),
+        col.spec_map)
+
+
+def _attr2record(attr: cdt.CommonDataType) -> cdt.CommonDataType | bytes:
+    try:
+        pickle.dumps(attr, protocol=pickle.HIGHEST_PROTOCOL)
+        return attr
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return attr.encoding
+
+
+def _col2objects(col: Collection) -> tuple[ObjRecord, ...]:
+    ret = list()
+    for obj in col:
+        ret.append((
+            int(obj.CLASS_ID),
+            None if obj.VERSION is None else int(obj.VERSION),
+            bytes(obj.logical_name.contents),
+            tuple((i, _attr2record(attr)) for i, attr in obj.get_index_with_attributes() if i != 1 and attr is not None)))
+    return tuple(ret)
+
+
+def dump(col: Collection, src: Path, errors: Iterable[Exception] = ()):
+    """write snapshot of parsed <col> with parsing <errors> for source type file <src>, nothing if snapshots disabled. PicklingError if
+    errors not picklable"""
+    if (key := get_key()) is None:
+        return
+    st = src.stat()
+    payload = pickle.dumps((
+        VERSION,
+        str(src.absolute()),
+        st.st_mtime_ns,
+        st.st_size,
+        _col2header(col),
+        _col2objects(col),
+        tuple(errors)),
+        protocol=pickle.HIGHEST_PROTOCOL)
+    path = get_path(src)
+    tmp = path.with_suffix(F"{SUFFIX}.tmp{os.getpid()}")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_sign(key, payload))
+            f.write(payload)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+    logger.info(F"write snapshot {path=}")
+
+
+def load(src: Path, col_id: ID) -> tuple[Collection, tuple[Exception, ...]] | None:
+    """return Collection with <col_id> and parsing errors from fresh snapshot of <src>, or None if snapshots disabled, snapshot absence,
+    stale or not signed. Snapshot is valid for any ID resolved to <src>"""
+    if (key := get_key()) is None:
+        return None
+    path = get_path(src)
+    try:
+        with open(path, "rb") as f:
+            digest, payload = f.read(DIGEST_SIZE), f.read()
+        st = src.stat()
+    except FileNotFoundError:
+        return None
+    if not hmac.compare_digest(digest, _sign(key, payload)):
+        logger.warning(F"skip snapshot {path=}: wrong signature")
+        return None
+    try:
+        ver, *record = pickle.loads(payload)
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+        logger.warning(F"skip broken snapshot {path=}: {e}")
+        return None
+    if ver != VERSION:
+        logger.info(F"skip snapshot {path=}: version {ver}, expected {VERSION}")
+        return None
+    source, mtime_ns, size, header, objects, errors = record
+    if source != str(src.absolute()):
+        logger.info(F"skip snapshot {path=}: other source {source}")
+        return None
+    elif mtime_ns != st.st_mtime_ns or size != st.st_size:
+        logger.info(F"skip stale snapshot {path=}")
+        return None
+    try:
+        col = _build(header, objects)
+        col.set_id(col_id)
+        return col, errors
+    except (exc.DLMSException, ValueError, TypeError) as e:
+        logger.warning(F"skip snapshot {path=}, can't build collection: {e}")
+        return None
+
+
+def _build(header: tuple, objects: tuple[ObjRecord, ...]) -> Collection:
+    """Collection without ID"""
+    dlms_ver, country, country_ver, spec_map = header
+    col = Collection(
+        dlms_ver=dlms_ver,
+        country=None if country is None else collection.CountrySpecificIdentifiers(country),
+        cntr_ver=None if country_ver is None else ParameterValue(*country_ver))
+    col.spec_map = spec_map
+    new_objects = list()
+    for class_id, version, ln, attrs in objects:
+        new_objects.append((
+            col.add_if_missing(
+                class_id=ut.CosemClassId(class_id),
+                version=None if version is None else cdt.Unsigned(version),
+                logical_name=cst.LogicalName(bytearray(ln))),
+            attrs))
+    for obj, attrs in new_objects:
+        for i, value in attrs:
+            if not isinstance(value, bytes):
+                _set_value(obj, i, value)
+                continue
+            try:
+                obj.set_attr(i, value)
+            except (ut.UserfulTypesException, ValueError, TypeError) as e:  # keep forced value
+                obj.set_attr_force(i, cdt.get_instance_and_pdu_from_value(value)[0])
+                logger.warning(F"set to {obj} attr: {i} forced value from snapshot. {e}.")
+            except exc.DLMSException as e:
+                logger.error(F"Can't fill {obj} attr: {i} from snapshot. {e}")
+    return col
+
+
+def _set_value(obj: ic.COSEMInterfaceClasses, i: int, value: cdt.CommonDataType):
+    """set decoded value without validation, with init callbacks as in <set_attr>. Callbacks are not public in DLMS_SPODES(pinned <0.83):
+    without them set by encoding with validation"""
+    if not (hasattr(obj, "_cbs_attr_before_init") and hasattr(obj, "_cbs_attr_post_init")):
+        obj.set_attr(i, value.encoding)
+        return
+    if cb_func := obj._cbs_attr_before_init.pop(i, None):
+        cb_func(value)
+    obj.set_attr_force(i, value)
+    if cb_func := obj._cbs_attr_post_init.pop(i, None):
+        cb_func()
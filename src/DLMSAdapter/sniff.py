@@ -0,0 +1,79 @@
+"""header-only reading of xml type, data and template files: root start tag with attributes and header children before first
+object. Format is picked by header before full parse, full tree is read by continue of the same pass"""
+import logging
+from itertools import takewhile
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+
+logger = logging.getLogger(__name__)
+CHUNK: int = 4096
+"""bytes by one read, header of usual file in first chunk"""
+BODY_TAGS: frozenset[str] = frozenset(("obj", "object"))
+"""root children after header"""
+
+
+class XmlHead:
+    """xml file read by chunks up to first object. <parse> continue reading to full tree, file closed by <close>"""
+    path: Path
+    root: ET.Element | None
+    """root node, after <parse> with all children"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.root = None
+        self.__parser = ET.XMLPullParser(events=("start",))
+        self.__file = open(path, "rb")
+        try:
+            self.__read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def __feed(self) -> bool:
+        if not (data := self.__file.read(CHUNK)):
+            return False
+        self.__parser.feed(data)
+        for _, el in self.__parser.read_events():
+            if self.root is None:
+                self.root = el
+        return True
+
+    def __read_header(self):
+        while self.__feed():
+            if self.root is not None and any(el.tag in BODY_TAGS for el in self.root):
+                return
+        if self.root is None:
+            raise ET.ParseError(F"not found root node in {self.path}")
+
+    @property
+    def tag(self) -> str:
+        return self.root.tag
+
+    @property
+    def version(self) -> str | None:
+        return self.root.attrib.get("version")
+
+    @property
+    def header(self) -> tuple[ET.Element, ...]:
+        """root children before first object"""
+        return tuple(takewhile(lambda el: el.tag not in BODY_TAGS, self.root))
+
+    def parse(self) -> ET.ElementTree:
+        """read rest of file, return full tree"""
+        while self.__feed():
+            pass
+        self.__parser.close()
+        for _ in self.__parser.read_events():
+            pass
+        self.close()
+        return ET.ElementTree(self.root)
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,322 @@
+"""SQLite storage of types, data and templates: one database file instead of file per meter"""
+import sqlite3
+import logging
+import threading
+import weakref
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from concurrent.futures import Executor
+from typing import Iterable, Callable
+from semver import Version as SemVer
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ParameterValue, Template, ID
+from DLMS_SPODES.cosem_interface_classes import collection
+from DLMS_SPODES import exceptions as exc
+from .main import Adapter, AdapterException, Manufacturer, dedupe_by_ldn
+from .xml_ import Xml3, Xml50, Xml40, Encodings, SavePlan
+from . import config, catalog
+from .version_index import VersionIndex
+from .cache import type_cache, encoding_cache, plan_cache
+
+
+logger = logging.getLogger(__name__)
+DB_NAME: str = "DLMSAdapter.sqlite3"
+"""database file in store root by default"""
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS types(
+    man BLOB NOT NULL,
+    f_id BLOB NOT NULL,
+    f_ver BLOB NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY(man, f_id, f_ver)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS data(
+    ldn BLOB PRIMARY KEY,
+    man BLOB NOT NULL,
+    f_id BLOB NOT NULL,
+    f_ver BLOB NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS data_type ON data(man, f_id, f_ver);
+CREATE TABLE IF NOT EXISTS data_attr(
+    ldn BLOB NOT NULL,
+    ln BLOB NOT NULL,
+    i INTEGER NOT NULL,
+    encoding BLOB NOT NULL,
+    PRIMARY KEY(ldn, ln, i)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS templates(
+    name TEXT PRIMARY KEY,
+    body BLOB NOT NULL);
+"""
+"""types and templates body is Xml50 xml, data keep as attribute encoding changed relative to type"""
+
+
+def id2row(col_id: ID) -> tuple[bytes, bytes, bytes]:
+    return col_id.man, bytes(col_id.f_id), bytes(col_id.f_ver)
+
+
+def row2id(man: bytes, f_id: bytes, f_ver: bytes) -> ID:
+    return collection.ID(
+        man=man,
+        f_id=ParameterValue.parse(f_id),
+        f_ver=ParameterValue.parse(f_ver))
+
+
+class _ThreadConnection:
+    """holder of thread connection in thread-local, connection closed by finalizer after thread end"""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _close(conn: sqlite3.Connection, connections: list[sqlite3.Connection], lock: threading.Lock):
+    with lock:
+        if conn in connections:
+            connections.remove(conn)
+    conn.close()
+
+
+class _CacheKey:
+    """Sqlite in keys of shared caches: entries not keep adapter alive, dropped by <close> or adapter collection"""
+    __slots__ = ("adapter", "__weakref__")
+
+    def __init__(self, adp: "Sqlite"):
+        self.adapter = weakref.ref(adp)
+
+    def get(self) -> "Sqlite":
+        if (adp := self.adapter()) is None:
+            raise AdapterException("Sqlite adapter is discarded")
+        return adp
+
+
+@type_cache.cached
+def _load_collection(key: _CacheKey, col_id: ID) -> tuple[Collection, tuple[Exception, ...]]:
+    return key.get()._read_collection(col_id)
+
+
+@encoding_cache.cached
+def _get_parent_encodings(key: _CacheKey, col_id: ID) -> Encodings:
+    return Xml50.collection2encodings(key.get()._get_collection(col_id))
+
+
+@plan_cache.cached
+def _get_save_plan(key: _CacheKey, col_id: ID, ass_id: int) -> SavePlan:
+    return SavePlan.compile(key.get()._get_collection(col_id), ass_id)
+
+
+def _invalidate(key: _CacheKey, predicate: Callable[[tuple], bool] = lambda args: True):
+    """remove cache entries of adapter by <key> with ID arguments matching <predicate>"""
+    for func in (_load_collection, _get_parent_encodings, _get_save_plan):
+        func.cache_invalidate_if(lambda args: args[0] is key and predicate(args[1:]))
+
+
+class Sqlite(Adapter):
+    """database <path>(<store> root by default) with WAL journal. Connection for each thread, closed by thread end or <close>"""
+    VERSION = SemVer(1, 0)
+
+    def __init__(self, path: Path = None,
+                 store: config.StoreConfig = None):
+        self.__path = path
+        self.__store = store or config.store
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__connections: list[sqlite3.Connection] = list()
+        """open connections of alive threads"""
+        self.__key = _CacheKey(self)
+        weakref.finalize(self, _invalidate, self.__key)
+
+    @property
+    def store(self) -> config.StoreConfig:
+        return self.__store
+
+    @property
+    def path(self) -> Path:
+        if self.__path is None:
+            self.__path = self.__store.root / DB_NAME
+        return self.__path
+
+    def _connect(self) -> sqlite3.Connection:
+        if (holder := getattr(self.__local, "holder", None)) is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self.__local.holder = holder = _ThreadConnection(conn)
+            with self.__lock:
+                self.__connections.append(conn)
+            weakref.finalize(holder, _close, conn, self.__connections, self.__lock)
+            logger.info(F"connect to {self.path}")
+        return holder.conn
+
+    def close(self):
+        """close connections of all threads, drop cached types"""
+        with self.__lock:
+            for conn in self.__connections:
+                conn.close()
+            self.__connections.clear()
+        self.__local = threading.local()
+        _invalidate(self.__key)
+
+    def set_collection(self, col: Collection):
+        body = ET.tostring(Xml50.collection2root(col), encoding="utf-8", method="xml")
+        with (conn := self._connect()):
+            conn.execute("INSERT OR REPLACE INTO types VALUES (?, ?, ?, ?)", (*id2row(col.id), body))
+        _invalidate(self.__key, Xml3.is_affected(col.id))
+
+    def _find_compatible(self, col_id: ID) -> ID | None:
+        """ID of type with max version compatible with <col_id> version, as Xml50 lookup"""
+        if (semver := catalog.ver2semver(col_id.f_ver)) is None:
+            return None
+        man, f_id, _ = id2row(col_id)
+        index = VersionIndex(
+            (ver, f_ver)
+            for (f_ver,) in self._connect().execute("SELECT f_ver FROM types WHERE man=? AND f_id=?", (man, f_id))
+            if (ver := Xml50.ver2semver(f_ver)) is not None)
+        if (f_ver := index.max_compatible(semver)) is None:
+            return None
+        return row2id(man, f_id, f_ver)
+
+    def _load_collection(self, col_id: ID) -> tuple[Collection, tuple[Exception, ...]]:
+        """cached <_read_collection>"""
+        return _load_collection(self.__key, col_id)
+
+    def _read_collection(self, col_id: ID) -> tuple[Collection, tuple[Exception, ...]]:
+        """parsed type with failures of parsing. Not found version replaced by compatible"""
+        if (row := self._connect().execute(
+            "SELECT body FROM types WHERE man=? AND f_id=? AND f_ver=?",
+            id2row(col_id)
+        ).fetchone()) is None:
+            if (compatible := self._find_compatible(col_id)) is None:
+                raise AdapterException(F"no support type {col_id}")
+            logger.info(F"for {col_id} use compatible type {compatible}")
+            return self._load_collection(compatible)
+        col, errors = Xml50.root2collection(ET.fromstring(row[0]), Collection(id_=col_id))
+        return col, tuple(errors)
+
+    def _get_collection(self, col_id: ID) -> Collection:
+        return self._load_collection(col_id)[0]
+
+    def _get_parent_encodings(self, col_id: ID) -> Encodings:
+        return _get_parent_encodings(self.__key, col_id)
+
+    def get_save_plan(self, col_id: ID, ass_id: int = 3) -> SavePlan:
+        """compiled plan of data keeping for type"""
+        return _get_save_plan(self.__key, col_id, ass_id)
+
+    def get_collection(self, col_id: ID) -> tuple[Collection, list[Exception]]:
+        """return copy of parent Collection with failures of type parsing and copy"""
+        col, errors = self._load_collection(col_id)
+        new, copy_errors = col.copy()
+        return new, [*errors, *copy_errors]
+
+    def get_collectionIDs(self) -> list[ID]:
+        return [row2id(*row) for row in self._connect().execute("SELECT man, f_id, f_ver FROM types")]
+
+    def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        ret = dict()
+        for col_id in self.get_collectionIDs():
+            ret.setdefault(col_id.man, dict()).setdefault(col_id.f_id, set()).add(col_id)
+        return ret
+
+    def _col2rows(self, col: Collection, ass_id: int) -> tuple[tuple[bytes, bytes, bytes, bytes], list[tuple[bytes, bytes, int, bytes]], list[Exception]]:
+        """return data row, attribute rows changed relative to type and errors"""
+        if (ldn := col.LDN.value) is None:
+            raise exc.EmptyObj(F"No LDN value in collection")
+        ldn = bytes(ldn.contents)
+        attr_rows = list()
+        try:
+            plan = self.get_save_plan(col.id, ass_id)
+        except exc.EmptyObj as e:
+            return (ldn, *id2row(col.id)), attr_rows, [e]
+        objects, errors = Xml50.col2objects(col, plan)
+        changed, changed_errors = Xml50.changed_objects(self._get_parent_encodings(col.id), objects)
+        errors.extend(changed_errors)
+        for ln, attrs in changed:
+            attr_rows.extend((ldn, ln, i, encoding) for i, encoding in attrs)
+        return (ldn, *id2row(col.id)), attr_rows, errors
+
+    def _keep_rows(self, data_rows: list[tuple], attr_rows: list[tuple]):
+        """replace data of LDNs in one transaction"""
+        with (conn := self._connect()):
+            conn.executemany("DELETE FROM data_attr WHERE ldn=?", ((row[0],) for row in data_rows))
+            conn.executemany("INSERT OR REPLACE INTO data VALUES (?, ?, ?, ?)", data_rows)
+            conn.executemany("INSERT INTO data_attr VALUES (?, ?, ?, ?)", attr_rows)
+
+    def set_data(self, col: Collection, ass_id: int = 3) -> list[Exception]:
+        data_row, attr_rows, errors = self._col2rows(col, ass_id)
+        self._keep_rows([data_row], attr_rows)
+        return errors
+
+    def prepare_data(self, col: Collection, ass_id: int = 3) -> tuple[tuple[tuple, list[tuple]], list[Exception]]:
+        data_row, attr_rows, errors = self._col2rows(col, ass_id)
+        return (data_row, attr_rows), errors
+
+    def keep_prepared(self, record: tuple[tuple, list[tuple]]) -> list[Exception]:
+        data_row, attr_rows = record
+        self._keep_rows([data_row], attr_rows)
+        return list()
+
+    def set_data_many(self, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        """keep all collections in one transaction, <executor> not used"""
+        keys, unique = dedupe_by_ldn(cols)
+        errors: dict[bytes, list[Exception]] = dict()
+        data_rows = list()
+        attr_rows = list()
+        for ldn, col in unique.items():
+            try:
+                data_row, col_attr_rows, errors[ldn] = self._col2rows(col, ass_id)
+            except (exc.DLMSException, AdapterException) as e:
+                errors[ldn] = [e]
+                continue
+            data_rows.append(data_row)
+            attr_rows.extend(col_attr_rows)
+        self._keep_rows(data_rows, attr_rows)
+        return [[exc.EmptyObj("No LDN value in collection")] if key is None else errors[key] for key in keys]
+
+    def get_data(self, col: Collection):
+        if (ldn := col.LDN.value) is None:
+            raise exc.EmptyObj(F"No LDN value in collection")
+        ldn = bytes(ldn.contents)
+        conn = self._connect()
+        if (row := conn.execute("SELECT man, f_id, f_ver FROM data WHERE ldn=?", (ldn,)).fetchone()) is None:
+            raise AdapterException(F"not find data for {col}")
+        try:
+            col.set_id(row2id(*row))
+        except ValueError as e:
+            raise AdapterException(F"can't set all parameters to collection: {e}")
+        obj, skip_ln = None, None
+        for ln, i, encoding in conn.execute("SELECT ln, i, encoding FROM data_attr WHERE ldn=? ORDER BY ln, i", (ldn,)):
+            if ln == skip_ln:
+                continue
+            elif obj is None or obj.logical_name.contents != ln:
+                if (obj := col.get(ln)) is None:
+                    logger.error(F"got object with ln={ln.hex()} not find in collection. Abort attribute setting")
+                    skip_ln = ln
+                    continue
+            if not Xml40.set_attr_data(obj, i, encoding):
+                skip_ln = ln
+
+    def get_data_many(self, cols: Iterable[Collection], executor: Executor = None) -> list[list[Exception]]:
+        """fill in current thread, <executor> not used"""
+        ret = list()
+        for col in cols:
+            try:
+                self.get_data(col)
+                ret.append(list())
+            except (exc.DLMSException, AdapterException) as e:
+                ret.append([e])
+        return ret
+
+    def set_template(self, template: Template):
+        r_n = Xml50._get_template_root_node(collections=template.collections)
+        Xml50.template2root(r_n, template)
+        with (conn := self._connect()):
+            conn.execute("INSERT OR REPLACE INTO templates VALUES (?, ?)", (template.name, ET.tostring(r_n, encoding="utf-8", method="xml")))
+
+    def get_template(self, name: str, forced_col: Collection = None) -> Template:
+        if (row := self._connect().execute("SELECT body FROM templates WHERE name=?", (name,)).fetchone()) is None:
+            raise AdapterException(F"not find template {name}")
+        return Xml50.root2template(ET.fromstring(row[0]), name, forced_col, self.get_collection)
+
+    def get_templates(self) -> list[str]:
+        return [row[0] for row in self._connect().execute("SELECT name FROM templates")]
+
+
+sqlite = Sqlite()
@@ -0,0 +1,66 @@
+"""sorted index of decoded firmware versions of one firm_id for exact and compatible lookup without decoding each key"""
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+from semver import Version as SemVer
+
+
+def _major_minor(v: SemVer) -> tuple[int, int]:
+    return v.major, v.minor
+
+
+class VersionIndex[T]:
+    """SemVer -> type path(or other value) sorted by SemVer precedence"""
+    __versions: list[SemVer]
+    __paths: list[T]
+
+    def __init__(self, items: Iterable[tuple[SemVer, T]] = ()):
+        items = sorted(items, key=lambda item: item[0])
+        self.__versions = [v for v, _ in items]
+        self.__paths = [path for _, path in items]
+
+    def add(self, ver: SemVer, path: T):
+        """insert or replace version"""
+        i = bisect_left(self.__versions, ver)
+        if i < len(self.__versions) and self.__versions[i] == ver:
+            self.__paths[i] = path
+        else:
+            self.__versions.insert(i, ver)
+            self.__paths.insert(i, path)
+
+    def remove(self, ver: SemVer):
+        """delete version if exist"""
+        i = bisect_left(self.__versions, ver)
+        if i < len(self.__versions) and self.__versions[i] == ver:
+            del self.__versions[i]
+            del self.__paths[i]
+
+    def exact(self, ver: SemVer) -> T | None:
+        """path of version equal to <ver> by precedence"""
+        i = bisect_left(self.__versions, ver)
+        if i < len(self.__versions) and self.__versions[i] == ver:
+            return self.__paths[i]
+        return None
+
+    def __candidates(self, ver: SemVer) -> Iterable[int]:
+        """indexes with same major and minor not more than <ver> minor, from max"""
+        i = bisect_right(self.__versions, _major_minor(ver), key=_major_minor)
+        while i > 0 and self.__versions[i - 1].major == ver.major:
+            i -= 1
+            yield i
+
+    def compatible(self, ver: SemVer) -> list[tuple[SemVer, T]]:
+        """versions <v> with v.is_compatible(<ver>), from max"""
+        return [(self.__versions[i], self.__paths[i]) for i in self.__candidates(ver) if self.__versions[i].is_compatible(ver)]
+
+    def max_compatible(self, ver: SemVer) -> T | None:
+        """path of max version <v> with v.is_compatible(<ver>)"""
+        for i in self.__candidates(ver):
+            if self.__versions[i].is_compatible(ver):
+                return self.__paths[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.__versions)
+
+    def __iter__(self):
+        return zip(self.__versions, self.__paths)
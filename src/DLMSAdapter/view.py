@@ -0,0 +1,187 @@
+"""shared views of cached type Collection: read-only and copy-on-write. Objects are wrapped by ObjectView, object cloned
+only by first mutation through its methods(set_attr, ...) or attribute assignment. Values got by <get_attr> from
+not cloned object are shared: don't change it in place"""
+import copy
+import logging
+from functools import partial, cache
+from importlib import metadata
+from typing import Any
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ic, ut, cdt, cst
+from .main import AdapterException
+
+
+logger = logging.getLogger(__name__)
+MUTATORS: frozenset[str] = frozenset((
+    "set_attr",
+    "set_attr_force",
+    "set_attr_link",
+    "parse_attr",
+    "clear_attr",
+    "reset_attribute"))
+"""COSEMInterfaceClasses methods changing object"""
+SPODES_VERSION: tuple[int, int] = (0, 82)
+"""major, minor of DLMS_SPODES with checked Collection container, change with pin in pyproject"""
+CONTAINER_ATTR: str = "_Collection__container"
+"""private objects container of Collection, views replace its objects. No public API for it"""
+
+
+@cache
+def check_spodes():
+    """AdapterException if DLMS_SPODES version or Collection container not as <SPODES_VERSION>"""
+    ver = metadata.version("DLMS_SPODES")
+    if tuple(map(int, ver.split(".")[:2])) != SPODES_VERSION:
+        raise AdapterException(F"views need DLMS_SPODES {'.'.join(map(str, SPODES_VERSION))}, got {ver}")
+    col = Collection()
+    if not isinstance(container := getattr(col, CONTAINER_ATTR, None), dict) or list(container.values()) != list(col):
+        raise AdapterException(F"views not support Collection of DLMS_SPODES {ver}: not found objects container {CONTAINER_ATTR}")
+
+
+@cache
+def supported() -> bool:
+    """<check_spodes> passed, else warning by first call"""
+    try:
+        check_spodes()
+        return True
+    except AdapterException as e:
+        logger.warning(F"{e}. Adapters return full copy instead of view")
+        return False
+
+
+class ReadOnlyError(AdapterException):
+    """mutation of read-only view"""
+
+
+class ObjectView:
+    """proxy of COSEM object, owner control mutations"""
+    __slots__ = ("_target", "_owner")
+    _target: ic.COSEMInterfaceClasses
+    _owner: "CollectionView"
+
+    def __init__(self, target: ic.COSEMInterfaceClasses, owner: "CollectionView"):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_owner", owner)
+
+    @property
+    def __class__(self):
+        """for isinstance as target"""
+        return self._target.__class__
+
+    def __getattr__(self, name: str) -> Any:
+        if name in MUTATORS:
+            return partial(self._mutate, name)
+        return getattr(self._target, name)
+
+    def _mutate(self, name: str, *args, **kwargs):
+        self._owner._before_mutation(self)
+        return getattr(self._target, name)(*args, **kwargs)
+
+    def __setattr__(self, name: str, value: Any):
+        self._owner._before_mutation(self)
+        setattr(self._target, name, value)
+
+    def __getitem__(self, item):
+        return self._target[item]
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __eq__(self, other):
+        return self._target == (other._target if isinstance(other, ObjectView) else other)
+
+    def __lt__(self, other):
+        return self._target < (other._target if isinstance(other, ObjectView) else other)
+
+    def __str__(self):
+        return str(self._target)
+
+    def __repr__(self):
+        return F"{self.__class__.__name__}View({self._target})"
+
+
+class CollectionView(Collection):
+    """read-only shared view of <parent>. ReadOnlyError by mutation"""
+    _parent: Collection
+
+    def __init__(self, parent: Collection):
+        super().__init__(
+            id_=parent.id,
+            dlms_ver=parent.dlms_ver,
+            country=parent.country,
+            cntr_ver=parent.country_ver)
+        self.spec_map = parent.spec_map
+        self._parent = parent
+        check_spodes()
+        container = getattr(self, CONTAINER_ATTR)
+        container.clear()
+        for obj in parent:
+            container[obj.logical_name.contents] = ObjectView(obj, self)
+
+    @property
+    def parent(self) -> Collection:
+        return self._parent
+
+    def _before_mutation(self, view: ObjectView):
+        raise ReadOnlyError(F"{view} is read-only, use copy-on-write collection")
+
+    def add(self, class_id: ut.CosemClassId,
+            version: cdt.Unsigned | None,
+            logical_name: cst.LogicalName) -> ic.COSEMInterfaceClasses:
+        if not hasattr(self, "_parent"):  # LDN creation in Collection.__init__
+            return super().add(class_id, version, logical_name)
+        raise ReadOnlyError(F"can't add {logical_name} to read-only {self}")
+
+    def set_dlms_ver(self, value: int):
+        raise ReadOnlyError(F"can't set dlms_ver to read-only {self}")
+
+    def set_country(self, value):
+        raise ReadOnlyError(F"can't set country to read-only {self}")
+
+    def set_country_ver(self, value):
+        raise ReadOnlyError(F"can't set country_ver to read-only {self}")
+
+
+class CowCollection(CollectionView):
+    """copy-on-write view of <parent>: object cloned by first mutation, new objects created in own container"""
+    __memo: dict[int, Any] | None
+    __owned: set[bytes]
+
+    def __init__(self, parent: Collection):
+        self.__memo = None
+        self.__owned = set()
+        super().__init__(parent)
+
+    @property
+    def owned(self) -> tuple[bytes, ...]:
+        """LN of cloned or added objects"""
+        return tuple(self.__owned)
+
+    def _before_mutation(self, view: ObjectView):
+        if (ln := view._target.logical_name.contents) in self.__owned:
+            return
+        if self.__memo is None:
+            self.__memo = {id(obj): obj for obj in self._parent}
+            self.__memo[id(self._parent)] = self
+        memo = dict(self.__memo)
+        del memo[id(view._target)]
+        object.__setattr__(view, "_target", copy.deepcopy(view._target, memo))
+        self.__owned.add(ln)
+
+    def add(self, class_id: ut.CosemClassId,
+            version: cdt.Unsigned | None,
+            logical_name: cst.LogicalName) -> ic.COSEMInterfaceClasses:
+        ret = Collection.add(self, class_id, version, logical_name)
+        if hasattr(self, "_parent"):
+            self.__owned.add(logical_name.contents)
+        return ret
+
+    def set_dlms_ver(self, value: int):
+        Collection.set_dlms_ver(self, value)
+
+    def set_country(self, value):
+        Collection.set_country(self, value)
+
+    def set_country_ver(self, value):
+        Collection.set_country_ver(self, value)
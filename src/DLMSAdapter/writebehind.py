@@ -0,0 +1,165 @@
+"""write-behind layer: <set_data> is enqueued, pending saves of one LDN coalesced, background thread flush by time or size"""
+import time
+import logging
+import threading
+from typing import Any, Iterable
+from concurrent.futures import Executor
+from DLMS_SPODES.cosem_interface_classes.collection import Collection, ParameterValue, Template, ID
+from DLMS_SPODES import exceptions as exc
+from .main import Adapter, AdapterException, Manufacturer
+from .catalog import Catalog
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehind(Adapter):
+    """wrap <adapter>: <set_data> capture values with <adapter.prepare_data> and return, write in background thread
+    each <interval> seconds or by <max_pending> LDN. Other methods are delegated, <get_data> write pending LDN before reading"""
+
+    def __init__(self, adapter: Adapter,
+                 interval: float = 1.0,
+                 max_pending: int = 1000):
+        self.__adapter = adapter
+        self.__interval = interval
+        self.__max_pending = max_pending
+        self.__pending: dict[bytes, Any] = dict()
+        self.__cond = threading.Condition()
+        self.__write_lock = threading.Lock()
+        """one writer: background thread or caller of <flush>"""
+        self.__closed = False
+        self.enqueued: int = 0
+        self.coalesced: int = 0
+        self.written: int = 0
+        self.errors: dict[bytes, list[Exception]] = dict()
+        """last write errors by LDN"""
+        self.__thread = threading.Thread(target=self.__run, name=F"{self.__class__.__name__}", daemon=True)
+        self.__thread.start()
+
+    @property
+    def adapter(self) -> Adapter:
+        return self.__adapter
+
+    @property
+    def pending(self) -> int:
+        with self.__cond:
+            return len(self.__pending)
+
+    def set_data(self, col: Collection, ass_id: int = 3) -> list[Exception]:
+        """enqueue, return errors of values capturing(not enqueued without LDN). Write errors keep in <errors>"""
+        if (ldn := col.LDN.value) is None:
+            return [exc.EmptyObj(F"No LDN value in collection")]
+        record, errors = self.__adapter.prepare_data(col, ass_id)
+        with self.__cond:
+            if self.__closed:
+                raise AdapterException(F"{self.__class__.__name__} is closed")
+            key = bytes(ldn.contents)
+            if key in self.__pending:
+                self.coalesced += 1
+            self.__pending[key] = record
+            self.enqueued += 1
+            if len(self.__pending) >= self.__max_pending:
+                self.__cond.notify()
+        return errors
+
+    def set_data_many(self, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        """enqueue all in current thread, <executor> not used"""
+        ret = list()
+        for col in cols:
+            try:
+                ret.append(self.set_data(col, ass_id))
+            except (exc.DLMSException, AdapterException) as e:
+                ret.append([e])
+        return ret
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                deadline = time.monotonic() + self.__interval
+                while (
+                    not self.__closed
+                    and len(self.__pending) < self.__max_pending
+                    and (timeout := deadline - time.monotonic()) > 0
+                ):
+                    self.__cond.wait(timeout)
+                if self.__closed:
+                    return
+            self.flush()
+
+    def __take(self, ldn: bytes = None) -> dict[bytes, Any]:
+        with self.__cond:
+            if ldn is None:
+                ret, self.__pending = self.__pending, dict()
+            elif (record := self.__pending.pop(ldn, None)) is None:
+                ret = dict()
+            else:
+                ret = {ldn: record}
+        return ret
+
+    def flush(self, ldn: bytes = None) -> dict[bytes, list[Exception]]:
+        """write pending(only <ldn> if given) now, return write errors by LDN"""
+        ret: dict[bytes, list[Exception]] = dict()
+        with self.__write_lock:
+            for key, record in self.__take(ldn).items():
+                try:
+                    errors = self.__adapter.keep_prepared(record)
+                except Exception as e:
+                    logger.error(F"write-behind failed for LDN={key.hex()}: {e}")
+                    errors = [e]
+                self.written += 1
+                if errors:
+                    ret[key] = errors
+                    self.errors[key] = errors
+                else:
+                    self.errors.pop(key, None)
+        return ret
+
+    def close(self) -> dict[bytes, list[Exception]]:
+        """stop background thread and write pending"""
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify()
+        self.__thread.join()
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_data(self, col: Collection):
+        if (ldn := col.LDN.value) is not None:
+            self.flush(bytes(ldn.contents))
+        return self.__adapter.get_data(col)
+
+    def get_data_many(self, cols: Iterable[Collection], executor: Executor = None) -> list[list[Exception]]:
+        cols = list(cols)
+        for col in cols:
+            if (ldn := col.LDN.value) is not None:
+                self.flush(bytes(ldn.contents))
+        return self.__adapter.get_data_many(cols, executor)
+
+    def set_collection(self, col: Collection):
+        return self.__adapter.set_collection(col)
+
+    def get_collection(self, col_id: ID) -> tuple[Collection, list[Exception]]:
+        return self.__adapter.get_collection(col_id)
+
+    def get_collectionIDs(self) -> list[ID]:
+        return self.__adapter.get_collectionIDs()
+
+    def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
+        return self.__adapter.get_ID_tree()
+
+    def get_catalog(self) -> Catalog:
+        return self.__adapter.get_catalog()
+
+    def set_template(self, template: Template):
+        return self.__adapter.set_template(template)
+
+    def get_template(self, name: str, forced_col: Collection = None) -> Template:
+        return self.__adapter.get_template(name, forced_col)
+
+    def get_templates(self) -> list[str]:
+        return self.__adapter.get_templates()
@@ -1,54 +1,226 @@
-from itertools import count
 from abc import ABC, abstractmethod
-from typing import override
+import os
+import pickle
+import threading
+from typing import override, Iterator, Iterable, Callable, Self
 import re
-import copy
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
 from functools import lru_cache
 from pathlib import Path
 import logging
+from dataclasses import dataclass
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from semver import Version as SemVer
 from DLMS_SPODES.cosem_interface_classes.collection import Collection, ParameterValue, cst, ClassID, ic, ut, cdt, AssociationLN, Template, ID
 from DLMS_SPODES.cosem_interface_classes.association_ln.ver0 import ObjectListElement, AttributeAccessItem, AccessMode, is_attr_writable
 from DLMS_SPODES.cosem_interface_classes import implementations as impl, collection
 from DLMS_SPODES import exceptions as exc
-from .main import Adapter, AdapterException
+from .main import Adapter, AdapterException, dedupe_by_ldn, get_executor, gather_errors
+from . import snapshot, manifest, config, metrics, catalog, sniff, view
+from .cache import type_cache, path_cache, encoding_cache, plan_cache, template_cache, miss_cache, invalidate_misses
+from .view import CollectionView, CowCollection
+from .version_index import VersionIndex
 
 logger = logging.getLogger(__name__)
 man6 = re.compile("([a-f, 0-9]{2}){3}")
 hex_ = re.compile("([a-f, A-D, 0-9]{2})+")
-
-root: Path = Path(".")
-"""root for file as example"""
-template_path = root / "Template"
-types_path = root / "Types"
-if not types_path.exists():
-    types_path.mkdir()
-KEEP_PATH: Path = root / "XML_devices"
-TEMPLATE_PATH: Path = root / "Templates"
-if not KEEP_PATH.exists():
-    KEEP_PATH.mkdir()
-if not TEMPLATE_PATH.exists():
-    TEMPLATE_PATH.mkdir()
+_bound: dict[tuple[type, config.StoreConfig], type] = dict()
+"""adapter classes bound to store by <Base.bind>"""
+_bound_lock = threading.Lock()
 
 
 type Manufacturer = bytes
 type FirmwareId = bytes
 type FirmwareVer = bytes
+type Encodings = dict[bytes, dict[int, bytes]]
+"""LN: {attribute index: encoding}"""
+
+
+@dataclass
+class DataRecord:
+    """collection data prepared for keeping, picklable for use in other process"""
+    path: Path
+    col_id: ID
+    r_n: ET.Element
+    """root node with header"""
+    objects: list[tuple[bytes, list[tuple[int, bytes]]]]
+    """LN: [(attribute index, encoding)]"""
+
+
+@dataclass(frozen=True)
+class ParsedTemplate:
+    """template file content without collections"""
+    ids: tuple[ID, ...]
+    """referenced collections"""
+    objects: tuple[tuple[str, bytes, tuple[tuple[int, bool, str | list | None], ...]], ...]
+    """LN as in file, LN, attributes: (index, is complex, value for set_attr or parse_attr)"""
+    verified: bool
+
+
+@dataclass(frozen=True)
+class SavePlan:
+    """attributes for keeping data of type by Association object_list: without LN and DYNAMIC"""
+    col_id: ID
+    ass_id: int
+    objects: tuple[tuple[bytes, tuple[int, ...]], ...]
+    """LN, attribute indexes"""
+    errors: tuple[Exception, ...] = ()
+    """failures by compiling"""
+
+    def __len__(self) -> int:
+        return sum(len(indexes) for _, indexes in self.objects)
+
+    @classmethod
+    def compile(cls, col: Collection, ass_id: int) -> "SavePlan":
+        """EmptyObj if Association has empty <object_list>"""
+        if (obj_list := col.getASSOCIATION(ass_id).object_list) is None:
+            raise exc.EmptyObj(F"Association with {ass_id=} has empty <object_list>")
+        errors: list[Exception] = list()
+        objects: list[tuple[bytes, tuple[int, ...]]] = list()
+        a_a: AttributeAccessItem
+        obj_list_el: ObjectListElement
+        for obj_list_el in obj_list:
+            try:
+                obj = col.get_object(obj_list_el.logical_name)
+            except exc.NoObject as e:
+                errors.append(e)
+                continue
+            indexes: list[int] = list()
+            for a_a in obj_list_el.access_rights.attribute_access:
+                try:
+                    if (i := int(a_a.attribute_id)) == 1:
+                        """skip ln"""
+                    elif obj.get_attr_element(i).classifier == ic.Classifier.DYNAMIC:
+                        """skip DYNAMIC attributes"""
+                    else:
+                        indexes.append(i)
+                except exc.DLMSException as e:
+                    errors.append(e)
+            if len(indexes) != 0:
+                objects.append((obj.logical_name.contents, tuple(indexes)))
+        return cls(
+            col_id=col.id,
+            ass_id=ass_id,
+            objects=tuple(objects),
+            errors=tuple(errors))
 
 
 class Base(Adapter, ABC):
+    """XML adapter API by classmethods on class <store>. Other store by subclass of <bind>: Xml50.bind(store).get_collection(col_id),
+    or instance Xml50(store) of the same subclass. Class caches and caches keyed by class are separated by store"""
     TYPE_ROOT_TAG: str
+    FALLBACK: type["Base"] | None = None
+    """adapter of previous format for reading"""
+    store: config.StoreConfig = config.store
+    """roots of types, data and templates. For other store use <bind> or instance with <store> argument"""
+    _origin: type["Base"] | None = None
+    """adapter class of bound by <bind>"""
 
-    @staticmethod
-    def _get_keep_path(col: Collection) -> Path:
+    def __new__(cls, store: config.StoreConfig = None):
+        return super().__new__(cls.bind(store))
+
+    def __init__(self, store: config.StoreConfig = None):
+        """adapter on <store>, class store if None. Instance is of class bound to <store>, so classmethods use it"""
+
+    @classmethod
+    def bind(cls, store: config.StoreConfig | None) -> type[Self]:
+        """adapter class on <store>: subclass created once by store. Containers and caches keyed by class are separated by store"""
+        origin = cls._origin or cls
+        if store is None or store is origin.store:
+            return origin
+        with _bound_lock:
+            if (ret := _bound.get((origin, store))) is None:
+                ret = _bound[(origin, store)] = type(origin)(origin.__name__, (origin,), {
+                    "store": store,
+                    "_origin": origin,
+                    "__module__": origin.__module__,
+                    "__qualname__": origin.__qualname__})
+        return ret
+
+    @classmethod
+    def _on_store[T: Base](cls, adp: type[T]) -> type[T]:
+        """<adp> on store of <cls>"""
+        return adp.bind(cls.store)
+
+    @classmethod
+    def _invalidate_types(cls, affected: Callable[[tuple], bool]):
+        """remove cached paths, failed lookups, collections, encodings and save plans of types matching <affected> by cache arguments.
+        Only entries of adapters on store of <cls>"""
+        def predicate(key: tuple) -> bool:
+            return (
+                len(key) > 1
+                and isinstance(adp := key[1], type)
+                and issubclass(adp, Base)
+                and adp.store is cls.store
+                and affected(key[1:]))
+        for c in (path_cache, miss_cache, type_cache, encoding_cache, plan_cache):
+            c.invalidate_if(predicate)
+
+    @classmethod
+    def _get_keep_path(cls, col: Collection) -> Path:
         if (ldn := col.LDN.value) is None:
             raise exc.EmptyObj(F"No LDN value in collection")
-        return (KEEP_PATH / ldn.contents.hex()).with_suffix(".xml")
+        return (cls.store.data / ldn.contents.hex()).with_suffix(".xml")
+
+    @classmethod
+    def _get_template_path(cls, name: str) -> Path:
+        return (cls.store.templates / name).with_suffix(".xml")
 
     @staticmethod
-    def _get_template_path(name: str) -> Path:
-        return (TEMPLATE_PATH / name).with_suffix(".xml")
+    def _parse(path: Path) -> ET.ElementTree:
+        with metrics.timer("parse"):
+            tree = ET.parse(path)
+        metrics.count_file("bytes_read", path)
+        return tree
+
+    @staticmethod
+    def _parse_head(head: sniff.XmlHead) -> ET.ElementTree:
+        """full tree by continue of header reading"""
+        with metrics.timer("parse"):
+            tree = head.parse()
+        metrics.count_file("bytes_read", head.path)
+        return tree
+
+    @classmethod
+    def pick_format(cls, r_n: ET.Element, tag_name: str = "TYPE_ROOT_TAG") -> type["Base"] | None:
+        """first adapter of <FALLBACK> chain from <cls> accepting root node <r_n> header by <tag_name>, None if not found"""
+        if "version" not in r_n.attrib:
+            return None
+        adp = cls
+        while adp is not None:
+            if (tag := getattr(adp, tag_name, None)) is not None and adp._is_header(r_n, tag, adp.VERSION):
+                return adp
+            adp = adp.FALLBACK
+        return None
+
+    @classmethod
+    def index_by_header(cls, paths: Iterable[Path]) -> dict[ID, Path]:
+        """ID of type files by header only, files with unknown format skipped with log"""
+        ret: dict[ID, Path] = dict()
+        for path in paths:
+            try:
+                with sniff.XmlHead(path) as head:
+                    if (adp := cls.pick_format(head.root)) is None:
+                        logger.warning(F"skip {path}: unknown format {head.tag} {head.root.attrib}")
+                    elif (col_id := adp.header2id(head.root)) is None:
+                        logger.warning(F"skip {path}: not found ID in header")
+                    else:
+                        ret[col_id] = path
+            except (OSError, ET.ParseError, ValueError) as e:
+                logger.error(F"skip {path}: {e}")
+        return ret
+
+    @staticmethod
+    def _encode(r_n: ET.Element, encoding: str, xml_declaration: bool = None) -> bytes:
+        with metrics.timer("encode"):
+            return ET.tostring(r_n, encoding=encoding, method="xml", xml_declaration=xml_declaration)
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        with metrics.timer("write"), open(path, "wb") as f:
+            f.write(data)
+        metrics.count("bytes_written", len(data))
 
     @classmethod
     def _create_root_node(cls, tag: str) -> ET.Element:
@@ -64,13 +236,41 @@ class Base(Adapter, ABC):
         path = cls._get_keep_path(col)
         logger.info(F"find data {path=}")
         try:
-            tree = ET.parse(path)
+            events = ET.iterparse(path, events=("start", "end"))
         except FileNotFoundError as e:
             raise AdapterException(F"not find data for {col}: {e}")
-        cls.root2data(
-            r_n=tree.getroot(),
-            col=col
-        )
+        with metrics.timer("fill_data"):
+            cls.stream2data(events, col)
+        metrics.count_file("bytes_read", path)
+
+    @classmethod
+    def stream2data(cls, events: Iterator[tuple[str, ET.Element]], col: Collection):
+        """fill collection data incremental by iterparse <events>: header from root node children before first <object>,
+        after set each <object> by closing and remove it from tree"""
+        r_n: ET.Element | None = None
+        fill_object: Callable[[ET.Element, Collection], None] | None = None
+        depth: int = 0
+        for event, el in events:
+            if event == "start":
+                if r_n is None:
+                    r_n = el
+                elif (
+                    depth == 1
+                    and fill_object is None
+                    and el.tag == "object"
+                ):
+                    fill_object = cls._set_data_header(r_n, col)
+                depth += 1
+            else:
+                depth -= 1
+                if (
+                    depth == 1
+                    and el.tag == "object"
+                ):
+                    fill_object(el, col)
+                    r_n.remove(el)
+        if fill_object is None and r_n is not None:  # data without objects
+            cls._set_data_header(r_n, col)
 
     @classmethod
     def _is_header(cls, r_n: ET.Element, tag: str, ver: SemVer) -> bool:
@@ -87,48 +287,114 @@ class Base(Adapter, ABC):
 
     @classmethod
     @abstractmethod
+    def header2id(cls, r_n: ET.Element) -> ID | None:
+        """ID from header children of root node, None if absence. ValueError if wrong"""
+
+    @classmethod
+    @abstractmethod
+    def _set_data_header(cls, r_n: ET.Element, col: Collection) -> Callable[[ET.Element, Collection], None]:
+        """validate data header by version, set parameters to collection and return filler of <object> node"""
+
+    @classmethod
     def root2data(cls, r_n: ET.Element, col: Collection):
         """fill collection data by r_n"""
-        if not cls._is_header(r_n, Xml3.TYPE_ROOT_TAG, Xml3.VERSION):
-            raise AdapterException(F"Unknown tag: {r_n.tag} with {r_n.attrib}")
-        cls.set_parameters(r_n, col)
-        ...
+        fill_object = cls._set_data_header(r_n, col)
+        for obj_el in r_n.iterfind("object"):
+            fill_object(obj_el, col)
 
     @classmethod
     @abstractmethod
-    def root2collection(cls, r_n: ET.Element, col: Collection):
-        """fill collection by r_n"""
+    def root2collection(cls, r_n: ET.Element, col: Collection) -> tuple[Collection, list[Exception]]:
+        """fill collection by r_n, return it with failures of filling"""
         if not cls._is_header(r_n, cls.TYPE_ROOT_TAG, cls.VERSION):
             raise AdapterException(F"Unknown tag: {r_n.tag} with {r_n.attrib}")
         cls.set_parameters(r_n, col)
         ...
 
-    @staticmethod
+    @classmethod
     @abstractmethod
-    @lru_cache(1)
-    def get_manufactures_container() -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
-        """return Map of Path by parameters"""
+    def get_manufactures_container(cls) -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
+        """return Map of Path by parameters. Cached by class, so by store"""
 
     @classmethod
     @abstractmethod
-    @lru_cache(maxsize=100)
+    @path_cache.cached
     def get_col_path(cls,  col_id: ID) -> Path:
         """return Path by parameters"""
 
     @classmethod
-    @lru_cache(maxsize=100)
-    def _get_collection(cls, col_id: ID) -> Collection:
+    @type_cache.cached
+    def _load_collection(cls, col_id: ID) -> tuple[Collection, tuple[Exception, ...]]:
+        """parsed type with failures of parsing"""
         path = cls.get_col_path(col_id)
+        with metrics.timer("snapshot"):
+            ret = snapshot.load(path, col_id)
+        if ret is not None:
+            logger.info(F"got type from snapshot {path=}")
+            return ret
         logger.info(F"find type {path=}")
-        tree = ET.parse(path)
-        return cls.root2collection(
-            r_n=tree.getroot(),
-            col=Collection(id_=col_id))
+        with sniff.XmlHead(path) as head:
+            if (adp := cls.pick_format(head.root)) is None:
+                raise AdapterException(F"Unknown tag: {head.tag} with {head.root.attrib}")
+            tree = cls._parse_head(head)
+        with metrics.timer("fill"):
+            col, errors = adp.root2collection(
+                r_n=tree.getroot(),
+                col=Collection(id_=col_id))
+        cls._keep_snapshot(col, path, errors)
+        return col, tuple(errors)
+
+    @classmethod
+    def _get_collection(cls, col_id: ID) -> Collection:
+        return cls._load_collection(col_id)[0]
+
+    @classmethod
+    @encoding_cache.cached
+    def get_parent_encodings(cls, col_id: ID) -> Encodings:
+        """index of parent type attribute encodings, build once by type for data diff"""
+        return cls.collection2encodings(cls._get_collection(col_id))
+
+    @classmethod
+    @plan_cache.cached
+    def get_save_plan(cls, col_id: ID, ass_id: int = 3) -> SavePlan:
+        """compiled plan of data keeping for type, EmptyObj if Association has empty <object_list>"""
+        return SavePlan.compile(cls._get_collection(col_id), ass_id)
+
+    @staticmethod
+    def collection2encodings(col: Collection) -> Encodings:
+        ret: Encodings = dict()
+        for obj in col:
+            ret[obj.logical_name.contents] = {i: attr.encoding for i, attr in obj.get_index_with_attributes() if i != 1 and attr is not None}
+        return ret
+
+    @staticmethod
+    def _keep_snapshot(col: Collection, path: Path, errors: Iterable[Exception] = ()):
+        """write compiled snapshot with parsing <errors> next to type file. Failure is not critical"""
+        try:
+            snapshot.dump(col, path, errors)
+        except (OSError, ValueError, pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(F"can't write snapshot for {path=}: {e}")
 
     @classmethod
     def get_collection(cls, col_id: ID) -> tuple[Collection, list[Exception]]:
-        """return copy of parent Collection"""
-        return cls._get_collection(col_id).copy()
+        """return copy of parent Collection with failures of type parsing and copy"""
+        col, errors = cls._load_collection(col_id)
+        new, copy_errors = col.copy()
+        return new, [*errors, *copy_errors]
+
+    @classmethod
+    def get_collection_view(cls, col_id: ID) -> CollectionView | Collection:
+        """return read-only view of parent Collection without copy. Full copy if views not supported by DLMS_SPODES"""
+        if not view.supported():
+            return cls.get_collection(col_id)[0]
+        return CollectionView(cls._get_collection(col_id))
+
+    @classmethod
+    def get_collection_cow(cls, col_id: ID) -> CowCollection | Collection:
+        """return copy-on-write view of parent Collection: object copied by first change. Full copy if views not supported by DLMS_SPODES"""
+        if not view.supported():
+            return cls.get_collection(col_id)[0]
+        return CowCollection(cls._get_collection(col_id))
 
     @classmethod
     def get_templates(cls) -> list[str]:
@@ -137,100 +403,118 @@ class Base(Adapter, ABC):
 
 class __GetCollectionIDMixin1(Base, ABC):
     """"""
+    @staticmethod
+    def key2id(man: Manufacturer, f_id: ParameterValue, f_ver: bytes) -> ID:
+        """ID by container keys, <f_id> parsed once by firm_id"""
+        return collection.ID(man=man, f_id=f_id, f_ver=ParameterValue.parse(f_ver))
+
+    @classmethod
+    def get_catalog(cls) -> catalog.Catalog:
+        """cached immutable catalog of types, built again by changed firm_id only after type store change"""
+        return catalog.get(cls, cls.get_manufactures_container, cls.key2id)
+
     def get_collectionIDs(self) -> list[ID]:
-        ret = list()
-        for m_k, m_v in self.get_manufactures_container().items():
-            for f_id_k, f_id_v in m_v.items():
-                for f_ver in f_id_v.keys():
-                    ret.append(collection.ID(
-                        man=m_k,
-                        f_id=ParameterValue.parse(f_id_k),
-                        f_ver=ParameterValue.parse(f_ver)
-                    ))
-        return ret
+        return list(self.get_catalog())
 
     def get_ID_tree(self) -> dict[Manufacturer, dict[ParameterValue, set[ID]]]:
-        ret = dict()
-        for m_k, m_v in self.get_manufactures_container().items():
-            ret[m_k] = dict()
-            for f_id_k, f_id_v in m_v.items():
-                ret[m_k][id_ := ParameterValue.parse(f_id_k)] = set()
-                for f_ver in f_id_v.keys():
-                    ret[m_k][id_].add(collection.ID(
-                        man=m_k,
-                        f_id=ParameterValue.parse(f_id_k),
-                        f_ver=ParameterValue.parse(f_ver)
-                    ))
-        return ret
+        return self.get_catalog().as_tree()
 
 
 class __SetTemplateMixin1(Base, ABC):
-    @staticmethod
-    def temp2root(r_n: ET.Element,
+    @classmethod
+    def temp2root(cls, r_n: ET.Element,
                   path: Path,
                   template: Template):
-        used_copy = copy.deepcopy(template.used)
+        """stream template to file: header of <r_n>, next object nodes one by one. Write by temporary file, keep old file if failed"""
+        cls.set_template_header(r_n, template)
+        tmp = path.with_suffix(F"{path.suffix}.tmp{os.getpid()}")
+        try:
+            with metrics.timer("write"), open(tmp, "wb") as f:
+                f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+                f.write(F"<{r_n.tag}{"".join(F" {k}={quoteattr(v)}" for k, v in r_n.attrib.items())}>".encode("utf-8"))
+                for el in r_n:
+                    f.write(ET.tostring(el, encoding="utf-8"))
+                for el in cls.template2elements(template):
+                    f.write(ET.tostring(el, encoding="utf-8"))
+                f.write(F"</{r_n.tag}>".encode("utf-8"))
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        metrics.count_file("bytes_written", path)
+
+    @staticmethod
+    def set_template_header(r_n: ET.Element, template: Template):
         r_n.attrib["decode"] = "1"
         if template.verified:
             r_n.attrib["verified"] = "1"
+
+    @classmethod
+    def template2root(cls, r_n: ET.Element, template: Template):
+        """fill template root node by used values"""
+        cls.set_template_header(r_n, template)
+        r_n.extend(cls.template2elements(template))
+
+    @classmethod
+    def template2elements(cls, template: Template) -> Iterator[ET.Element]:
+        """yield object node for each used LN with value of each used attribute from first collection has it.
+        LN -> owning collections index build once, each used attribute walk once. ValueError after all if not found values"""
+        used: list[tuple[bytes, Iterable[int]]] = [(collection.get_ln_contents(ln), indexes) for ln, indexes in template.used.items()]
+        owners: dict[bytes, list[ic.COSEMInterfaceClasses]] = {ln: list() for ln, _ in used}
         for col in template.collections:
-            for ln, indexes in copy.copy(used_copy).items():
-                try:
-                    obj = col.get_object(ln)
-                    object_node = ET.SubElement(
-                        r_n,
-                        "object",
-                        attrib={"ln": obj.logical_name.get_report().msg})
-                    for i in tuple(indexes):
-                        attr = obj.get_attr(i)
-                        if isinstance(attr, cdt.CommonDataType):
-                            attr_el = ET.SubElement(
-                                object_node,
-                                "attr",
-                                {"name": obj.get_attr_element(i).NAME,
-                                 "index": str(i)})
-                            if isinstance(attr, cdt.SimpleDataType):
-                                attr_el.text = str(attr)
-                            elif isinstance(attr, cdt.ComplexDataType):
-                                attr_el.attrib["type"] = "array" if attr.TAG == b'\x01' else "struct"  # todo: make better
-                                stack: list = [(attr_el, "attr_el_name", iter(attr))]
-                                while stack:
-                                    node, a_name, value_it = stack[-1]
-                                    value = next(value_it, None)
-                                    if value:
-                                        if not isinstance(a_name, str):
-                                            a_name = next(a_name).NAME
-                                        if isinstance(value, cdt.Array):
-                                            stack.append((ET.SubElement(node,
-                                                                        "array",
-                                                                        attrib={"name": a_name}), "ar_name", iter(value)))
-                                        elif isinstance(value, cdt.Structure):
-                                            stack.append((ET.SubElement(node, "struct"), iter(value.ELEMENTS), iter(value)))
-                                        else:
-                                            ET.SubElement(node,
-                                                          "simple",
-                                                          attrib={"name": a_name}).text = str(value)
-                                    else:
-                                        stack.pop()
-                            indexes.remove(i)
-                        else:
-                            logger.error(F"skip record {obj}:attr={i} with value={attr}")
-                    if len(indexes) == 0:
-                        used_copy.pop(ln)
-                except exc.NoObject as e:
-                    logger.warning(F"skip obj with {ln=} in {template.collections.index(col)} collection: {e}")
-                    continue
-            if len(used_copy) == 0:
-                logger.info(F"success decoding: used {template.collections.index(col) + 1} from {len(template.collections)} collections")
-                break
-        if len(used_copy) != 0:
-            raise ValueError(F"failed decoding: {used_copy}")
-        with open(path, mode="wb") as f:
-            f.write(ET.tostring(
-                element=r_n,
-                encoding="utf-8",
-                method="xml",
-                xml_declaration=True))
+            for ln, objs in owners.items():
+                if (obj := col.get(ln)) is not None:
+                    objs.append(obj)
+        not_found: dict[bytes, set[int]] = dict()
+        for ln, indexes in used:
+            if len(objs := owners[ln]) == 0:
+                logger.warning(F"skip obj with ln={ln.hex()}: absence in all collections")
+                not_found[ln] = set(indexes)
+                continue
+            object_node = ET.Element("object", attrib={"ln": objs[0].logical_name.get_report().msg})
+            for i in indexes:
+                for obj in objs:
+                    if isinstance(attr := obj.get_attr(i), cdt.CommonDataType):
+                        cls.attr2node(object_node, obj, i, attr)
+                        break
+                    logger.error(F"skip record {obj}:attr={i} with value={attr}")
+                else:
+                    not_found.setdefault(ln, set()).add(i)
+            yield object_node
+        if len(not_found) != 0:
+            raise ValueError(F"failed decoding: {not_found}")
+        logger.info(F"success decoding: used {len(template.used)} objects from {len(template.collections)} collections")
+
+    @staticmethod
+    def attr2node(object_node: ET.Element, obj: ic.COSEMInterfaceClasses, i: int, attr: cdt.CommonDataType):
+        attr_el = ET.SubElement(
+            object_node,
+            "attr",
+            {"name": obj.get_attr_element(i).NAME,
+             "index": str(i)})
+        if isinstance(attr, cdt.SimpleDataType):
+            attr_el.text = str(attr)
+        elif isinstance(attr, cdt.ComplexDataType):
+            attr_el.attrib["type"] = "array" if attr.TAG == b'\x01' else "struct"  # todo: make better
+            stack: list = [(attr_el, "attr_el_name", iter(attr))]
+            while stack:
+                node, a_name, value_it = stack[-1]
+                value = next(value_it, None)
+                if value:
+                    if not isinstance(a_name, str):
+                        a_name = next(a_name).NAME
+                    if isinstance(value, cdt.Array):
+                        stack.append((ET.SubElement(node,
+                                                    "array",
+                                                    attrib={"name": a_name}), "ar_name", iter(value)))
+                    elif isinstance(value, cdt.Structure):
+                        stack.append((ET.SubElement(node, "struct"), iter(value.ELEMENTS), iter(value)))
+                    else:
+                        ET.SubElement(node,
+                                      "simple",
+                                      attrib={"name": a_name}).text = str(value)
+                else:
+                    stack.pop()
 
     @classmethod
     @abstractmethod
@@ -240,8 +524,115 @@ class __SetTemplateMixin1(Base, ABC):
     def set_template(self, template: Template):
         self.temp2root(
             r_n=self._get_template_root_node(collections=template.collections),
-            path=self._get_template_path(template.name),
+            path=(path := self._get_template_path(template.name)),
             template=template)
+        template_cache.invalidate_if(lambda k: k[2] == path)
+
+
+class __KeepDataMixin1(Base, ABC):
+    """data keeping by compiled <SavePlan>: values captured to <DataRecord>, compare with type and writing later"""
+    DATA_ENCODING: str = "UTF-8"
+
+    @classmethod
+    def set_data(cls, col: Collection, ass_id: int = 3) -> list[Exception]:
+        record, errors = cls._col2record(col, ass_id)
+        if record is not None:
+            errors.extend(cls._keep_record(record))
+        return errors
+
+    @classmethod
+    def prepare_data(cls, col: Collection, ass_id: int = 3) -> tuple[DataRecord | None, list[Exception]]:
+        return cls._col2record(col, ass_id)
+
+    @classmethod
+    def keep_prepared(cls, record: DataRecord | None) -> list[Exception]:
+        return list() if record is None else cls._keep_record(record)
+
+    @classmethod
+    def _col2record(cls, col: Collection, ass_id: int) -> tuple[DataRecord | None, list[Exception]]:
+        """collect encoding of attributes for keeping by Association object_list. Without compare with type"""
+        try:
+            plan = cls.get_save_plan(col.id, ass_id)
+        except exc.EmptyObj as e:
+            return None, [e]
+        objects, errors = cls.col2objects(col, plan)
+        return DataRecord(
+            path=cls._get_keep_path(col),
+            col_id=col.id,
+            r_n=cls._get_root_node(col, cls.DATA_ROOT_TAG),
+            objects=objects), errors
+
+    @staticmethod
+    def col2objects(col: Collection, plan: SavePlan) -> tuple[list[tuple[bytes, list[tuple[int, bytes]]]], list[Exception]]:
+        """return encoding of not empty attributes by <plan> as LN: [(attribute index, encoding)]"""
+        errors: list[Exception] = list(plan.errors)
+        objects: list[tuple[bytes, list[tuple[int, bytes]]]] = list()
+        for ln, indexes in plan.objects:
+            if (obj := col.get(ln)) is None:
+                errors.append(exc.NoObject(F"{cst.LogicalName(bytearray(ln))} is absence"))
+                continue
+            attrs: list[tuple[int, bytes]] = list()
+            for i in indexes:
+                try:
+                    if (attr := obj.get_attr(i)) is not None:
+                        attrs.append((i, attr.encoding))
+                except (exc.DLMSException, IndexError) as e:
+                    errors.append(e)
+            if len(attrs) != 0:
+                objects.append((ln, attrs))
+        return objects, errors
+
+    @classmethod
+    def _keep_record(cls, record: DataRecord) -> list[Exception]:
+        """write attributes changed relative to type. Can run in other thread or process"""
+        changed, errors = cls.changed_objects(cls.get_parent_encodings(record.col_id), record.objects)
+        for ln, attrs in changed:
+            object_node = ET.SubElement(record.r_n, "object", attrib={'ln': ".".join(map(str, ln))})
+            for i, encoding in attrs:
+                ET.SubElement(object_node, "attr", attrib={'index': str(i)}).text = encoding.hex()
+        if len(changed) != 0:
+            # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
+            cls._write(record.path, cls._encode(record.r_n, cls.DATA_ENCODING))
+        else:
+            logger.warning("nothing save. all attributes according with origin collection")
+        return errors
+
+    @staticmethod
+    def changed_objects(parent: Encodings,
+                        objects: list[tuple[bytes, list[tuple[int, bytes]]]]) -> tuple[list[tuple[bytes, list[tuple[int, bytes]]]], list[Exception]]:
+        """return <objects> attributes changed relative to type encodings <parent>"""
+        errors: list[Exception] = list()
+        ret: list[tuple[bytes, list[tuple[int, bytes]]]] = list()
+        for ln, attrs in objects:
+            if (parent_attrs := parent.get(ln)) is None:
+                logical_name = cst.LogicalName(bytearray(ln))
+                errors.append(exc.NoObject(F"{logical_name} is absence in type"))
+                continue
+            changed = [(i, encoding) for i, encoding in attrs if parent_attrs.get(i) != encoding]
+            if len(changed) != 0:
+                ret.append((ln, changed))
+        return ret, errors
+
+    @classmethod
+    def set_data_many(cls, cols: Iterable[Collection], ass_id: int = 3, executor: Executor = None) -> list[list[Exception]]:
+        """encoding collect, compare with type and writing of each collection in <executor>. For ProcessPoolExecutor encoding collect
+        in current thread: Collection not picklable, <DataRecord> is passed to process"""
+        keys, unique = dedupe_by_ldn(cols)
+        errors: dict[bytes, list[Exception]] = dict()
+        futures: dict[bytes, Future] = dict()
+        adp, store = cls._origin or cls, cls.store if cls._origin else None
+        with get_executor(executor) as ex:
+            if not isinstance(ex, ProcessPoolExecutor):
+                return gather_errors(keys, errors, {ldn: ex.submit(keep_collection, adp, store, col, ass_id) for ldn, col in unique.items()})
+            for ldn, col in unique.items():
+                try:
+                    record, errors[ldn] = cls._col2record(col, ass_id)
+                except exc.DLMSException as e:
+                    errors[ldn] = [e]
+                    continue
+                if record is not None:
+                    futures[ldn] = ex.submit(keep_record, adp, store, record)
+            return gather_errors(keys, errors, futures)
 
 
 class Xml3(__GetCollectionIDMixin1, Base):
@@ -256,11 +647,11 @@ class Xml3(__GetCollectionIDMixin1, Base):
         ET.SubElement(r_n, "dlms_ver").text = str(col.dlms_ver)
         ET.SubElement(r_n, "country").text = str(col.country.value)
         if col.country_ver:
-            ET.SubElement(r_n, "country_ver").text = str(SemVer.parse(col.country_ver.value.contents, optional_minor_and_patch=True))
+            ET.SubElement(r_n, "country_ver").text = str(SemVer.parse(cdt.OctetString(col.country_ver.value).contents, optional_minor_and_patch=True))
         if col.id is not None:
             ET.SubElement(r_n, "manufacturer").text = col.id.man.decode("utf-8")
             ET.SubElement(r_n, "server_type").text = col.id.f_id.value.hex()
-            ET.SubElement(r_n, "server_ver", attrib={"instance": "1"}).text = str(SemVer.parse(col.id.f_ver.value[2:]))
+            ET.SubElement(r_n, "server_ver", attrib={"instance": "1"}).text = str(Xml3.id2semver(col.id))
         return r_n
 
     @classmethod
@@ -292,12 +683,31 @@ class Xml3(__GetCollectionIDMixin1, Base):
                 par=b'\x00\x00\x60\x01\x06\xff\x02',  # 0.0.96.1.6.255:2
                 value=cdt.OctetString(bytearray(country_ver.encode(encoding="ascii"))).encoding
             ))
+        if (col_id := cls.header2id(r_n)) is not None and not (col.id is not None and Xml3.is_same_id(col.id, col_id)):
+            col.set_id(col_id)
+        col.spec_map = col.get_spec()
+
+    @staticmethod
+    def id2semver(col_id: ID) -> SemVer:
+        """firmware version of legacy ID. Accept raw ascii value of <header2id> and OctetString encoding"""
+        value = bytes(col_id.f_ver.value)
+        if len(value) >= 2 and value[0] == cdt.OctetString.TAG[0] and value[1] == len(value) - 2:
+            value = value[2:]
+        return SemVer.parse(value, True)
+
+    @staticmethod
+    def is_same_id(a: ID, b: ID) -> bool:
+        """equal legacy IDs, firmware version compared by <id2semver>"""
+        return a.man == b.man and a.f_id == b.f_id and a.f_ver.par == b.f_ver.par and Xml3.id2semver(a) == Xml3.id2semver(b)
+
+    @classmethod
+    def header2id(cls, r_n: ET.Element) -> ID | None:
         if all((
                 manufacturer := r_n.findtext("manufacturer"),
                 firm_id := r_n.findtext("server_type"),
                 firm_ver := r_n.findtext("server_ver")
         )):
-            col.set_id(collection.ID(
+            return collection.ID(
                 man=manufacturer.encode("utf-8"),
                 f_id=ParameterValue(
                     par=b'\x00\x00\x60\x01\x01\xff\x02',
@@ -305,165 +715,214 @@ class Xml3(__GetCollectionIDMixin1, Base):
                 f_ver=ParameterValue(
                     par=b'\x00\x00\x00\x02\x01\xff\x02',
                     value=firm_ver.encode(encoding="ascii"))
-            ))
-        col.spec_map = col.get_spec()
+            )
+        return None
 
     @classmethod
-    def root2data(cls, r_n: ET.Element, col: Collection):
+    def _set_data_header(cls, r_n: ET.Element, col: Collection) -> Callable[[ET.Element, Collection], None]:
         if not cls._is_header(r_n, Xml3.TYPE_ROOT_TAG, Xml3.VERSION):
             raise AdapterException(F"Unknown tag: {r_n.tag} with {r_n.attrib}")
         cls.set_parameters(r_n, col)
-        for obj in r_n.findall("object"):
-            ln: str = obj.attrib.get('ln', 'is absence')
-            logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
-            if not col.is_in_collection(logical_name):
-                logger.error(F"got object with {ln=} not find in collection. Skip it attribute values")
-                continue
+        return Xml3._fill_object_data3
+
+    @staticmethod
+    def _fill_object_data3(obj: ET.Element, col: Collection):
+        ln: str = obj.attrib.get('ln', 'is absence')
+        logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
+        if not col.is_in_collection(logical_name):
+            logger.error(F"got object with {ln=} not find in collection. Skip it attribute values")
+            return
+        else:
+            new_object = col.get_object(logical_name)
+        indexes: list[int] = list()
+        """ got attributes indexes for current object """
+        for attr in obj.findall('attribute'):
+            index: str = attr.attrib.get('index')
+            if index.isdigit():
+                indexes.append(int(index))
             else:
-                new_object = col.get_object(logical_name)
-            indexes: list[int] = list()
-            """ got attributes indexes for current object """
-            for attr in obj.findall('attribute'):
-                index: str = attr.attrib.get('index')
-                if index.isdigit():
-                    indexes.append(int(index))
-                else:
-                    raise ValueError(F'ERROR: for obj with {ln=} got index {index} and it is not digital')
-                try:
-                    new_object.set_attr(indexes[-1], bytes.fromhex(attr.text))
-                except exc.NoObject as e:
-                    logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. Skip. {e}.")
-                    break
-                except exc.ITEApplication as e:
-                    logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. {e}")
-                except IndexError:
-                    logger.error(F'Object "{new_object}" not has attr: {index}')
-                except TypeError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not write, encoding wrong : {e}')
-                except ValueError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
-                except AttributeError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
+                raise ValueError(F'ERROR: for obj with {ln=} got index {index} and it is not digital')
+            try:
+                new_object.set_attr(indexes[-1], bytes.fromhex(attr.text))
+            except exc.NoObject as e:
+                logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. Skip. {e}.")
+                break
+            except exc.ITEApplication as e:
+                logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. {e}")
+            except IndexError:
+                logger.error(F'Object "{new_object}" not has attr: {index}')
+            except TypeError as e:
+                logger.error(F'Object {new_object} attr:{index} do not write, encoding wrong : {e}')
+            except ValueError as e:
+                logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
+            except AttributeError as e:
+                logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
 
     @classmethod
     def root2collection(cls, r_n: ET.Element, col: Collection):
         if not Xml3._is_header(r_n, Xml3.TYPE_ROOT_TAG, Xml3.VERSION):
             raise AdapterException(F"Unknown tag<{r_n.tag}> with {r_n.attrib}")
         cls.set_parameters(r_n, col)
-        attempts: iter = count(3, -1)
-        """ attempts counter """
-        while len(r_n) != 0 and next(attempts):
-            logger.info(F'{attempts=}')
-            for obj in r_n.findall('object'):
-                ln: str = obj.attrib.get('ln', 'is absence')
-                class_id: str = obj.findtext('class_id')
-                if not class_id:
-                    logger.warning(F"skip create DLMS {ln} from Xml. Class ID is absence")
-                    continue
-                version: str | None = obj.findtext('version')
-                try:
-                    logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
-                    if not col.is_in_collection(logical_name):
-                        new_object = col.add(class_id=ut.CosemClassId(class_id),
-                                             version=None if version is None else cdt.Unsigned(version),
-                                             logical_name=logical_name)
-                    else:
-                        new_object = col.get_object(logical_name.contents)
-                except TypeError as e:
-                    logger.error(F'Object {obj.attrib["name"]} not created : {e}')
-                    continue
-                except ValueError as e:
-                    logger.error(F'Object {obj.attrib["name"]} not created. {class_id=} {version=} {ln=}: {e}')
-                    continue
-                indexes: list[int] = list()
-                """ got attributes indexes for current object """
-                for attr in obj.findall('attribute'):
-                    index: str = attr.attrib.get('index')
-                    if index.isdigit():
-                        indexes.append(int(index))
-                    else:
-                        raise ValueError(F'ERROR: for {new_object.logical_name if new_object is not None else ""} got index {index} and it is not digital')
-                    try:
-                        match len(attr.text), new_object.get_attr_element(indexes[-1]).DATA_TYPE:
-                            case 1 | 2, ut.CHOICE():
-                                if new_object.get_attr(indexes[-1]) is None:
-                                    new_object.set_attr(indexes[-1], int(attr.text))
-                                else:
-                                    """not need set"""
-                            case 1 | 2, data_type if data_type.TAG[0] == int(attr.text):
-                                """ ordering by old"""
-                            case 1 | 2, data_type:
-                                raise ValueError(F'Got {attr.text} attribute Tag, expected {data_type}')
-                            case _:
-                                new_object.set_attr(indexes[-1], bytes.fromhex(attr.text))
-                        obj.remove(attr)
-                    except ut.UserfulTypesException as e:
-                        if attr.attrib.get("forced", None):
-                            new_object.set_attr_force(indexes[-1], cdt.get_common_data_type_from(int(attr.text).to_bytes(1, "big"))())
-                        logger.warning(F"set to {new_object} attr: {indexes[-1]} forced value after. {e}.")
-                    except exc.NoObject as e:
-                        logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. Skip. {e}.")
-                        break
-                    except exc.ITEApplication as e:
-                        logger.error(F"Can't fill {new_object} attr: {indexes[-1]}. {e}")
-                    except IndexError:
-                        logger.error(F'Object "{new_object}" not has attr: {index}')
-                    except TypeError as e:
-                        logger.error(F'Object {new_object} attr:{index} do not write, encoding wrong : {e}')
-                    except ValueError as e:
-                        logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
-                    except AttributeError as e:
-                        logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
-                if len(obj.findall('attribute')) == 0:
-                    r_n.remove(obj)
-            logger.info(F'Not parsed DLMS objects: {len(r_n)}')
-        return col
+        return col, cls._fill_collection3(r_n, col)
 
     @staticmethod
-    @lru_cache(1)
-    def get_manufactures_container() -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
-        logger.info(F"use manufacturer configuration system {Xml3.__name__}")
+    def _fill_collection3(r_n: ET.Element, col: Collection) -> list[Exception]:
+        """fill created collection from xml without DOM changing. At first create all objects(with known version before others,
+        it need for search version by class), after fill attributes in one pass. Return failures"""
+        errors: list[Exception] = list()
+        obj_nodes = r_n.findall('object')
+        objs: list[tuple[int, ET.Element, ic.COSEMInterfaceClasses]] = list()
+        """xml order, node, created object"""
+        for n in sorted(range(len(obj_nodes)), key=lambda it: obj_nodes[it].findtext('version') is None):
+            obj = obj_nodes[n]
+            ln: str = obj.attrib.get('ln', 'is absence')
+            class_id: str = obj.findtext('class_id')
+            if not class_id:
+                logger.warning(F"skip create DLMS {ln} from Xml. Class ID is absence")
+                continue
+            version: str | None = obj.findtext('version')
+            try:
+                logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
+                if not col.is_in_collection(logical_name):
+                    new_object = col.add(class_id=ut.CosemClassId(class_id),
+                                         version=None if version is None else cdt.Unsigned(version),
+                                         logical_name=logical_name)
+                else:
+                    new_object = col.get_object(logical_name.contents)
+            except (TypeError, ValueError) as e:
+                logger.error(F'Object {ln} not created. {class_id=} {version=}: {e}')
+                e.add_note(F"object {ln}")
+                errors.append(e)
+                continue
+            objs.append((n, obj, new_object))
+        objs.sort(key=lambda it: it[0])
+        """restore xml order for filling"""
+        for _, obj, new_object in objs:
+            for attr in obj.iterfind('attribute'):
+                index: str = attr.attrib.get('index')
+                if not index.isdigit():
+                    raise ValueError(F'ERROR: for {new_object.logical_name} got index {index} and it is not digital')
+                if not Xml3._fill_attr3(new_object, int(index), attr, errors):
+                    break
+        logger.info(F'Not parsed DLMS attributes: {len(errors)}')
+        return errors
+
+    @staticmethod
+    def _fill_attr3(new_object: ic.COSEMInterfaceClasses, i: int, attr: ET.Element, errors: list[Exception]) -> bool:
+        """set attribute value from node. Return False if need skip other attributes of object"""
+        try:
+            match len(attr.text), new_object.get_attr_element(i).DATA_TYPE:
+                case 1 | 2, ut.CHOICE():
+                    if new_object.get_attr(i) is None:
+                        new_object.set_attr(i, int(attr.text))
+                    else:
+                        """not need set"""
+                case 1 | 2, data_type if data_type.TAG[0] == int(attr.text):
+                    """ ordering by old"""
+                case 1 | 2, data_type:
+                    raise ValueError(F'Got {attr.text} attribute Tag, expected {data_type}')
+                case _:
+                    new_object.set_attr(i, bytes.fromhex(attr.text))
+            return True
+        except ut.UserfulTypesException as e:
+            if attr.attrib.get("forced", None):
+                new_object.set_attr_force(i, cdt.get_common_data_type_from(int(attr.text).to_bytes(1, "big"))())
+            else:
+                errors.append(e)
+            logger.warning(F"set to {new_object} attr: {i} forced value after. {e}.")
+            return True
+        except exc.NoObject as e:
+            logger.error(F"Can't fill {new_object} attr: {i}. Skip. {e}.")
+            e.add_note(F"object {new_object.logical_name} attr: {i}")
+            errors.append(e)
+            return False
+        except (exc.ITEApplication, IndexError, TypeError, ValueError, AttributeError) as e:
+            logger.error(F"Can't fill {new_object} attr: {i}. {e}")
+            e.add_note(F"object {new_object.logical_name} attr: {i}")
+            errors.append(e)
+            return True
+
+    @classmethod
+    @lru_cache(None)
+    def get_manufactures_container(cls) -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
+        logger.info(F"use manufacturer configuration system {cls.__name__} in {cls.store}")
+        if (paths := manifest.load(cls.store.types, cls.__name__)) is None:
+            paths = cls.scan_types()
+            manifest.update(cls.store.types, cls.__name__, paths)
         ret: dict[bytes, dict[bytes, dict[SemVer, Path]]] = dict()
-        for m_path in types_path.iterdir():
+        for ver_path in paths:
+            try:
+                m, f_id, v = cls.path2key(ver_path)
+            except ValueError as e:
+                logger.error(F"skip type, wrong file name {ver_path}: {e}")
+                continue
+            ret.setdefault(m, dict()).setdefault(f_id, dict())[v] = ver_path
+        return ret
+
+    @staticmethod
+    def path2key(path: Path) -> tuple[bytes, bytes, SemVer]:
+        """container keys of type file: manufacturer, firm_id, version. ValueError if wrong name"""
+        return path.parent.parent.name.encode("ascii"), bytes.fromhex(path.parent.name), SemVer.parse(path.stem)
+
+    @staticmethod
+    def ver2semver(f_ver: SemVer) -> SemVer:
+        """version index key of container version key"""
+        return f_ver
+
+    @staticmethod
+    def is_affected(col_id: ID) -> Callable[[tuple], bool]:
+        """predicate by cache arguments: lookup of same manufacturer and firm_id, may be resolved by max compatible version to <col_id>"""
+        return Xml3.key2affected(col_id.man, col_id.f_id.value)
+
+    @staticmethod
+    def key2affected(man: bytes, f_id: bytes, f_ver: SemVer = None) -> Callable[[tuple], bool]:
+        """as <is_affected> by container keys, <f_ver> not used: any version may be resolved by fallback"""
+        def predicate(args: tuple) -> bool:
+            return any(isinstance(a, ID) and a.man == man and a.f_id.value == f_id for a in args)
+        return predicate
+
+    @classmethod
+    @lru_cache(None)
+    def get_version_index(cls) -> dict[tuple[bytes, bytes], VersionIndex]:
+        """sorted versions by manufacturer and firm_id"""
+        ret: dict[tuple[bytes, bytes], VersionIndex] = dict()
+        for m_k, m_v in cls.get_manufactures_container().items():
+            for f_k, f_v in m_v.items():
+                ret[(m_k, f_k)] = VersionIndex(f_v.items())
+        return ret
+
+    @classmethod
+    def scan_types(cls) -> list[Path]:
+        """walk Types directory, return type files"""
+        ret: list[Path] = list()
+        for m_path in cls.store.types.iterdir():
             if m_path.is_dir():
-                if len(m_path.name) == 3:
-                    man = m_path.name.encode("ascii")
-                # elif man6.fullmatch(m_path.name) is not None:
-                #     man = bytes.fromhex(m_path.name)
-                else:
+                if len(m_path.name) != 3:
                     logger.warning(F"skip <{m_path}>: not recognized like manufacturer")
                     continue
-                ret[man] = dict()
                 for sid_path in m_path.iterdir():
-                    if sid_path.is_dir():
-                        ret[man][firm_id := bytes.fromhex(sid_path.name)] = dict()
+                    if sid_path.is_dir() and hex_.fullmatch(sid_path.name):
                         for ver_path in sid_path.iterdir():
                             if ver_path.is_file() and ver_path.suffix == ".typ":
-                                try:
-                                    v = SemVer.parse(ver_path.stem)
-                                except ValueError as e:
-                                    logger.error(F"skip type, wrong file name {ver_path}: {e}")
-                                    continue
-                                ret[man][firm_id][v] = ver_path
+                                ret.append(ver_path)
         return ret
 
     @classmethod
-    @lru_cache(maxsize=100)
+    @path_cache.cached
+    @miss_cache.cached(AdapterException)
     def get_col_path(cls,  col_id: ID) -> Path:
         """ret: file, is_searched"""
         if (man := cls.get_manufactures_container().get(col_id.man)) is None:
             raise AdapterException(F"no support manufacturer: {col_id.man}")
         elif (firm_id := man.get(col_id.f_id.value)) is None:
             raise AdapterException(F"no support type {col_id.f_id}, with manufacturer: {m}")
-        elif path := firm_id.get(semver := SemVer.parse(col_id.f_ver.value[2:], True)):
+        elif path := firm_id.get(semver := Xml3.id2semver(col_id)):
             logger.info(F"got collection from library by {path=}")
             return path
+        elif (path := cls.get_version_index()[(col_id.man, col_id.f_id.value)].max_compatible(semver)) is not None:
+            return path
         else:
-            try:
-                # todo: remove all compatible without MAX version
-                return firm_id.get(max(filter(lambda v: v.is_compatible(semver), firm_id.keys())))
-            except ValueError:
-                raise AdapterException(F"no support version {col_id.f_ver} with manufacturer: {col_id.man}, identifier: {col_id.f_id}")
+            raise AdapterException(F"no support version {col_id.f_ver} with manufacturer: {col_id.man}, identifier: {col_id.f_id}")
 
     def set_template(self, template: Template):
         raise AdapterException(F"not support <create_template> for {self.VERSION}")
@@ -478,22 +937,29 @@ class Xml40(__GetCollectionIDMixin1, Base):
     TYPE_ROOT_TAG = Xml3.TYPE_ROOT_TAG
     DATA_ROOT_TAG = Xml3.DATA_ROOT_TAG
     TEMPLATE_ROOT_TAG = Xml3.TEMPLATE_ROOT_TAG
+    FALLBACK = Xml3
 
     @classmethod
     def _get_root_node(cls, col: Collection, tag: str) -> ET.Element:
-        return Xml3._get_root_node(col, tag)
+        r_n = Xml3._get_root_node(col, tag)
+        r_n.set("version", str(cls.VERSION))
+        return r_n
 
     @classmethod
     def set_parameters(cls, r_n: ET.Element, col: Collection):
         Xml3.set_parameters(r_n, col)
 
-    @staticmethod
-    def get_manufactures_container() -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
-        return Xml3.get_manufactures_container()
+    @classmethod
+    def header2id(cls, r_n: ET.Element) -> ID | None:
+        return Xml3.header2id(r_n)
+
+    @classmethod
+    def get_manufactures_container(cls) -> dict[bytes, dict[bytes, dict[SemVer, Path]]]:
+        return cls._on_store(Xml3).get_manufactures_container()
 
     @classmethod
     def get_col_path(cls,  col_id: ID) -> Path:
-        return Xml3.get_col_path(col_id)
+        return cls._on_store(Xml3).get_col_path(col_id)
 
     @classmethod
     def set_collection(cls, col: Collection):
@@ -504,157 +970,190 @@ class Xml40(__GetCollectionIDMixin1, Base):
         return Xml3.set_data(col)
 
     def set_template(self, template: Template):
-        xml3.set_template(template)
+        Xml3.set_template(self, template)
 
     @classmethod
     def get_template(cls, name: str, forced_col: Collection = None) -> Template:
-        return Xml3.get_template(name)
+        return Xml3.get_template(name, forced_col)
 
     @classmethod
-    def root2data(cls, r_n: ET.Element, col: Collection):
+    def _set_data_header(cls, r_n: ET.Element, col: Collection) -> Callable[[ET.Element, Collection], None]:
         if not cls._is_header(r_n, Xml40.DATA_ROOT_TAG, Xml40.VERSION):
-            return Xml3.root2data(r_n, col)
+            return Xml3._set_data_header(r_n, col)
         cls.set_parameters(r_n, col)
-        cls._fill_data40(r_n, col)
+        return Xml40._fill_object_data40
 
-    @classmethod
-    def _fill_data40(cls, r_n: ET.Element, col: Collection):
-        for obj_el in r_n.findall("object"):
-            ln: str = obj_el.attrib.get("ln", 'is absence')
-            logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
-            if not col.is_in_collection(logical_name):
-                raise ValueError(F"got object with {ln=} not find in collection. Abort attribute setting")
-            else:
-                obj = col.get_object(logical_name)
-                for attr_el in obj_el.findall("attr"):
-                    index: int = int(attr_el.attrib.get("index"))
-                    try:
-                        obj.set_attr(index, bytes.fromhex(attr_el.text))
-                    except exc.NoObject as e:
-                        logger.error(F"Can't fill {obj} attr: {index}. Skip. {e}.")
-                        break
-                    except exc.ITEApplication as e:
-                        logger.error(F"Can't fill {obj} attr: {index}. {e}")
-                    except IndexError:
-                        logger.error(F'Object "{obj}" not has attr: {index}')
-                    except TypeError as e:
-                        logger.error(F'Object {obj} attr:{index} do not write, encoding wrong : {e}')
-                    except ValueError as e:
-                        logger.error(F'Object {obj} attr:{index} do not fill: {e}')
-                    except AttributeError as e:
-                        logger.error(F'Object {obj} attr:{index} do not fill: {e}')
+    @staticmethod
+    def _fill_object_data40(obj_el: ET.Element, col: Collection):
+        ln: str = obj_el.attrib.get("ln", 'is absence')
+        logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
+        if not col.is_in_collection(logical_name):
+            raise ValueError(F"got object with {ln=} not find in collection. Abort attribute setting")
+        else:
+            obj = col.get_object(logical_name)
+            for attr_el in obj_el.iterfind("attr"):
+                if not Xml40.set_attr_data(obj, int(attr_el.attrib.get("index")), bytes.fromhex(attr_el.text)):
+                    break
 
     @staticmethod
-    def _fill_collection40(r_n: ET.Element, col: Collection):
-        """fill created collection from xml"""
-        obj_el: ObjectListElement
-        attempts: iter = count(3, -1)
-        """ attempts counter """
-        while len(r_n) != 0 and next(attempts):
-            logger.info(F'{attempts=}')
-            for obj in r_n.findall("obj"):
+    def set_attr_data(obj: ic.COSEMInterfaceClasses, index: int, encoding: bytes) -> bool:
+        """set attribute by data encoding with logging errors. Return False if need skip other attributes of object"""
+        try:
+            obj.set_attr(index, encoding)
+        except exc.NoObject as e:
+            logger.error(F"Can't fill {obj} attr: {index}. Skip. {e}.")
+            return False
+        except exc.ITEApplication as e:
+            logger.error(F"Can't fill {obj} attr: {index}. {e}")
+        except IndexError:
+            logger.error(F'Object "{obj}" not has attr: {index}')
+        except TypeError as e:
+            logger.error(F'Object {obj} attr:{index} do not write, encoding wrong : {e}')
+        except ValueError as e:
+            logger.error(F'Object {obj} attr:{index} do not fill: {e}')
+        except AttributeError as e:
+            logger.error(F'Object {obj} attr:{index} do not fill: {e}')
+        return True
+
+    @staticmethod
+    def _fill_collection40(r_n: ET.Element, col: Collection) -> list[Exception]:
+        """fill created collection from xml without DOM changing. At first create AssociationLN with <object_list> and all objects from it,
+        after fill attributes in one pass. Return failures"""
+        errors: list[Exception] = list()
+        ass_objs: dict[ET.Element, AssociationLN] = dict()
+        """node: created AssociationLN"""
+        for obj in r_n.iterfind("obj"):
+            if version := obj.findtext("ver"):  # only for AssociationLN
                 ln: str = obj.attrib.get('ln', 'is absence')
-                version: str | None = obj.findtext("ver")
                 try:
-                    logical_name: cst.LogicalName = cst.LogicalName.from_obis(ln)
-                    if version:  # only for AssociationLN
-                        new_object: AssociationLN = col.add_if_missing(
-                            class_id=ClassID.ASSOCIATION_LN,
-                            version=cdt.Unsigned(version),
-                            logical_name=logical_name)
-                        col.add_if_missing(  # current association with know version
-                            class_id=ClassID.ASSOCIATION_LN,
-                            version=cdt.Unsigned(version),
-                            logical_name=cst.LogicalName.from_obis("0.0.40.0.0.255"))
-                    else:
-                        new_object = col.get_object(logical_name.contents)
-                except TypeError as e:
-                    logger.error(F'Object {obj.attrib["ln"]} not created : {e}')
+                    new_object: AssociationLN = col.add_if_missing(
+                        class_id=ClassID.ASSOCIATION_LN,
+                        version=cdt.Unsigned(version),
+                        logical_name=cst.LogicalName.from_obis(ln))
+                    col.add_if_missing(  # current association with know version
+                        class_id=ClassID.ASSOCIATION_LN,
+                        version=cdt.Unsigned(version),
+                        logical_name=cst.LogicalName.from_obis("0.0.40.0.0.255"))
+                except (TypeError, ValueError) as e:
+                    logger.error(F'Object {ln} not created. {version=}: {e}')
+                    e.add_note(F"object {ln}")
+                    errors.append(e)
                     continue
-                except ValueError as e:
-                    logger.error(F'Object {obj.attrib["ln"]} not created. {version=} {ln=}: {e}')
+                ass_objs[obj] = new_object
+        for obj, new_object in ass_objs.items():
+            if (attr := obj.find("attr[@i='2']")) is not None:
+                Xml40._fill_attr40(new_object, attr, col, errors)
+        """all objects created by <object_list>"""
+        for obj in r_n.iterfind("obj"):
+            if is_ass := obj.findtext("ver"):
+                if (new_object := ass_objs.get(obj)) is None:
                     continue
-                for attr in obj.findall("attr"):
-                    i: int = int(attr.attrib.get("i"))
-                    try:
-                        if len(attr.text) <= 2:  # set only type with default value
-                            data_type = new_object.get_attr_element(i).DATA_TYPE
-                            if isinstance(data_type, ut.CHOICE):
-                                new_object.set_attr(i, int(attr.text))
-                            elif data_type.TAG[0] == int(attr.text):
-                                """ ordering by old"""
-                            else:
-                                raise ValueError(F'Got {attr.text} attribute Tag, expected {data_type}')
-                        else:  # set common value
-                            new_object.set_attr(i, bytes.fromhex(attr.text))
-                            if (
-                                new_object.CLASS_ID == ClassID.ASSOCIATION_LN
-                                and i == 2
-                            ):  # setup new root_node from AssociationLN.object_list
-                                for obj_el in new_object.object_list:
-                                    try:
-                                        col.add_if_missing(                         # todo: handle no valid params
-                                            class_id=obj_el.class_id,
-                                            version=obj_el.version,
-                                            logical_name=obj_el.logical_name)
-                                    except collection.CollectionMapError as e:
-                                        logger.error(F"skip {obj_el.logical_name}: {e}")
-                        obj.remove(attr)
-                    except ut.UserfulTypesException as e:
-                        if attr.attrib.get("forced", None):
-                            new_object.set_attr_force(i, cdt.get_common_data_type_from(int(attr.text).to_bytes(1, "big"))())
-                        logger.warning(F"set to {new_object} attr: {i} forced value after. {e}.")
-                    except exc.NoObject as e:
-                        logger.error(F"Can't fill {new_object} attr: {i}. Skip. {e}.")
-                        break
-                    except exc.ITEApplication as e:
-                        logger.error(F"Can't fill {new_object} attr: {i}. {e}")
-                    except IndexError:
-                        logger.error(F'Object "{new_object}" not has attr: {i}')
-                    except TypeError as e:
-                        logger.error(F'Object {new_object} attr:{i} do not write, encoding wrong : {e}')
-                    except ValueError as e:
-                        logger.error(F'Object {new_object} attr:{i} do not fill: {e}')
-                    except AttributeError as e:
-                        logger.error(F'Object {new_object} attr:{i} do not fill: {e}')
-                if len(obj.findall("attr")) == 0:
-                    r_n.remove(obj)
-            logger.info(F'Not parsed DLMS root_node: {len(r_n)}')
+            else:
+                ln: str = obj.attrib.get('ln', 'is absence')
+                try:
+                    new_object = col.get_object(cst.LogicalName.from_obis(ln).contents)
+                except (exc.NoObject, ValueError) as e:
+                    logger.error(F'Object {ln} not find in collection: {e}')
+                    e.add_note(F"object {ln}")
+                    errors.append(e)
+                    continue
+            for attr in obj.iterfind("attr"):
+                if is_ass and attr.attrib.get("i") == "2":
+                    """<object_list> already set"""
+                elif not Xml40._fill_attr40(new_object, attr, col, errors):
+                    break
+        logger.info(F'Not parsed DLMS attributes: {len(errors)}')
+        return errors
+
+    @staticmethod
+    def _fill_attr40(new_object: ic.COSEMInterfaceClasses, attr: ET.Element, col: Collection, errors: list[Exception]) -> bool:
+        """set attribute value from node. For AssociationLN <object_list> add all objects to collection. Return False if need skip other attributes of object"""
+        i: int = int(attr.attrib.get("i"))
+        try:
+            if len(attr.text) <= 2:  # set only type with default value
+                data_type = new_object.get_attr_element(i).DATA_TYPE
+                if isinstance(data_type, ut.CHOICE):
+                    new_object.set_attr(i, int(attr.text))
+                elif data_type.TAG[0] == int(attr.text):
+                    """ ordering by old"""
+                else:
+                    raise ValueError(F'Got {attr.text} attribute Tag, expected {data_type}')
+            else:  # set common value
+                new_object.set_attr(i, bytes.fromhex(attr.text))
+                if (
+                    new_object.CLASS_ID == ClassID.ASSOCIATION_LN
+                    and i == 2
+                ):  # setup new root_node from AssociationLN.object_list
+                    obj_el: ObjectListElement
+                    for obj_el in new_object.object_list:
+                        try:
+                            col.add_if_missing(                         # todo: handle no valid params
+                                class_id=obj_el.class_id,
+                                version=obj_el.version,
+                                logical_name=obj_el.logical_name)
+                        except collection.CollectionMapError as e:
+                            logger.error(F"skip {obj_el.logical_name}: {e}")
+                            errors.append(e)
+            return True
+        except ut.UserfulTypesException as e:
+            if attr.attrib.get("forced", None):
+                new_object.set_attr_force(i, cdt.get_common_data_type_from(int(attr.text).to_bytes(1, "big"))())
+            else:
+                errors.append(e)
+            logger.warning(F"set to {new_object} attr: {i} forced value after. {e}.")
+            return True
+        except exc.NoObject as e:
+            logger.error(F"Can't fill {new_object} attr: {i}. Skip. {e}.")
+            e.add_note(F"object {new_object.logical_name} attr: {i}")
+            errors.append(e)
+            return False
+        except (exc.ITEApplication, IndexError, TypeError, ValueError, AttributeError) as e:
+            logger.error(F"Can't fill {new_object} attr: {i}. {e}")
+            e.add_note(F"object {new_object.logical_name} attr: {i}")
+            errors.append(e)
+            return True
 
     @classmethod
     def root2collection(cls, r_n: ET.Element, col: Collection):
         if not cls._is_header(r_n, Xml40.TYPE_ROOT_TAG, Xml40.VERSION):
             return Xml3.root2collection(r_n, col)
         cls.set_parameters(r_n, col)
-        cls._fill_collection40(r_n, col)
-        return col
+        return col, cls._fill_collection40(r_n, col)
 
 
-class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
+class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, __KeepDataMixin1, Base):
     VERSION: SemVer = SemVer(4, 1)
     TYPE_ROOT_TAG = Xml3.TYPE_ROOT_TAG
     DATA_ROOT_TAG = Xml3.DATA_ROOT_TAG
+    DATA_ENCODING = "cp1251"
     TEMPLATE_ROOT_TAG = Xml3.TEMPLATE_ROOT_TAG
+    FALLBACK = Xml40
 
     @classmethod
     def set_parameters(cls, r_n: ET.Element, col: Collection):
         Xml3.set_parameters(r_n, col)
 
-    @staticmethod
-    @lru_cache(1)
-    def get_manufactures_container() -> dict[Manufacturer, dict[FirmwareId, dict[SemVer, Path]]]:
-        return Xml3.get_manufactures_container()
+    @classmethod
+    def header2id(cls, r_n: ET.Element) -> ID | None:
+        return Xml3.header2id(r_n)
+
+    @classmethod
+    def get_manufactures_container(cls) -> dict[Manufacturer, dict[FirmwareId, dict[SemVer, Path]]]:
+        return cls._on_store(Xml3).get_manufactures_container()
 
     @classmethod
     def get_col_path(cls,  col_id: ID) -> Path:
-        return Xml3.get_col_path(col_id)
+        return cls._on_store(Xml3).get_col_path(col_id)
 
     @classmethod
     def _get_root_node(cls, col: Collection, tag: str) -> ET.Element:
-        return Xml3._get_root_node(col, tag)
+        r_n = Xml3._get_root_node(col, tag)
+        r_n.set("version", str(cls.VERSION))
+        return r_n
 
     @classmethod
-    def set_collection(cls, col: Collection):
+    def collection2root(cls, col: Collection) -> ET.Element:
+        """return type root node with STATIC attributes by AssociationLN except current"""
         root_node = cls._get_root_node(col, cls.TYPE_ROOT_TAG)
         objs: dict[cst.LogicalName, set[int]] = dict()
         """key: LN, value: not writable and readable container"""
@@ -702,66 +1201,40 @@ class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
                     logger.info(F"for {obj} attr: {i} value not need. skipped")
             if len(object_node) == 0:
                 root_node.remove(object_node)
+        return root_node
+
+    @classmethod
+    def set_collection(cls, col: Collection):
         # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
-        xml_string = ET.tostring(root_node, encoding='cp1251', method='xml')
-        if not (man_path := types_path / col.id.man.decode("ascii")).exists():
+        xml_string = cls._encode(cls.collection2root(col), 'cp1251')
+        layout = cls._on_store(Xml3)
+        if not (man_path := layout.store.types / col.id.man.decode("ascii")).exists():
             man_path.mkdir()
         if not (type_path := man_path / col.id.f_id.value.hex()).exists():
             type_path.mkdir()
-        ver_path = type_path / F"{SemVer.parse(col.id.f_ver.value)}.typ"  # use
-        with open(ver_path, "wb") as f:
-            f.write(xml_string)
-            cls.get_manufactures_container.cache_clear()
+        semver = Xml3.id2semver(col.id)
+        ver_path = type_path / F"{semver}.typ"  # use
+        cls._write(ver_path, xml_string)
+        manifest.add(layout.store.types, layout.__name__, ver_path)
+        layout.get_manufactures_container().setdefault(col.id.man, dict()).setdefault(col.id.f_id.value, dict())[semver] = ver_path
+        layout.get_version_index().setdefault((col.id.man, col.id.f_id.value), VersionIndex()).add(semver, ver_path)
+        invalidate_misses(col.id)
+        catalog.changed()
+        cls._invalidate_types(Xml3.is_affected(col.id))
 
     @classmethod
-    def set_data(cls, col: Collection, ass_id: int = 3) -> list[Exception]:
-        path = cls._get_keep_path(col)
-        root_node = cls._get_root_node(col, cls.DATA_ROOT_TAG)
-        err = list()
-        parent_col = cls._get_collection(col.id)
-        obj_list_el: ObjectListElement
-        a_a: AttributeAccessItem
-        for obj_list_el in col.getASSOCIATION(ass_id).object_list:
-            obj = col.get_object(obj_list_el.logical_name)
-            parent_obj = parent_col.get_object(obj_list_el.logical_name)
-            object_node = None
-            for a_a in obj_list_el.access_rights.attribute_access:
-                if (i := int(a_a.attribute_id)) == 1:
-                    """skip ln"""
-                elif obj.get_attr_element(i).classifier == ic.Classifier.DYNAMIC:
-                    """skip DYNAMIC attributes"""
-                elif (attr := obj.get_attr(i)) is None:
-                    """skip empty attributes"""
-                elif parent_obj.get_attr(i) == attr:
-                    """skip not changed attr value"""
-                else:
-                    is_empty = False
-                    if object_node is None:
-                        object_node = ET.SubElement(root_node, "object", attrib={'ln': obj.logical_name.get_report().msg})
-                    ET.SubElement(object_node, "attr", attrib={'index': str(i)}).text = attr.encoding.hex()
-        if not is_empty:
-            # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
-            xml_string = ET.tostring(root_node, encoding='cp1251', method='xml')
-            with open(path, "wb") as f:
-                f.write(xml_string)
-        else:
-            logger.warning("nothing save. all attributes according with origin collection")
-        return err
-
-    @classmethod
-    def root2data(cls, r_n: ET.Element, col: Collection):
+    def _set_data_header(cls, r_n: ET.Element, col: Collection) -> Callable[[ET.Element, Collection], None]:
         if not cls._is_header(r_n, Xml41.DATA_ROOT_TAG, Xml41.VERSION):
-            return Xml40.root2data(r_n, col)
+            return Xml40._set_data_header(r_n, col)
         cls.set_parameters(r_n, col)
-        Xml40._fill_data40(r_n, col)
+        return Xml40._fill_object_data40
 
     @classmethod
     def root2collection(cls, r_n: ET.Element, col: Collection):
         if not cls._is_header(r_n, Xml41.TYPE_ROOT_TAG, Xml41.VERSION):
             return Xml40.root2collection(r_n, col)
         cls.set_parameters(r_n, col)
-        Xml40._fill_collection40(r_n, col)
-        return col
+        return col, Xml40._fill_collection40(r_n, col)
 
     @classmethod
     def _get_template_root_node(cls,
@@ -769,14 +1242,14 @@ class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
         r_n = cls._create_root_node(cls.TEMPLATE_ROOT_TAG)
         ET.SubElement(r_n, "dlms_ver").text = str(collections[0].dlms_ver)
         ET.SubElement(r_n, "country").text = str(collections[0].country.value)
-        ET.SubElement(r_n, "country_ver").text = str(SemVer.parse(collections[0].country_ver.value.contents, optional_minor_and_patch=True))
+        ET.SubElement(r_n, "country_ver").text = str(SemVer.parse(cdt.OctetString(collections[0].country_ver.value).contents, optional_minor_and_patch=True))
         for col in collections:
             manufacture_node = ET.SubElement(r_n, "manufacturer")
             manufacture_node.text = col.id.man.decode("utf-8")
             server_type_node = ET.SubElement(manufacture_node, "server_type")
             server_type_node.text = col.id.f_id.value.hex()
             firm_ver_node = ET.SubElement(server_type_node, "server_ver", attrib={"instance": "1"})
-            firm_ver_node.text = str(SemVer.parse(col.id.f_ver.value))
+            firm_ver_node.text = str(Xml3.id2semver(col.id))
         return r_n
 
     @classmethod
@@ -784,10 +1257,10 @@ class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
         path = cls._get_template_path(name)
         used: collection.UsedAttributes = dict()
         cols = list()
-        tree = ET.parse(path)
-        r_n = tree.getroot()
-        if not cls._is_header(r_n, Xml41.TEMPLATE_ROOT_TAG, Xml41.VERSION):
-            raise AdapterException(F"Unknown tag: {r_n.tag} with {r_n.attrib}")
+        with sniff.XmlHead(path) as head:
+            if not cls._is_header(head.root, Xml41.TEMPLATE_ROOT_TAG, Xml41.VERSION):
+                raise AdapterException(F"Unknown tag: {head.tag} with {head.root.attrib}")
+            r_n = cls._parse_head(head).getroot()
         for man_n in r_n.findall("manufacturer"):
             for fid_n in man_n.findall("server_type"):
                 for fv_n in fid_n.findall("server_ver"):
@@ -798,7 +1271,7 @@ class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
                                 par=b'\x00\x00\x60\x01\x01\xff\x02',
                                 value=bytes.fromhex(fid_n.text)),
                             f_ver=ParameterValue(
-                                par=b'\x00\x00\x00\x02\x00\xff\x02',
+                                par=b'\x00\x00\x00\x02\x01\xff\x02',
                                 value=cdt.OctetString(bytearray(fv_n.text.encode(encoding="ascii"))).encoding)
                         ))[0])
                     except AdapterException as e:
@@ -853,73 +1326,27 @@ class Xml41(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
             verified=bool(int(r_n.findtext("verified", default="0"))))
 
 
-class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
+class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, __KeepDataMixin1, Base):
     """"""
     VERSION = SemVer(5, 0)
     TYPE_ROOT_TAG = "DLMSServerType"
     DATA_ROOT_TAG = "DLMSServerData"
     TEMPLATE_ROOT_TAG: str = "DLMSServerTemplate"
+    FALLBACK = Xml41
 
     @classmethod
-    def root2data(cls, r_n: ET.Element, col: Collection):
+    def _set_data_header(cls, r_n: ET.Element, col: Collection) -> Callable[[ET.Element, Collection], None]:
         if not cls._is_header(r_n, Xml50.DATA_ROOT_TAG, Xml50.VERSION):
-            return Xml41.root2data(r_n, col)
+            return Xml41._set_data_header(r_n, col)
         cls.set_parameters(r_n, col)
-        Xml40._fill_data40(r_n, col)
+        return Xml40._fill_object_data40
 
     @classmethod
     def root2collection(cls, r_n: ET.Element, col: Collection):
         if not cls._is_header(r_n, Xml50.TYPE_ROOT_TAG, Xml50.VERSION):
             return Xml41.root2collection(r_n, col)
         cls.set_parameters(r_n, col)
-        Xml40._fill_collection40(r_n, col)
-        return col
-
-    @classmethod
-    def set_data(cls, col: Collection, ass_id: int = 3) -> list[Exception]:
-        errors: list[Exception] = list()
-        if (obj_list := col.getASSOCIATION(ass_id).object_list) is None:
-            errors.append(exc.EmptyObj(F"Association with {ass_id=} has empty <object_list>"))
-        else:
-            a_a: AttributeAccessItem
-            obj_list_el: ObjectListElement
-            parent_col = cls._get_collection(col.id)
-            root_node = cls._get_root_node(col, cls.DATA_ROOT_TAG)
-            path = cls._get_keep_path(col)
-            is_empty: bool = True
-            for obj_list_el in obj_list:
-                try:
-                    obj = col.get_object(obj_list_el.logical_name)
-                except exc.NoObject as e:
-                    errors.append(e)
-                    continue
-                parent_obj = parent_col.get_object(obj_list_el.logical_name)
-                object_node = None
-                for a_a in obj_list_el.access_rights.attribute_access:
-                    try:
-                        if (i := int(a_a.attribute_id)) == 1:
-                            """skip ln"""
-                        elif obj.get_attr_element(i).classifier == ic.Classifier.DYNAMIC:
-                            """skip DYNAMIC attributes"""
-                        elif (attr := obj.get_attr(i)) is None:
-                            """skip empty attributes"""
-                        elif parent_obj.get_attr(i) == attr:
-                            """skip not changed attr value"""
-                        else:
-                            is_empty = False
-                            if object_node is None:
-                                object_node = ET.SubElement(root_node, "object", attrib={'ln': obj.logical_name.get_report().msg})
-                            ET.SubElement(object_node, "attr", attrib={'index': str(i)}).text = attr.encoding.hex()
-                    except exc.DLMSException as e:
-                        errors.append(e)
-            if not is_empty:
-                # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
-                xml_string = ET.tostring(root_node, encoding="UTF-8", method="xml")
-                with open(path, "wb") as f:
-                    f.write(xml_string)
-            else:
-                logger.warning("nothing save. all attributes according with origin collection")
-        return errors
+        return col, Xml40._fill_collection40(r_n, col)
 
     @staticmethod
     def get_template_node(node: ET.Element, tag: str, value: str) -> ET.Element:
@@ -963,77 +1390,126 @@ class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
 
     @classmethod
     def get_template(cls, name: str, forced_col: Collection = None) -> Template:
+        """Template from parsed file cached by modification time"""
         path = cls._get_template_path(name)
-        r_n = ET.parse(path).getroot()
-        used: collection.UsedAttributes = dict()
-        cols = list()
-        if not cls._is_header(r_n, Xml50.TEMPLATE_ROOT_TAG, Xml50.VERSION):
-            return xml41.get_template(name)
+        if (parsed := cls._get_parsed_template(path, path.stat().st_mtime_ns)) is None:
+            return cls._on_store(Xml41).get_template(name, forced_col)
+        return cls.parsed2template(parsed, name, forced_col)
+
+    @classmethod
+    @template_cache.cached
+    def _get_parsed_template(cls, path: Path, mtime_ns: int) -> ParsedTemplate | None:
+        """None if it is not Xml50 template, checked by header before full parse"""
+        with sniff.XmlHead(path) as head:
+            if not cls._is_header(head.root, Xml50.TEMPLATE_ROOT_TAG, Xml50.VERSION):
+                return None
+            r_n = cls._parse_head(head).getroot()
+        return cls.root2parsed(r_n)
+
+    @classmethod
+    def root2template(cls, r_n: ET.Element,
+                      name: str,
+                      forced_col: Collection = None,
+                      get_collection: Callable[[ID], tuple[Collection, list[Exception]]] = None) -> Template:
+        """return Template from root node. Collections got by <get_collection>(own by default)"""
+        return cls.parsed2template(cls.root2parsed(r_n), name, forced_col, get_collection)
+
+    @classmethod
+    def root2parsed(cls, r_n: ET.Element) -> ParsedTemplate:
+        ids: list[ID] = list()
         for man_n in r_n.findall("manufacturer"):
             for fid_n in man_n.findall("firm_id"):
                 for fv_n in fid_n.findall("firm_ver"):
-                    try:
-                        cols.append(cls.get_collection(collection.ID(
-                            man=bytes.fromhex(man_n.findtext("value")),
-                            f_id=cls.node2parval(fid_n),
-                            f_ver=cls.node2parval(fv_n),
-                        ))[0])
-                    except AdapterException as e:
-                        logger.error(F"collection with: {man_n}/{fid_n}/{fv_n} not load to Template: {e}")
-                        continue
+                    ids.append(collection.ID(
+                        man=bytes.fromhex(man_n.findtext("value")),
+                        f_id=cls.node2parval(fid_n),
+                        f_ver=cls.node2parval(fv_n),
+                    ))
+        objects = list()
+        for obj in r_n.findall('object'):
+            ln: str = obj.attrib.get("ln", 'is absence')
+            attrs = list()
+            for attr in obj.findall("attr"):
+                index: int = int(attr.attrib.get("index"))
+                match attr.attrib.get("type", "simple"):
+                    case "simple":
+                        attrs.append((index, False, attr.text))
+                    case "array" | "struct":
+                        stack = [(list(), iter(attr))]
+                        v1 = stack[0][0]
+                        while stack:
+                            v, v2 = stack[-1]
+                            el = next(v2, None)
+                            if el is None:
+                                stack.pop()
+                            elif el.tag == "simple":
+                                v.append(el.text)
+                            else:
+                                v.append(list())
+                                stack.append((v[-1], iter(el)))
+                        attrs.append((index, True, v1))
+                    case _:
+                        attrs.append((index, False, None))
+            objects.append((ln, cst.LogicalName.from_obis(ln).contents, tuple(attrs)))
+        return ParsedTemplate(
+            ids=tuple(ids),
+            objects=tuple(objects),
+            verified=bool(int(r_n.findtext("verified", default="0"))))
+
+    @classmethod
+    def parsed2template(cls, parsed: ParsedTemplate,
+                        name: str,
+                        forced_col: Collection = None,
+                        get_collection: Callable[[ID], tuple[Collection, list[Exception]]] = None) -> Template:
+        """return new Template with fresh collections. Collections got by <get_collection>(own by default)"""
+        get_collection = cls.get_collection if get_collection is None else get_collection
+        used: collection.UsedAttributes = dict()
+        cols = list()
+        for col_id in parsed.ids:
+            try:
+                cols.append(get_collection(col_id)[0])
+            except AdapterException as e:
+                logger.error(F"collection with: {col_id} not load to Template: {e}")
+                continue
         if len(cols) == 0:
             if forced_col:
                 cols.append(forced_col)
                 logger.warning(F"add forced collection: {forced_col}")
             else:
                 raise AdapterException("no one collection find")
-        for obj in r_n.findall('object'):
-            ln: str = obj.attrib.get("ln", 'is absence')
-            obis = cst.LogicalName.from_obis(ln)
+        for ln, contents, attrs in parsed.objects:
             objs: list[ic.COSEMInterfaceClasses] = list()
             for col in cols:
-                if not col.is_in_collection(obis):
+                if (new_object := col.get(contents)) is None:
                     logger.warning(F"got object with {ln=} not find in collection: {col}")
                 else:
-                    objs.append(col.get_object(obis))
-            used[obis] = set()
-            for attr in obj.findall("attr"):
-                index: int = int(attr.attrib.get("index"))
+                    objs.append(new_object)
+            used[obis := cst.LogicalName(bytearray(contents))] = set()
+            for index, is_complex, value in attrs:
                 used[obis].add(index)
-                try:
-                    match attr.attrib.get("type", "simple"):
-                        case "simple":
-                            for new_object in objs:
-                                new_object.set_attr(index, attr.text)
-                        case "array" | "struct":
-                            stack = [(list(), iter(attr))]
-                            while stack:
-                                v1, v2 = stack[-1]
-                                v = next(v2, None)
-                                if v is None:
-                                    stack.pop()
-                                elif v.tag == "simple":
-                                    v1.append(v.text)
-                                else:
-                                    v1.append(list())
-                                    stack.append((v1[-1], iter(v)))
-                            for new_object in objs:
-                                new_object.parse_attr(index, v1)
-                except exc.ITEApplication as e:
-                    logger.error(F"Can't fill {new_object} attr: {index}. {e}")
-                except IndexError:
-                    logger.error(F'Object "{new_object}" not has attr: {index}')
-                except TypeError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not write, encoding wrong : {e}')
-                except ValueError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
-                except AttributeError as e:
-                    logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
+                if value is None:
+                    continue
+                for new_object in objs:
+                    try:
+                        if is_complex:
+                            new_object.parse_attr(index, value)
+                        else:
+                            new_object.set_attr(index, value)
+                    except exc.ITEApplication as e:
+                        logger.error(F"Can't fill {new_object} attr: {index}. {e}")
+                    except IndexError:
+                        logger.error(F'Object "{new_object}" not has attr: {index}')
+                    except TypeError as e:
+                        logger.error(F'Object {new_object} attr:{index} do not write, encoding wrong : {e}')
+                    except ValueError as e:
+                        logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
+                    except AttributeError as e:
+                        logger.error(F'Object {new_object} attr:{index} do not fill: {e}')
         return Template(
             name=name,
             collections=cols,
             used=used,
-            verified=bool(int(r_n.findtext("verified", default="0"))))
+            verified=parsed.verified)
 
     @classmethod
     def set_parameters(cls, r_n: ET.Element, col: Collection):
@@ -1044,22 +1520,28 @@ class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
                 col.set_country(collection.CountrySpecificIdentifiers(int(country)))
             if (country_ver_el := r_n.find("country_ver")) is not None:
                 col.set_country_ver(cls.node2parval(country_ver_el))
-            if all((
-                manufacturer := r_n.findtext("manufacturer"),
-                firm_id_el := r_n.find("firm_id"),
-                firm_ver_el := r_n.find("firm_ver")
-            )):
-                col.set_id(collection.ID(
-                    man=bytes.fromhex(manufacturer),
-                    f_id=cls.node2parval(firm_id_el),
-                    f_ver=cls.node2parval(firm_ver_el)
-                ))
+            if (col_id := cls.header2id(r_n)) is not None:
+                col.set_id(col_id)
         except ValueError as e:
             raise AdapterException(F"can't set all parameters to collection: {e}")
         col.spec_map = col.get_spec()
 
     @classmethod
-    @lru_cache(maxsize=100)
+    def header2id(cls, r_n: ET.Element) -> ID | None:
+        manufacturer = r_n.findtext("manufacturer")
+        firm_id_el = r_n.find("firm_id")
+        firm_ver_el = r_n.find("firm_ver")
+        if manufacturer and firm_id_el is not None and firm_ver_el is not None:
+            return collection.ID(
+                man=bytes.fromhex(manufacturer),
+                f_id=cls.node2parval(firm_id_el),
+                f_ver=cls.node2parval(firm_ver_el)
+            )
+        return None
+
+    @classmethod
+    @path_cache.cached
+    @miss_cache.cached(AdapterException)
     def get_col_path(cls,  col_id: ID) -> Path:
         """ret: file, is_searched"""
         if (man := cls.get_manufactures_container().get(col_id.man)) is None:
@@ -1071,43 +1553,83 @@ class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
             return path
         elif SemVer.is_valid(ver_ := cdt.get_instance_and_pdu_from_value(col_id.f_ver.value)[0].contents):
             logger.warning(F"try find compatible version...")
-            semver = SemVer.parse(ver_)
-            for v in firm_id.keys():
-                try:
-                    data, _ = cdt.get_instance_and_pdu_from_value(ParameterValue.parse(v).value)
-                    d = data.contents
-                except exc.ITEApplication as e:  # wrong parsing
-                    continue
-                if (
-                    SemVer.is_valid(d.decode("utf-8", "ignore")) and
-                    SemVer.parse(d, True) == semver
-                ):
-                    return firm_id[v]
-            else:
+            if (
+                (index := cls.get_version_index().get((col_id.man, bytes(col_id.f_id)))) is None
+                or (path := index.exact(SemVer.parse(ver_))) is None
+            ):
                 raise AdapterException(F"was no find compatible version {col_id}")
+            return path
         else:
             raise AdapterException(F"no support version {col_id.f_ver} with manufacturer: {col_id.man}, identifier: {col_id.f_id}")
             # raise Xml3.get_col_path(m, f_id, ver)
 
-    @staticmethod
-    @lru_cache(1)
-    def get_manufactures_container() -> dict[Manufacturer, dict[FirmwareId, dict[FirmwareVer, Path]]]:
-        logger.info(F"use manufacturer configuration system {Xml50.__name__}")
+    @classmethod
+    @lru_cache(None)
+    def get_manufactures_container(cls) -> dict[Manufacturer, dict[FirmwareId, dict[FirmwareVer, Path]]]:
+        logger.info(F"use manufacturer configuration system {cls.__name__} in {cls.store}")
+        if (paths := manifest.load(cls.store.types, cls.__name__)) is None:
+            paths = cls.scan_types()
+            manifest.update(cls.store.types, cls.__name__, paths)
         ret = dict()
-        for m_path in types_path.iterdir():
+        for ver_path in paths:
+            m, f_id, f_ver = cls.path2key(ver_path)
+            ret.setdefault(m, dict()).setdefault(f_id, dict())[f_ver] = ver_path
+        return ret
+
+    @staticmethod
+    def path2key(path: Path) -> tuple[Manufacturer, FirmwareId, FirmwareVer]:
+        """container keys of type file: manufacturer, firm_id, firm_ver. ValueError if wrong name"""
+        return bytes.fromhex(path.parent.parent.name), bytes.fromhex(path.parent.name), bytes.fromhex(path.stem)
+
+    @staticmethod
+    def ver2semver(f_ver: FirmwareVer) -> SemVer | None:
+        """decode firmware version of type key, None if it is not SemVer"""
+        try:
+            return catalog.ver2semver(ParameterValue.parse(f_ver))
+        except (exc.ITEApplication, IndexError):  # wrong parsing
+            return None
+
+    @staticmethod
+    def is_affected(col_id: ID) -> Callable[[tuple], bool]:
+        """predicate by cache arguments: ID is <col_id> or resolved to it by compatible version lookup"""
+        return Xml50.key2affected(col_id.man, bytes(col_id.f_id), bytes(col_id.f_ver))
+
+    @staticmethod
+    def key2affected(man: Manufacturer, f_id: FirmwareId, f_ver: FirmwareVer) -> Callable[[tuple], bool]:
+        """as <is_affected> by container keys"""
+        semver = Xml50.ver2semver(f_ver)
+
+        def predicate(args: tuple) -> bool:
+            for a in args:
+                if isinstance(a, ID) and a.man == man and bytes(a.f_id) == f_id:
+                    return bytes(a.f_ver) == f_ver or (semver is not None and Xml50.ver2semver(bytes(a.f_ver)) == semver)
+            return False
+        return predicate
+
+    @classmethod
+    @lru_cache(None)
+    def get_version_index(cls) -> dict[tuple[Manufacturer, FirmwareId], VersionIndex]:
+        """sorted decoded versions by manufacturer and firm_id"""
+        ret: dict[tuple[Manufacturer, FirmwareId], VersionIndex] = dict()
+        for m_k, m_v in cls.get_manufactures_container().items():
+            for f_k, f_v in m_v.items():
+                ret[(m_k, f_k)] = VersionIndex((semver, path) for v, path in f_v.items() if (semver := Xml50.ver2semver(v)) is not None)
+        return ret
+
+    @classmethod
+    def scan_types(cls) -> list[Path]:
+        """walk Types directory, return type files"""
+        ret: list[Path] = list()
+        for m_path in cls.store.types.iterdir():
             if m_path.is_dir():
-                if man6.fullmatch(m_path.name) is not None:
-                    man = bytes.fromhex(m_path.name)
-                else:
+                if man6.fullmatch(m_path.name) is None:
                     logger.warning(F"skip <{m_path}>: not recognized like manufacturer")
                     continue
-                ret[man] = dict()
                 for fid in m_path.iterdir():
                     if fid.is_dir() and hex_.fullmatch(fid.name):
-                        ret[man][firm_id := bytes.fromhex(fid.name)] = dict()
                         for ver_path in fid.iterdir():
                             if ver_path.is_file() and ver_path.suffix == ".xml" and hex_.fullmatch(ver_path.stem):
-                                ret[man][firm_id][bytes.fromhex(ver_path.stem)] = ver_path
+                                ret.append(ver_path)
         return ret
 
     @classmethod
@@ -1134,6 +1656,28 @@ class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
 
     @classmethod
     def set_collection(cls, col: Collection):
+        with metrics.timer("encode_type"):
+            root_node = cls.collection2root(col)
+        # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
+        xml_string = cls._encode(root_node, "utf-8")
+        if not (man_path := cls.store.types / col.id.man.hex()).exists():
+            man_path.mkdir()
+        if not (type_path := man_path / bytes(col.id.f_id).hex()).exists():
+            type_path.mkdir()
+        ver_path = type_path / F"{bytes(col.id.f_ver).hex()}.xml"
+        cls._write(ver_path, xml_string)
+        manifest.add(cls.store.types, Xml50.__name__, ver_path)
+        cls.get_manufactures_container().setdefault(col.id.man, dict()).setdefault(bytes(col.id.f_id), dict())[bytes(col.id.f_ver)] = ver_path
+        if (semver := cls.ver2semver(bytes(col.id.f_ver))) is not None:
+            cls.get_version_index().setdefault((col.id.man, bytes(col.id.f_id)), VersionIndex()).add(semver, ver_path)
+        snapshot.get_path(ver_path).unlink(missing_ok=True)  # written again by first load
+        invalidate_misses(col.id)
+        catalog.changed()
+        cls._invalidate_types(cls.is_affected(col.id))
+
+    @classmethod
+    def collection2root(cls, col: Collection) -> ET.Element:
+        """return type root node with STATIC attributes by all AssociationLN"""
         if not isinstance(col.id, collection.ID):
             raise AdapterException(F"{col} hasn't ID")
         root_node = cls._get_root_node(col, Xml50.TYPE_ROOT_TAG)
@@ -1205,23 +1749,13 @@ class Xml50(__GetCollectionIDMixin1, __SetTemplateMixin1, Base):
                     logger.info(F"for {obj} attr: {i} value not need. skipped")
             if len(object_node) == 0:
                 root_node.remove(object_node)
-        # TODO: '<!DOCTYPE ITE_util_tree SYSTEM "setting.dtd"> or xsd
-        xml_string = ET.tostring(root_node, encoding="utf-8", method='xml')
-        if not (man_path := types_path / col.id.man.hex()).exists():
-            man_path.mkdir()
-        if not (type_path := man_path / bytes(col.id.f_id).hex()).exists():
-            type_path.mkdir()
-        ver_path = type_path / F"{bytes(col.id.f_ver).hex()}.xml"
-        with open(ver_path, "wb") as f:
-            f.write(xml_string)
-            cls.get_manufactures_container.cache_clear()
-            cls._get_collection.cache_clear()
+        return root_node
 
     @classmethod
     def get_templates(cls) -> list[str]:
         """return stem"""
         ret = list()
-        for path in TEMPLATE_PATH.iterdir():
+        for path in cls.store.templates.iterdir():
             if path.is_file() and path.suffix == ".xml":
                 ret.append(path.stem)
         return ret
@@ -1231,3 +1765,76 @@ xml3 = Xml3()
 xml4 = Xml40()
 xml41 = Xml41()
 xml50 = Xml50()
+
+
+metrics.register_collector(
+    "cache.get_manufactures_container",
+    lambda: {adp.__name__: adp.get_manufactures_container.cache_info()._asdict() for adp in (Xml3, Xml50)})
+
+
+def keep_record(adp: type[Xml41] | type[Xml50], store: config.StoreConfig | None, record: DataRecord) -> list[Exception]:
+    """<adp._keep_record> on <store>: picklable by not bound adapter class for use in other process"""
+    return adp.bind(store)._keep_record(record)
+
+
+def keep_collection(adp: type[Xml41] | type[Xml50], store: config.StoreConfig | None, col: Collection, ass_id: int) -> list[Exception]:
+    """<adp.set_data> on <store>: encoding collect and writing of <col> in one executor call"""
+    return adp.bind(store).set_data(col, ass_id)
+
+
+def rebuild_manifest(store: config.StoreConfig = None):
+    """rewrite manifest of <store>(default if None) by full walk of Types directory. Containers of all stores loaded again,
+    parsed types, encodings, save plans and templates of <store> are dropped"""
+    catalog.changed()
+    for adp in (Xml3.bind(store), Xml50.bind(store)):
+        manifest.update(adp.store.types, adp.__name__, adp.scan_types())
+        adp._invalidate_types(lambda args: True)
+        template_cache.invalidate_if(lambda k: k[1].store is adp.store)
+    for adp in (Xml3, Xml50):
+        adp.get_manufactures_container.cache_clear()
+        adp.get_version_index.cache_clear()
+
+
+def apply_type_changes(adp: type[Xml3] | type[Xml50], added: Iterable[Path] = (), removed: Iterable[Path] = (), changed: Iterable[Path] = ()) -> int:
+    """incremental update of <adp> container, version index and manifest by type files changed in store by other process.
+    Invalidate cache entries of affected types only. Return count of applied files"""
+    container = adp.get_manufactures_container()
+    index = adp.get_version_index()
+    predicates: list[Callable[[tuple], bool]] = list()
+    for paths, is_new in ((added, True), (removed, False)):
+        for path in paths:
+            try:
+                m, f_id, f_ver = adp.path2key(path)
+            except ValueError as e:
+                logger.error(F"skip type, wrong file name {path}: {e}")
+                continue
+            semver = adp.ver2semver(f_ver)
+            if is_new:
+                container.setdefault(m, dict()).setdefault(f_id, dict())[f_ver] = path
+                if semver is not None:
+                    index.setdefault((m, f_id), VersionIndex()).add(semver, path)
+                logger.info(F"{adp.__name__}: add type {path}")
+            elif container.get(m, dict()).get(f_id, dict()).get(f_ver) == path:
+                del container[m][f_id][f_ver]
+                if semver is not None and (f_index := index.get((m, f_id))) is not None:
+                    f_index.remove(semver)
+                logger.info(F"{adp.__name__}: remove type {path}")
+            else:
+                continue
+            predicates.append(adp.key2affected(m, f_id, f_ver))
+    if predicates:
+        manifest.update(adp.store.types, adp.__name__, [path for m_v in container.values() for f_v in m_v.values() for path in f_v.values()])
+        catalog.changed()
+    for path in changed:
+        try:
+            predicates.append(adp.key2affected(*adp.path2key(path)))
+        except ValueError:
+            continue
+    if predicates:
+        adp._invalidate_types(lambda args: any(p(args) for p in predicates))
+    return len(predicates)
+
+
+def verify_manifest(store: config.StoreConfig = None) -> dict[str, tuple[list[Path], list[Path]]]:
+    """return for each layout (not in manifest, absent in store) type files of <store>(default if None)"""
+    return {adp.__name__: manifest.diff(adp.store.types, adp.__name__, adp.scan_types()) for adp in (Xml3.bind(store), Xml50.bind(store))}
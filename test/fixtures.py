@@ -0,0 +1,62 @@
+"""collections and store shared by tests. Each call return new object"""
+import os
+import atexit
+import shutil
+import tempfile
+import unittest
+from DLMS_SPODES.cosem_interface_classes import collection, overview
+from DLMS_SPODES.types import cdt, cst
+from src.DLMSAdapter.config import StoreConfig
+from src.DLMSAdapter.xml_ import Xml40, ET
+
+
+if "DLMSADAPTER_ROOT" not in os.environ:
+    os.environ["DLMSADAPTER_ROOT"] = DEFAULT_ROOT = tempfile.mkdtemp(prefix="dlms_test_default_")
+    """root of default store for tests without own store, instead of current directory"""
+    atexit.register(shutil.rmtree, DEFAULT_ROOT, True)
+
+
+ASSOCIATION_XML = (
+    '<DLMSServerType>'
+    '<obj ln="0.0.40.0.3.255"><ver>1</ver><attr i="2">'
+    '0102020412000f110109060000280003ff0202010302030f0116010002030f0216010002030f031601000100'
+    '0204120008110009060000010000ff0202010302030f0116010002030f0216030002030f031601000100</attr></obj>'
+    '</DLMSServerType>')
+"""AssociationLN with LDN and Clock in <object_list>"""
+
+
+def make_id(man: bytes = b'XXX', f_id: bytes = b'M2M-1', ver: str = "1.4.3", legacy: bool = False) -> collection.ID:
+    """<legacy> with parameters of Xml3 - Xml41 header"""
+    return collection.ID(
+        man=man,
+        f_id=collection.ParameterValue(bytes.fromhex("0000600101ff02") if legacy else b'1234567', cdt.OctetString(bytearray(f_id)).encoding),
+        f_ver=collection.ParameterValue(bytes.fromhex("0000000201ff02") if legacy else b'1234560', cdt.OctetString(bytearray(ver.encode("ascii"))).encoding))
+
+
+def clock_type(col_id: collection.ID = None) -> collection.Collection:
+    """Clock with time zone 120 and AssociationLN with empty <object_list>"""
+    col = collection.Collection(id_=make_id() if col_id is None else col_id)
+    col.add(
+        overview.ClassID.CLOCK,
+        overview.Version.V0,
+        cst.LogicalName.from_obis("0.0.1.0.0.255")).set_attr(3, 120)
+    col.add(
+        overview.ClassID.ASSOCIATION_LN,
+        overview.Version.V1,
+        cst.LogicalName.from_obis("0.0.40.0.3.255")).set_attr(2, [])
+    return col
+
+
+def association_type(col_id: collection.ID = None, country: overview.CountrySpecificIdentifiers = None) -> collection.Collection:
+    """by <ASSOCIATION_XML>, Clock with time zone 120. Data keeping by association 3. <country> need for Xml3 - Xml41 header"""
+    col = collection.Collection(id_=make_id(ver="1.5.5") if col_id is None else col_id, country=country)
+    Xml40._fill_collection40(ET.fromstring(ASSOCIATION_XML), col)
+    col.get_object("0.0.1.0.0.255").set_attr(3, 120)
+    return col
+
+
+def temp_store(case: unittest.TestCase) -> StoreConfig:
+    """store in temporary directory, removed after <case>"""
+    tmp = tempfile.TemporaryDirectory(prefix="dlms_test_")
+    case.addCleanup(tmp.cleanup)
+    return StoreConfig(root=tmp.name)
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import unittest
+from DLMS_SPODES.cosem_interface_classes import collection
+from DLMS_SPODES.types import cst
+from src.DLMSAdapter.main import AdapterException
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter.aio import AsyncAdapter, AsyncPool
+from src.DLMSAdapter.pool import AdapterPool, DEFAULTS
+from fixtures import association_type, temp_store
+
+
+class Slow:
+    """adapter stub for check concurrency"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def get_templates(self) -> list[str]:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return list()
+
+
+class TestType(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.xml50 = Xml50(temp_store(self))
+        self.col = association_type()
+
+    async def test_collection(self):
+        async with AsyncAdapter(self.xml50) as adp:
+            await adp.set_collection(self.col)
+            col, errors = await adp.get_collection(self.col.id)
+            self.assertEqual(col.id, self.col.id)
+            self.assertEqual(int(col.get_object("0.0.1.0.0.255").get_attr(3)), 120)
+
+    async def test_data_many(self):
+        async with AsyncAdapter(self.xml50) as adp:
+            await adp.set_collection(self.col)
+            cols = list()
+            for n in range(3):
+                col, _ = await adp.get_collection(self.col.id)
+                col.LDN.set_attr(2, bytearray(F"XXX0000000000020{n}".encode("ascii")))
+                col.get_object("0.0.1.0.0.255").set_attr(3, 10 * n)
+                cols.append(col)
+            self.assertEqual(await adp.set_data_many(cols), [[], [], []])
+            new_cols = list()
+            for col in cols:
+                new_col, _ = await adp.get_collection(self.col.id)
+                new_col.LDN.set_attr(2, bytearray(col.LDN.value.contents))
+                new_cols.append(new_col)
+            self.assertEqual(await adp.get_data_many(new_cols), [[], [], []])
+            self.assertEqual([int(col.get_object("0.0.1.0.0.255").get_attr(3)) for col in new_cols], [0, 10, 20])
+
+    async def test_backpressure(self):
+        slow = Slow()
+        async with AsyncAdapter(slow, max_workers=8, max_pending=2) as adp:
+            await asyncio.gather(*(adp.get_templates() for _ in range(10)))
+        self.assertLessEqual(slow.max_active, 2)
+
+    async def test_pool(self):
+        clock_ln = cst.LogicalName.from_obis("0.0.1.0.0.255")
+        async with AsyncPool(pool=AdapterPool({n: [self.xml50] for n in DEFAULTS})) as adp:
+            await adp.set_collection(self.col)
+            col, _ = await adp.get_collection(self.col.id)
+            self.assertEqual(col.id, self.col.id)
+            self.assertEqual(await adp.get_collectionIDs(), [self.col.id])
+            self.assertEqual(await adp.get_ID_tree(), {self.col.id.man: {self.col.id.f_id: {self.col.id}}})
+            self.assertIn(self.col.id, await adp.get_catalog())
+            col.LDN.set_attr(2, bytearray(b"XXX00000000000701"))
+            col.get_object(clock_ln).set_attr(3, 60)
+            self.assertEqual(await adp.set_data(col), [])
+            new, _ = await adp.get_collection(self.col.id)
+            new.LDN.set_attr(2, bytearray(b"XXX00000000000701"))
+            await adp.get_data(new)
+            self.assertEqual(int(new.get_object(clock_ln).get_attr(3)), 60)
+            self.assertEqual(await adp.set_data_many([col]), [[]])
+            self.assertEqual(await adp.get_data_many([new]), [[]])
+            await adp.set_template(collection.Template(name="pool", collections=[col], used={clock_ln: {3}}))
+            self.assertEqual(await adp.get_templates(), ["pool"])
+            template = await adp.get_template("pool", col)
+            self.assertEqual(int(template.collections[0].get_object(clock_ln).get_attr(3)), 60)
+            with self.assertRaises((AdapterException, FileNotFoundError)):
+                await adp.get_template("absent")
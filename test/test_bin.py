@@ -0,0 +1,55 @@
+import unittest
+from src.DLMSAdapter import bin_
+from src.DLMSAdapter.bin_ import Bin50, Header
+from src.DLMSAdapter.xml_ import Xml50
+from fixtures import association_type, temp_store
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        store = temp_store(self)
+        self.xml50 = Xml50(store)
+        self.bin50 = Bin50(store)
+        self.col = association_type()
+
+    def test_dumps_loads(self):
+        header = Header(col_id=self.col.id, dlms_ver=6)
+        objects = [(bytes((0, 0, 1, 0, 0, 255)), [(3, b"\x10\x00\x3c"), (9, b"\x11\x01")])]
+        data = bin_.dumps(header, objects)
+        new_header, records = bin_.loads(data)
+        self.assertEqual(new_header, header)
+        records = list(records)
+        self.assertIsInstance(records[0][2], memoryview)
+        self.assertEqual([(bytes(ln), i, bytes(enc)) for ln, i, enc in records], [(objects[0][0], i, enc) for i, enc in objects[0][1]])
+        self.assertRaises(bin_.AdapterException, lambda: list(bin_.loads(data[:-1])[1]))
+
+    def test_set_get_data(self):
+        self.bin50.set_collection(self.col)
+        col = self.bin50.get_collection_cow(self.col.id)
+        col.LDN.set_attr(2, bytearray(b"XXX00000000000501"))
+        col.get_object("0.0.1.0.0.255").set_attr(3, 60)
+        self.assertEqual(self.bin50.set_data(col), [])
+        self.assertEqual(self.bin50._get_keep_path(col).suffix, ".bin")
+        new = self.bin50.get_collection_cow(self.col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000501"))
+        self.bin50.get_data(new)
+        self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 60)
+
+    def test_convert(self):
+        self.xml50.set_collection(self.col)
+        col = self.xml50.get_collection_cow(self.col.id)
+        col.LDN.set_attr(2, bytearray(b"XXX00000000000502"))
+        col.get_object("0.0.1.0.0.255").set_attr(3, 30)
+        self.xml50.set_data(col)
+        bin_.xml2bin(self.xml50._get_keep_path(col), self.bin50._get_keep_path(col))
+        new = self.bin50.get_collection_cow(self.col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000502"))
+        self.bin50.get_data(new)
+        self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 30)
+        xml_path = self.xml50._get_keep_path(col)
+        xml_path.unlink()
+        bin_.bin2xml(self.bin50._get_keep_path(col), xml_path)
+        new = self.xml50.get_collection_cow(self.col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000502"))
+        self.xml50.get_data(new)
+        self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 30)
@@ -0,0 +1,218 @@
+import time
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from DLMS_SPODES.cosem_interface_classes import collection, overview
+from DLMS_SPODES.types import cst
+from src.DLMSAdapter.cache import TypeCache, NegativeCache, sizeof_collection, type_cache, miss_cache
+from src.DLMSAdapter.main import AdapterException
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter import metrics
+from fixtures import make_id, clock_type, temp_store
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        self.adp = Xml50(temp_store(self))
+        self.col = clock_type()
+
+    def test_evict_by_bytes(self):
+        c = TypeCache(max_bytes=10, sizeof=len)
+        c.put(1, b"12345")
+        c.put(2, b"1234")
+        self.assertEqual(c.get(1), b"12345")  # 1 is recent
+        c.put(3, b"123")
+        self.assertNotIn(2, c)
+        self.assertIn(1, c)
+        self.assertEqual(c.stats.resident_bytes, 8)
+        self.assertEqual(c.stats.evictions, 1)
+        c.put(4, b"12345678901")
+        self.assertNotIn(4, c, "bigger than budget")
+        c.resize(max_bytes=3)
+        self.assertEqual(len(c), 1)
+
+    def test_cached(self):
+        c = TypeCache(max_bytes=1000, max_entries=2)
+        calls = list()
+
+        @c.cached
+        def f(x):
+            calls.append(x)
+            return str(x)
+
+        for x in (1, 1, 2, 1, 3, 2):
+            f(x)
+        self.assertEqual(calls, [1, 2, 3, 2])
+        self.assertEqual((c.stats.hits, c.stats.misses, c.stats.evictions), (2, 4, 2))
+        f.cache_clear()
+        self.assertEqual(len(c), 0)
+
+    def test_type_cache(self):
+        self.adp.set_collection(self.col)
+        hits = type_cache.stats.hits
+        col = self.adp._get_collection(self.col.id)
+        self.assertIs(self.adp._get_collection(self.col.id), col)
+        self.assertEqual(type_cache.stats.hits, hits + 1)
+        self.assertGreaterEqual(type_cache.stats.resident_bytes, sizeof_collection(col))
+
+    def test_negative_ttl(self):
+        c = NegativeCache(ttl=0.05)
+        calls = list()
+
+        @c.cached(KeyError)
+        def f(x):
+            calls.append(x)
+            raise KeyError(x)
+
+        for _ in range(3):
+            self.assertRaises(KeyError, f, 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual((c.stats.hits, c.stats.misses), (2, 1))
+        time.sleep(0.06)
+        self.assertRaises(KeyError, f, 1)
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(c.stats.expired, 1)
+        f.miss_clear()
+        self.assertEqual(len(c), 0)
+
+    def test_negative_get_col_path(self):
+        col_id = make_id(b'NEG', ver="1.0.0")
+        self.assertRaises(AdapterException, self.adp.get_col_path, col_id)
+        hits = miss_cache.stats.hits
+        self.assertRaises(AdapterException, self.adp.get_col_path, col_id)
+        self.assertEqual(miss_cache.stats.hits, hits + 1)
+        col = collection.Collection(id_=col_id)
+        col.add(
+            overview.ClassID.ASSOCIATION_LN,
+            overview.Version.V1,
+            cst.LogicalName.from_obis("0.0.40.0.3.255")).set_attr(2, [])
+        self.adp.set_collection(col)
+        self.assertEqual(self.adp.get_col_path(col_id).suffix, ".xml", "invalidate by set_collection")
+
+    def test_single_flight(self):
+        c = TypeCache(max_bytes=10_000)
+        calls: dict[int, int] = dict()
+        lock = threading.Lock()
+        start = threading.Barrier(32)
+
+        @c.cached
+        def load(x):
+            with lock:
+                calls[x] = calls.get(x, 0) + 1
+            time.sleep(0.05)
+            return x * 10
+
+        def worker(n):
+            start.wait()
+            return [load((n + k) % 4) for k in range(4)]
+
+        with ThreadPoolExecutor(32) as ex:
+            results = list(ex.map(worker, range(32)))
+        self.assertEqual(calls, {0: 1, 1: 1, 2: 1, 3: 1}, "one load by key")
+        for n, res in enumerate(results):
+            self.assertEqual(res, [((n + k) % 4) * 10 for k in range(4)])
+        self.assertGreater(c.stats.waits, 0)
+
+    def test_invalidate_in_flight(self):
+        c = TypeCache(max_bytes=10_000)
+        version = [0]
+        started = threading.Event()
+
+        @c.cached
+        def load(x):
+            v = version[0]
+            started.set()
+            time.sleep(0.05)
+            return v
+
+        with ThreadPoolExecutor(1) as ex:
+            f = ex.submit(load, 1)
+            started.wait()
+            version[0] = 1
+            load.cache_clear()
+            self.assertEqual(f.result(), 0, "started before invalidation")
+        self.assertEqual(load(1), 1, "stale value not kept")
+
+    def test_unrelated_invalidate_in_flight(self):
+        c = TypeCache(max_bytes=10_000)
+        calls = [0]
+        started = threading.Event()
+        release = threading.Event()
+
+        @c.cached
+        def load(n: int) -> int:
+            calls[0] += 1
+            started.set()
+            release.wait(5)
+            return n
+
+        with ThreadPoolExecutor(1) as ex:
+            f = ex.submit(load, 1)
+            started.wait(5)
+            c.invalidate_if(lambda k: k[1:] == (2,))
+            c.invalidate((load.__wrapped__, 3))
+            release.set()
+            self.assertEqual(f.result(), 1)
+        self.assertEqual((load(1), calls[0]), (1, 1), "kept by invalidation of other keys")
+
+    def test_stress_get_collection(self):
+        self.adp.set_collection(self.col)
+        reg = metrics.Registry()
+        prev = metrics.install(reg)
+        try:
+            for _ in range(5):
+                self.adp._load_collection.cache_clear()
+                barrier = threading.Barrier(16)
+
+                def worker(_):
+                    barrier.wait()
+                    return self.adp._get_collection(self.col.id)
+
+                with ThreadPoolExecutor(16) as ex:
+                    cols = list(ex.map(worker, range(16)))
+                self.assertTrue(all(col is cols[0] for col in cols))
+        finally:
+            metrics.install(prev)
+        self.assertEqual(reg.as_dict()["histograms"]["snapshot"]["count"], 5, "one load by clear")
+
+    def test_stress_invalidate(self):
+        c = TypeCache(max_bytes=10_000)
+        stop = threading.Event()
+        errors = list()
+
+        @c.cached
+        def load(x):
+            time.sleep(0.001)
+            return -x
+
+        def reader(n):
+            try:
+                while not stop.is_set():
+                    for x in range(8):
+                        if load((n + x) % 8) != -((n + x) % 8):
+                            errors.append(x)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for _ in range(50):
+            load.cache_clear()
+            c.invalidate((load.__wrapped__, 3))
+            time.sleep(0.002)
+        stop.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_targeted_invalidate(self):
+        col_other = collection.Collection(id_=make_id(f_id=b'TARGET'))
+        col_other.add(overview.ClassID.CLOCK, overview.Version.V0, cst.LogicalName.from_obis("0.0.1.0.0.255"))
+        self.adp.set_collection(self.col)
+        self.adp.set_collection(col_other)
+        snp = self.adp._get_collection(self.col.id)
+        other = self.adp._get_collection(col_other.id)
+        self.adp.set_collection(col_other)
+        self.assertIs(self.adp._get_collection(self.col.id), snp, "other type stay warm")
+        self.assertIsNot(self.adp._get_collection(col_other.id), other, "written type reloaded")
@@ -0,0 +1,47 @@
+import unittest
+from semver import Version as SemVer
+from src.DLMSAdapter.catalog import Catalog
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter import metrics
+from fixtures import make_id, clock_type, temp_store
+
+
+def get_id(f_id: bytes, ver: str):
+    return make_id(b'CAT', f_id, ver)
+
+
+class TestType(unittest.TestCase):
+    def test_queries(self):
+        ids = [get_id(b'A', v) for v in ("1.2.0", "1.0.0", "2.0.1", "1.4.7", "custom")] + [get_id(b'B', "0.1.0")]
+        cat = Catalog.from_ids(ids)
+        a = ids[0].f_id
+        self.assertEqual(len(cat), 6)
+        self.assertEqual(cat.manufacturers, (b'CAT',))
+        self.assertEqual(len(cat.firm_ids(b'CAT')), 2)
+        self.assertEqual(cat.by_firm_id(b'CAT', a), (ids[1], ids[0], ids[3], ids[2], ids[4]), "sorted, not SemVer at end")
+        self.assertEqual(cat.by_version(b'CAT', a, SemVer(1, 1, 0), SemVer(2, 0, 0)), (ids[0], ids[3]))
+        self.assertEqual(cat.latest_compatible(get_id(b'A', "1.3.0")), ids[0])
+        self.assertIsNone(cat.latest_compatible(get_id(b'A', "3.0.0")))
+        self.assertIn(ids[5], cat)
+        self.assertNotIn(get_id(b'C', "1.0.0"), cat)
+        self.assertEqual(cat.by_manufacturer(b'XXX'), ())
+        self.assertEqual(cat.as_tree()[b'CAT'][a], set(ids[:5]))
+
+    def test_cached(self):
+        adp = Xml50(temp_store(self))
+        adp.set_collection(col_snp := clock_type())
+        cat = adp.get_catalog()
+        self.assertIn(col_snp.id, cat)
+        self.assertIs(adp.get_catalog(), cat, "cached")
+        self.assertEqual(adp.get_collectionIDs(), list(cat))
+        col = clock_type(make_id(ver="1.5.5"))
+        reg = metrics.Registry()
+        prev = metrics.install(reg)
+        try:
+            adp.set_collection(col)
+            new = adp.get_catalog()
+        finally:
+            metrics.install(prev)
+        self.assertIsNot(new, cat, "rebuild by change")
+        self.assertIn(col.id, new)
+        self.assertEqual(reg.as_dict()["counters"]["cache.catalog.miss"], 1)
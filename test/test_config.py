@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from DLMS_SPODES.cosem_interface_classes import overview
+from unittest import mock
+from src.DLMSAdapter import config
+from src.DLMSAdapter.config import StoreConfig
+from src.DLMSAdapter.sqlite_ import Sqlite
+from src.DLMSAdapter.main import AdapterException
+from src.DLMSAdapter.xml_ import Xml50, Xml41, Xml3
+from fixtures import clock_type, association_type, make_id, temp_store
+from bench.bench_import import measure
+
+
+class TestType(unittest.TestCase):
+    def test_lazy(self):
+        work = Path(tempfile.mkdtemp())
+        store = StoreConfig(root=work, templates="tmpl")
+        self.assertEqual(list(work.iterdir()), [], "nothing before use")
+        self.assertEqual(store.templates, work / "tmpl")
+        self.assertEqual(store.types, work / "Types")
+        self.assertEqual(sorted(p.name for p in work.iterdir()), ["Types", "tmpl"])
+        self.assertEqual(Sqlite(store=store).path, work / "DLMSAdapter.sqlite3")
+
+    def test_env(self):
+        with mock.patch.dict(os.environ, {"DLMSADAPTER_ROOT": "/tmp/dlms_env_root", "DLMSADAPTER_DATA": "/tmp/dlms_env_data"}):
+            store = StoreConfig(types="t")
+            self.assertEqual(store.root, Path("/tmp/dlms_env_root"))
+            self.assertEqual(store.data, Path("/tmp/dlms_env_data"))
+        self.assertEqual(store.types, Path("/tmp/dlms_env_root/t"), "argument first")
+
+    def test_adapter_store(self):
+        store_a, store_b = temp_store(self), temp_store(self)
+        adp_a, adp_b = Xml50(store_a), Xml50(store=store_b)
+        self.assertIs(type(adp_a), type(Xml50(store_a)), "one class by store")
+        self.assertIs(type(Xml50()), Xml50)
+        self.assertIsInstance(adp_a, Xml50)
+        self.assertEqual(adp_b.get_collectionIDs(), [])
+        adp_a.set_collection(col := clock_type())
+        self.assertTrue(adp_a.get_col_path(col.id).is_relative_to(store_a.types))
+        self.assertEqual(adp_a.get_collectionIDs(), [col.id])
+        self.assertEqual(adp_b.get_collectionIDs(), [], "container and catalog by store")
+        self.assertRaises(AdapterException, adp_b.get_collection, col.id)
+        self.assertEqual(len(adp_a.get_collection(col.id)[0]), len(col))
+        self.assertIs(Xml41(store_a)._on_store(Xml50), type(adp_a))
+
+    def test_class_calls(self):
+        """classmethods of bound class use its store, without instance"""
+        store_a, store_b = temp_store(self), temp_store(self)
+        xml50_a, xml50_b = Xml50.bind(store_a), Xml50.bind(store_b)
+        self.assertIs(Xml50.bind(None), Xml50)
+        self.assertIs(Xml50.bind(config.store), Xml50, "default store")
+        self.assertIs(xml50_a.bind(store_b), xml50_b, "bound by origin")
+        xml50_a.set_collection(col := association_type())
+        self.assertTrue(xml50_a.get_col_path(col.id).is_relative_to(store_a.types))
+        new, _ = xml50_a.get_collection(col.id)
+        self.assertEqual(len(new), len(col))
+        self.assertEqual(len(xml50_a.get_collection_view(col.id)), len(col))
+        self.assertRaises(AdapterException, xml50_b.get_collection, col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000711"))
+        new.get_object("0.0.1.0.0.255").set_attr(3, 30)
+        self.assertEqual(xml50_a.set_data(new), [])
+        self.assertTrue(xml50_a._get_keep_path(new).is_relative_to(store_a.data))
+        self.assertIs(Xml50.store, config.store, "default class not changed")
+        xml41_a = Xml41.bind(store_a)
+        xml41_a.set_collection(legacy := association_type(make_id(ver="1.5.5", legacy=True), overview.CountrySpecificIdentifiers.USA))
+        self.assertEqual(xml41_a.get_col_path(legacy.id), Xml3.bind(store_a).get_col_path(legacy.id), "delegate on same store")
+        self.assertTrue(xml41_a.get_col_path(legacy.id).is_relative_to(store_a.types))
+        self.assertRaises(AdapterException, Xml41.bind(store_b).get_collection, legacy.id)
+
+    def test_import_without_side_effects(self):
+        _, created = measure("src.DLMSAdapter.pool")
+        self.assertEqual(created, [])
@@ -0,0 +1,35 @@
+import unittest
+from src.DLMSAdapter import metrics
+from src.DLMSAdapter.xml_ import Xml50
+from fixtures import clock_type, temp_store
+
+
+class TestType(unittest.TestCase):
+    def test_noop(self):
+        self.assertIs(metrics.get(), metrics.NOOP)
+        with metrics.timer("x"):
+            pass
+        metrics.count("x")
+
+    def test_registry(self):
+        adp = Xml50(temp_store(self))
+        col = clock_type()
+        reg = metrics.Registry()
+        prev = metrics.install(reg)
+        try:
+            adp.set_collection(col)
+            adp._load_collection.cache_clear()
+            adp._get_collection(col.id)
+            adp._get_collection(col.id)
+            with self.assertRaises(ValueError):
+                with metrics.timer("fail"):
+                    raise ValueError
+        finally:
+            metrics.install(prev)
+        res = reg.as_dict()
+        self.assertEqual(res["histograms"]["write"]["count"], 1)
+        self.assertGreater(res["counters"]["bytes_written"], 0)
+        self.assertEqual(res["counters"]["cache._load_collection.hit"], 1)
+        self.assertEqual(res["counters"]["fail.errors"], 1)
+        self.assertIn("Xml50", res["collectors"]["cache.get_manufactures_container"])
+        self.assertEqual(sum(res["histograms"]["encode"]["buckets"].values()), res["histograms"]["encode"]["count"])
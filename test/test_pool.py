@@ -1,5 +1,10 @@
 import unittest
-from src.DLMSAdapter.pool import Pool
+from unittest import mock
+from DLMS_SPODES.types import cst
+from src.DLMSAdapter import pool
+from src.DLMSAdapter.pool import Pool, AdapterPool, DEFAULTS
+from src.DLMSAdapter.xml_ import Xml50
+from fixtures import association_type, temp_store
 # from DLMS_SPODES.cosem_interface_classes import collection, overview
 # from DLMS_SPODES.types import cdt, cst
 # from src.DLMSAdapter.xml_ import Xml41, Xml40, Xml3, ET, Xml50
@@ -10,3 +15,19 @@ class TestType(unittest.TestCase):
     def test_init_pool(self):
         Pool()
 
+    def test_class_api(self):
+        """Pool classmethods with previous signatures over module pool"""
+        xml50 = Xml50(temp_store(self))
+        col = association_type()
+        with mock.patch.object(pool, "pool", AdapterPool({n: [xml50] for n in DEFAULTS})):
+            Pool.set_collection(col)
+            new, _ = Pool.get_collection(col.id.man, col.id.f_id, col.id.f_ver)
+            self.assertEqual(new.id, col.id)
+            new.LDN.set_attr(2, bytearray(b"XXX00000000000801"))
+            new.get_object(cst.LogicalName.from_obis("0.0.1.0.0.255")).set_attr(3, 60)
+            self.assertEqual(Pool.set_data(new), [])
+            got, _ = Pool.get_collection(col.id.man, col.id.f_id, col.id.f_ver)
+            got.LDN.set_attr(2, bytearray(b"XXX00000000000801"))
+            Pool.get_data(got)
+            self.assertEqual(int(got.get_object(cst.LogicalName.from_obis("0.0.1.0.0.255")).get_attr(3)), 60)
+            self.assertEqual(Pool.get_collectionIDs(), [col.id])
@@ -0,0 +1,44 @@
+import os
+import unittest
+from pathlib import Path
+from DLMS_SPODES.cosem_interface_classes import collection, overview
+from DLMS_SPODES.types import cst
+from src.DLMSAdapter.main import AdapterException
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter.refresh import TypeRefresher
+from fixtures import make_id, clock_type, temp_store
+
+
+def write_foreign(adp: Xml50, col: collection.Collection) -> Path:
+    """write type file as other node: without adapter container update"""
+    path = adp.store.types / col.id.man.hex() / bytes(col.id.f_id).hex() / F"{bytes(col.id.f_ver).hex()}.xml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Xml50._write(path, Xml50._encode(Xml50.collection2root(col), "utf-8"))
+    return path
+
+
+class TestType(unittest.TestCase):
+    def test_refresh(self):
+        adp = Xml50(temp_store(self))
+        adp.set_collection(col_snp := clock_type())
+        col = collection.Collection(id_=make_id(f_id=b'REFRESH', ver="2.0.0"))
+        col.add(overview.ClassID.CLOCK, overview.Version.V0, cst.LogicalName.from_obis("0.0.1.0.0.255"))
+        path = write_foreign(adp, col)
+        with TypeRefresher((type(adp),), interval=3600) as r:
+            r.poll()
+            warm = adp._get_collection(col_snp.id)
+            path.unlink()
+            r.poll()
+            self.assertRaises(AdapterException, adp.get_col_path, col.id)
+            path = write_foreign(adp, col)
+            self.assertEqual(r.poll(), 1, "added")
+            self.assertEqual(adp.get_col_path(col.id), path)
+            loaded = adp._get_collection(col.id)
+            os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+            self.assertEqual(r.poll(), 1, "changed")
+            self.assertIsNot(adp._get_collection(col.id), loaded, "reload changed")
+            self.assertIs(adp._get_collection(col_snp.id), warm, "other type stay warm")
+            self.assertEqual(r.poll(), 0, "no change")
+            path.unlink()
+            self.assertEqual(r.poll(), 1, "removed")
+            self.assertRaises(AdapterException, adp.get_col_path, col.id)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+from DLMS_SPODES.cosem_interface_classes import collection
+from src.DLMSAdapter.xml_ import Xml50, ET, snapshot
+from fixtures import clock_type, temp_store, make_id
+
+
+def col2values(col: collection.Collection) -> dict[bytes, list]:
+    return {obj.logical_name.contents: [None if attr is None else attr.encoding for _, attr in obj.get_index_with_attributes()] for obj in col}
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        self.adp = Xml50(temp_store(self))
+        self.col = clock_type()
+        env = mock.patch.dict(os.environ, {snapshot.KEY_ENV: "secret"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def set_collection(self):
+        """write type and load it, snapshot written by first load"""
+        self.adp.set_collection(self.col)
+        self.adp._get_collection(self.col.id)
+        return self.adp.get_col_path(self.col.id)
+
+    def test_snapshot_write(self):
+        self.adp.set_collection(self.col)
+        path = self.adp.get_col_path(self.col.id)
+        self.assertFalse(snapshot.get_path(path).exists(), "not by set_collection")
+        self.adp._get_collection(self.col.id)
+        self.assertTrue(snapshot.get_path(path).exists(), "by first load")
+
+    def test_snapshot_equal_xml(self):
+        path = self.set_collection()
+        self.assertIsNotNone(loaded := snapshot.load(path, self.col.id))
+        from_snap, snap_errors = loaded
+        from_xml, xml_errors = Xml50.root2collection(ET.parse(path).getroot(), collection.Collection(id_=self.col.id))
+        self.assertEqual(col2values(from_snap), col2values(from_xml))
+        self.assertEqual(list(map(str, snap_errors)), list(map(str, xml_errors)))
+
+    def test_snapshot_stale(self):
+        path = self.set_collection()
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertIsNone(snapshot.load(path, self.col.id))
+        self.adp._load_collection.cache_clear()
+        self.adp._get_collection(self.col.id)  # fallback to xml with rewrite snapshot
+        self.assertIsNotNone(snapshot.load(path, self.col.id))
+
+    def test_snapshot_source(self):
+        path = self.set_collection()
+        col, _ = snapshot.load(path, other_id := make_id(ver="1.4.9"))
+        self.assertEqual(col.id, other_id, "key by source file, ID is requested")
+        other = path.with_name(F"other{path.suffix}")
+        shutil.copy2(path, other)
+        shutil.copy2(snapshot.get_path(path), snapshot.get_path(other))
+        self.assertIsNone(snapshot.load(other, self.col.id), "snapshot of other source")
+
+    def test_snapshot_signature(self):
+        path = self.set_collection()
+        with mock.patch.dict(os.environ, {snapshot.KEY_ENV: "other"}):
+            self.assertIsNone(snapshot.load(path, self.col.id), "signed by other key")
+        snap = snapshot.get_path(path)
+        data = bytearray(snap.read_bytes())
+        data[-1] ^= 1
+        snap.write_bytes(data)
+        self.assertIsNone(snapshot.load(path, self.col.id), "changed after signing")
+
+    def test_snapshot_disabled(self):
+        path = self.set_collection()
+        with mock.patch.dict(os.environ, {snapshot.KEY_ENV: ""}):
+            self.assertIsNone(snapshot.load(path, self.col.id), "not loaded without key")
+            snapshot.get_path(path).unlink()
+            self.adp._load_collection.cache_clear()
+            self.adp._get_collection(self.col.id)
+            self.assertFalse(snapshot.get_path(path).exists(), "not written without key")
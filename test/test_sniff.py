@@ -0,0 +1,44 @@
+import tempfile
+import unittest
+from pathlib import Path
+import xml.etree.ElementTree as ET
+from src.DLMSAdapter.sniff import XmlHead, CHUNK
+from src.DLMSAdapter.xml_ import Xml3, Xml40, Xml41, Xml50
+from fixtures import clock_type, temp_store
+
+
+def write_xml(n_objects: int) -> Path:
+    with tempfile.NamedTemporaryFile("w", suffix=".xml", delete=False) as f:
+        f.write('<DLMSServerType version="5.0.0"><dlms_ver>6</dlms_ver><manufacturer>585858</manufacturer>')
+        for i in range(n_objects):
+            f.write(F'<obj ln="1.0.{i % 256}.8.0.255"><attr i="3">02020f00161e</attr></obj>')
+        f.write('</DLMSServerType>')
+    return Path(f.name)
+
+
+class TestType(unittest.TestCase):
+    def test_header(self):
+        path = write_xml(2000)
+        try:
+            with XmlHead(path) as head:
+                self.assertEqual(head.tag, Xml50.TYPE_ROOT_TAG)
+                self.assertEqual(head.version, "5.0.0")
+                self.assertEqual([el.tag for el in head.header], ["dlms_ver", "manufacturer"])
+                self.assertLess(len(head.root), CHUNK // 40, "stop at first chunk")
+                tree = head.parse()
+            self.assertEqual(ET.tostring(tree.getroot()), ET.tostring(ET.parse(path).getroot()))
+        finally:
+            path.unlink()
+
+    def test_pick_format(self):
+        self.assertIs(Xml50.pick_format(ET.fromstring('<Objects version="4.0.0"/>')), Xml40)
+        self.assertIs(Xml50.pick_format(ET.fromstring('<Objects version="3.1.0"/>')), Xml3)
+        self.assertIs(Xml41.pick_format(ET.fromstring('<DLMSServerType version="5.0.0"/>')), None)
+        self.assertIs(Xml50.pick_format(ET.fromstring('<DLMSServerType/>')), None)
+
+    def test_index_by_header(self):
+        adp = Xml50(temp_store(self))
+        col = clock_type()
+        adp.set_collection(col)
+        index = adp.index_by_header(adp.scan_types())
+        self.assertEqual(index[col.id], adp.get_col_path(col.id))
@@ -0,0 +1,83 @@
+import gc
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+import weakref
+from src.DLMSAdapter import sqlite_
+from src.DLMSAdapter.sqlite_ import Sqlite
+from src.DLMSAdapter.main import AdapterException
+from fixtures import association_type, make_id
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.adp = Sqlite(Path(self.dir.name) / "test.sqlite3")
+        self.col = association_type()
+
+    def tearDown(self):
+        self.adp.close()
+        self.dir.cleanup()
+
+    def test_collection(self):
+        self.adp.set_collection(self.col)
+        self.assertEqual(self.adp.get_collectionIDs(), [self.col.id])
+        col, _ = self.adp.get_collection(self.col.id)
+        self.assertEqual(int(col.get_object("0.0.1.0.0.255").get_attr(3)), 120)
+
+    def test_compatible(self):
+        self.adp.set_collection(self.col)
+        col, _ = self.adp.get_collection(make_id(ver="1.5.9"))
+        self.assertEqual(col.id, self.col.id, "fallback to compatible 1.5.5")
+        self.assertRaises(AdapterException, self.adp.get_collection, make_id(ver="2.0.0"))
+        new = association_type(make_id(ver="1.5.7"))
+        self.adp.set_collection(new)
+        col, _ = self.adp.get_collection(make_id(ver="1.5.9"))
+        self.assertEqual(col.id, new.id, "cached fallback invalidated by new compatible version")
+
+    def test_cache_release(self):
+        self.adp.set_collection(self.col)
+        self.adp.get_collection(self.col.id)
+        self.adp.get_save_plan(self.col.id)
+        cached = lambda: sum(f.cache_invalidate_if(lambda args: type(args[0]) is sqlite_._CacheKey)
+                             for f in (sqlite_._load_collection, sqlite_._get_save_plan))
+        self.adp.close()
+        self.assertEqual(cached(), 0, "dropped by close")
+        other = Sqlite(self.adp.path)
+        other.get_collection(self.col.id)
+        ref = weakref.ref(other)
+        del other
+        gc.collect()
+        self.assertIsNone(ref(), "not kept by cache")
+        self.assertEqual(cached(), 0, "dropped by collection of adapter")
+
+    def test_thread_connection(self):
+        conns = list()
+        thread = threading.Thread(target=lambda: conns.append(self.adp._connect()))
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+        self.assertRaises(sqlite3.ProgrammingError, conns[0].execute, "SELECT 1")
+        self.assertEqual(self.adp.get_collectionIDs(), [], "connection of current thread is open")
+
+    def test_data_many(self):
+        self.adp.set_collection(self.col)
+        cols = list()
+        for n in range(3):
+            col, _ = self.adp.get_collection(self.col.id)
+            col.LDN.set_attr(2, bytearray(F"XXX0000000000040{n}".encode("ascii")))
+            col.get_object("0.0.1.0.0.255").set_attr(3, 10 * n)
+            cols.append(col)
+        self.assertEqual(self.adp.set_data_many(cols), [[], [], []])
+        for col in cols:
+            new, _ = self.adp.get_collection(self.col.id)
+            new.LDN.set_attr(2, bytearray(col.LDN.value.contents))
+            self.adp.get_data(new)
+            self.assertEqual(new.get_object("0.0.1.0.0.255").get_attr(3), col.get_object("0.0.1.0.0.255").get_attr(3))
+        new, _ = self.adp.get_collection(self.col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000499"))
+        self.assertRaises(AdapterException, self.adp.get_data, new)
+        self.assertEqual(self.adp.path.with_suffix(".sqlite3-wal").exists(), True, "WAL mode")
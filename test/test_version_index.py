@@ -0,0 +1,27 @@
+import unittest
+from pathlib import Path
+from semver import Version as SemVer
+from src.DLMSAdapter.version_index import VersionIndex
+
+
+class TestType(unittest.TestCase):
+    def test_queries(self):
+        index = VersionIndex((SemVer.parse(v), Path(v)) for v in ("1.4.3", "1.0.0", "2.1.0", "1.2.7", "1.5.0", "0.3.0"))
+        self.assertEqual(index.exact(SemVer(1, 2, 7)), Path("1.2.7"))
+        self.assertIsNone(index.exact(SemVer(1, 2, 8)))
+        self.assertEqual(index.max_compatible(SemVer(1, 4, 9)), Path("1.4.3"))
+        self.assertEqual([str(v) for v, _ in index.compatible(SemVer(1, 3, 0))], ["1.2.7", "1.0.0"])
+        self.assertIsNone(index.max_compatible(SemVer(3, 0, 0)))
+        self.assertIsNone(index.max_compatible(SemVer(0, 3, 1)), "major 0 only itself")
+        index.add(SemVer(1, 4, 5), Path("new"))
+        self.assertEqual(index.max_compatible(SemVer(1, 4, 9)), Path("new"))
+        self.assertEqual(len(index), 7)
+        index.remove(SemVer(1, 4, 5))
+        self.assertEqual(index.max_compatible(SemVer(1, 4, 9)), Path("1.4.3"))
+        self.assertEqual(len(index), 6)
+
+    def test_as_filter(self):
+        versions = [SemVer(1, m, p) for m in range(5) for p in range(3)]
+        index = VersionIndex((v, Path(str(v))) for v in versions)
+        for ver in (SemVer(1, 2, 0), SemVer(1, 9, 0), SemVer(1, 0, 0)):
+            self.assertEqual(index.max_compatible(ver), Path(str(max(filter(lambda v: v.is_compatible(ver), versions)))))
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+from DLMS_SPODES.cosem_interface_classes import collection
+from src.DLMSAdapter.xml_ import Xml50
+from src.DLMSAdapter import view
+from src.DLMSAdapter.view import ReadOnlyError, CowCollection, ObjectView, check_spodes
+from fixtures import association_type, temp_store
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        self.xml50 = Xml50(temp_store(self))
+        self.col = association_type()
+
+    def test_spodes(self):
+        """views replace objects in private container of Collection: fails by change of DLMS_SPODES internals"""
+        check_spodes()
+        self.xml50.set_collection(self.col)
+        parent = self.xml50._get_collection(self.col.id)
+        view = self.xml50.get_collection_view(self.col.id)
+        self.assertEqual(len(view), len(parent))
+        self.assertTrue(all(type(obj) is ObjectView for obj in view), "iteration by views")
+        self.assertIs(view.get_object("0.0.1.0.0.255")._target, parent.get_object("0.0.1.0.0.255"), "lookup by views")
+
+    def test_not_supported(self):
+        self.xml50.set_collection(self.col)
+        view.supported.cache_clear()
+        self.addCleanup(view.supported.cache_clear)
+        with mock.patch.object(view, "SPODES_VERSION", (0, 0)):
+            view.check_spodes.cache_clear()
+            self.addCleanup(view.check_spodes.cache_clear)
+            for get in (self.xml50.get_collection_view, self.xml50.get_collection_cow):
+                col = get(self.col.id)
+                self.assertIs(type(col), collection.Collection, "full copy")
+                col.get_object("0.0.1.0.0.255").set_attr(3, 60)
+                self.assertEqual(int(self.xml50._get_collection(self.col.id).get_object("0.0.1.0.0.255").get_attr(3)), 120)
+
+    def test_read_only(self):
+        self.xml50.set_collection(self.col)
+        view = self.xml50.get_collection_view(self.col.id)
+        clock = view.get_object("0.0.1.0.0.255")
+        self.assertIsInstance(clock, collection.Clock)
+        self.assertEqual(int(clock.get_attr(3)), 120)
+        self.assertRaises(ReadOnlyError, clock.set_attr, 3, 60)
+        self.assertRaises(ReadOnlyError, view.LDN.set_attr, 2, bytearray(b"XXX1"))
+
+    def test_cow(self):
+        self.xml50.set_collection(self.col)
+        parent = self.xml50._get_collection(self.col.id)
+        cow = self.xml50.get_collection_cow(self.col.id)
+        self.assertEqual(cow.owned, ())
+        cow.get_object("0.0.1.0.0.255").set_attr(3, 60)
+        self.assertEqual(cow.owned, (bytes((0, 0, 1, 0, 0, 255)),))
+        self.assertEqual(int(cow.get_object("0.0.1.0.0.255").get_attr(3)), 60)
+        self.assertEqual(int(parent.get_object("0.0.1.0.0.255").get_attr(3)), 120, "parent not changed")
+        cow.LDN.set_attr(2, bytearray(b"XXX00000000000301"))
+        self.assertEqual(self.xml50.set_data(cow), [])
+        new = self.xml50.get_collection_cow(self.col.id)
+        new.LDN.set_attr(2, bytearray(b"XXX00000000000301"))
+        self.xml50.get_data(new)
+        self.assertIsInstance(new, CowCollection)
+        self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 60)
+        self.assertEqual(int(parent.get_object("0.0.1.0.0.255").get_attr(3)), 120)
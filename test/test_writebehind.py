@@ -0,0 +1,72 @@
+import time
+import unittest
+from DLMS_SPODES.cosem_interface_classes import overview
+from DLMS_SPODES import exceptions as exc
+from src.DLMSAdapter.xml_ import Xml41, Xml50
+from src.DLMSAdapter.pool import AdapterPool, DEFAULTS
+from src.DLMSAdapter.writebehind import WriteBehind
+from fixtures import association_type, make_id, temp_store
+
+
+class TestType(unittest.TestCase):
+    def setUp(self):
+        self.xml50 = Xml50(temp_store(self))
+        self.col = association_type()
+
+    def test_coalesce(self):
+        self.xml50.set_collection(self.col)
+        with WriteBehind(self.xml50, interval=60) as wb:
+            col = self.xml50.get_collection_cow(self.col.id)
+            self.assertEqual([type(e) for e in wb.set_data(col)], [exc.EmptyObj], "errors list as other adapters")
+            col.LDN.set_attr(2, bytearray(b"XXX00000000000601"))
+            path = self.xml50._get_keep_path(col)
+            path.unlink(missing_ok=True)
+            for n in range(5):
+                col.get_object("0.0.1.0.0.255").set_attr(3, n)
+                self.assertEqual(wb.set_data(col), [])
+            self.assertFalse(path.exists(), "enqueue only")
+            self.assertEqual((wb.pending, wb.enqueued, wb.coalesced), (1, 5, 4))
+            new = self.xml50.get_collection_cow(self.col.id)
+            new.LDN.set_attr(2, bytearray(b"XXX00000000000601"))
+            wb.get_data(new)
+            self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 4, "write pending before reading, last values")
+            self.assertEqual(wb.written, 1)
+
+    def test_background(self):
+        self.xml50.set_collection(self.col)
+        wb = WriteBehind(self.xml50, interval=60, max_pending=2)
+        cols = list()
+        for n in range(2):
+            col = self.xml50.get_collection_cow(self.col.id)
+            col.LDN.set_attr(2, bytearray(F"XXX0000000000061{n}".encode("ascii")))
+            col.get_object("0.0.1.0.0.255").set_attr(3, 10 + n)
+            self.xml50._get_keep_path(col).unlink(missing_ok=True)
+            cols.append(col)
+        wb.set_data_many(cols)
+        for _ in range(100):
+            if wb.written == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(wb.written, 2, "flush by size")
+        self.assertTrue(all(self.xml50._get_keep_path(col).exists() for col in cols))
+        self.assertEqual(wb.close(), {})
+
+    def test_captured(self):
+        xml41 = Xml41(temp_store(self))
+        for adp, reader, type_col in (
+            (xml41, xml41, association_type(make_id(ver="1.5.5", legacy=True), overview.CountrySpecificIdentifiers.USA)),
+            (AdapterPool({n: [self.xml50] for n in DEFAULTS}), self.xml50, self.col)
+        ):
+            with self.subTest(adp=adp.__class__.__name__):
+                reader.set_collection(type_col)
+                with WriteBehind(adp, interval=60) as wb:
+                    col, _ = reader.get_collection(type_col.id)
+                    col.LDN.set_attr(2, bytearray(b"XXX00000000000621"))
+                    col.get_object("0.0.1.0.0.255").set_attr(3, 30)
+                    self.assertEqual(wb.set_data(col), [])
+                    col.get_object("0.0.1.0.0.255").set_attr(3, 40)
+                    wb.flush()
+                new, _ = reader.get_collection(type_col.id)
+                new.LDN.set_attr(2, bytearray(b"XXX00000000000621"))
+                reader.get_data(new)
+                self.assertEqual(int(new.get_object("0.0.1.0.0.255").get_attr(3)), 30, "values of <set_data> call")
@@ -1,8 +1,16 @@
+import os
 import unittest
+from unittest import mock
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from DLMS_SPODES.cosem_interface_classes import collection, overview
 from DLMS_SPODES.types import cdt, cst
-from src.DLMSAdapter.xml_ import Xml41, Xml40, Xml3, ET, xml50
+from src.DLMSAdapter.xml_ import Xml41, Xml40, Xml3, ET, xml50, Xml50
+from src.DLMSAdapter import xml_, manifest, main
+from src.DLMSAdapter.cache import template_cache
+from src.DLMSAdapter.main import AdapterException
 import logging
+from fixtures import temp_store, make_id, association_type
 
 server_1_4_15 = collection.ParameterValue(
         par=bytes.fromhex("0000000201ff02"),
@@ -43,11 +51,39 @@ ass_obj = colXXX.add(
     cst.LogicalName.from_obis("0.0.40.0.3.255"))
 ass_obj.set_attr(2, [])
 
+type_xml = (
+    '<DLMSServerType>'
+    '<obj ln="1.0.1.8.0.255"><attr i="3">02020f00161e</attr></obj>'
+    '<obj ln="0.0.40.0.3.255"><ver>1</ver><attr i="2">'
+    '0103020412000f110109060000280003ff0202010302030f0116010002030f0216010002030f031601000100'
+    '0204120003110009060100010800ff0202010302030f0116010002030f0216010002030f031601000100'
+    '0204120008110009060000010000ff0202010302030f0116010002030f0216030002030f031601000100</attr></obj>'
+    '<obj ln="1.0.99.99.0.255"><attr i="2">1100</attr></obj>'
+    '</DLMSServerType>')
+"""object before AssociationLN and not exist object"""
+
+
+def get_type_col() -> collection.Collection:
+    """type by <type_xml>"""
+    ret = collection.Collection(id_=colXXX.id)
+    Xml40._fill_collection40(ET.fromstring(type_xml), ret)
+    return ret
+
+
+def add_types(root: Path, names: list[str]):
+    """add to manifest in other process"""
+    for name in names:
+        manifest.add(root, Xml50.__name__, root / name)
+
+
 logger = logging.getLogger(__name__)
 logger.level = logging.INFO
 
 
 class TestType(unittest.TestCase):
+    def setUp(self):
+        self.adp = Xml50(temp_store(self))
+
     def test_create_adapter(self):
         adapter_ = xml50
 
@@ -185,7 +221,7 @@ class TestType(unittest.TestCase):
                     print(path)
                     logger.info(F"find type {path=}")
                     tree = ET.parse(path)
-                    col = Xml41.root2collection(tree.getroot(), collection.Collection())
+                    col, _ = Xml41.root2collection(tree.getroot(), collection.Collection())
                     print(col)
 
     def test_get_col_path(self):
@@ -201,3 +237,168 @@ class TestType(unittest.TestCase):
             )
         )
         print(path)
+
+    def test_legacy_f_ver(self):
+        """raw ascii firmware version of Xml3 header and OctetString encoding find same type"""
+        adp = Xml41(temp_store(self))
+        type_col = association_type(make_id(ver="1.5.5", legacy=True), overview.CountrySpecificIdentifiers.USA)
+        adp.set_collection(type_col)
+        path = adp.get_col_path(type_col.id)
+        raw_id = Xml3.header2id(ET.parse(path).getroot())
+        self.assertEqual(raw_id.f_ver.value, b"1.5.5", "baseline header value")
+        self.assertEqual(adp.get_col_path(raw_id), path)
+        self.assertTrue(Xml3.is_same_id(raw_id, type_col.id))
+        for col_id in (raw_id, type_col.id):
+            col, _ = adp.get_collection(col_id)
+            self.assertEqual(col.id, col_id, "keep requested ID")
+
+    def test_fill_collection40_one_pass(self):
+        """object before AssociationLN in xml"""
+        r_n = ET.fromstring(type_xml)
+        col = collection.Collection(id_=colXXX.id)
+        errors = Xml40._fill_collection40(r_n, col)
+        self.assertEqual(len(errors), 1, "not find 1.0.99.99.0.255")
+        self.assertEqual(len(r_n), 3, "without DOM changing")
+        self.assertEqual(col.get_object("1.0.1.8.0.255").get_attr(3).encoding.hex(), "02020f00161e")
+        self.assertTrue(col.is_in_collection(cst.LogicalName.from_obis("0.0.1.0.0.255")))
+
+    def test_collection_errors(self):
+        """failures of type parsing returned by get_collection, also from snapshot"""
+        env = mock.patch.dict(os.environ, {xml_.snapshot.KEY_ENV: "secret"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.adp.set_collection(get_type_col())
+        path = self.adp.get_col_path(colXXX.id)
+        tree = ET.parse(path)
+        ET.SubElement(ET.SubElement(tree.getroot(), "obj", attrib={"ln": "1.0.99.99.0.255"}), "attr", attrib={"i": "2"}).text = "1100"
+        tree.write(path, encoding="utf-8")
+        for source in ("xml", "snapshot"):
+            self.adp._load_collection.cache_clear()
+            _, errors = self.adp.get_collection(colXXX.id)
+            self.assertTrue(any("object 1.0.99.99.0.255" in getattr(e, "__notes__", ()) for e in errors), source)
+
+    def test_get_data_stream(self):
+        col = get_type_col()
+        col.LDN.set_attr(2, bytearray(b"XXX00000000000001"))
+        with open(self.adp._get_keep_path(col), "w") as f:
+            f.write(
+                '<DLMSServerData version="5.0.0"><dlms_ver>6</dlms_ver>'
+                '<object ln="1.0.1.8.0.255"><attr index="2">0600000007</attr></object>'
+                '<object ln="0.0.1.0.0.255"><attr index="3">10003c</attr></object>'
+                '</DLMSServerData>')
+        self.adp.get_data(col)
+        self.assertEqual(int(col.get_object("1.0.1.8.0.255").get_attr(2)), 7)
+        self.assertEqual(int(col.get_object("0.0.1.0.0.255").get_attr(3)), 60)
+
+    def test_set_data_many(self):
+        type_col = get_type_col()
+        self.adp.set_collection(type_col)
+        cols = list()
+        for n in range(4):
+            col = self.adp.get_collection(colXXX.id)[0]
+            col.LDN.set_attr(2, bytearray(F"XXX0000000000010{n % 3}".encode("ascii")))
+            col.get_object("1.0.1.8.0.255").set_attr(2, cdt.DoubleLongUnsigned(n).encoding)
+            cols.append(col)
+
+        def check(executor):
+            errors = self.adp.set_data_many(cols, executor=executor)
+            self.assertEqual(errors, [[], [], [], []])
+            new_cols = [self.adp.get_collection(colXXX.id)[0] for _ in cols]
+            for col, new_col in zip(cols, new_cols):
+                new_col.LDN.set_attr(2, bytearray(col.LDN.value.contents))
+            self.assertEqual(self.adp.get_data_many(new_cols, executor=None if isinstance(executor, ProcessPoolExecutor) else executor), [[], [], [], []])
+            self.assertEqual([int(col.get_object("1.0.1.8.0.255").get_attr(2)) for col in new_cols], [3, 1, 2, 3], "dedupe by LDN, last is keeping")
+
+        check(None)
+        with main.get_executor(None) as executor:
+            self.assertIs(executor, main.default_executor(), "shared default executor")
+        with ThreadPoolExecutor(2) as executor:
+            check(executor)
+        with ProcessPoolExecutor(2) as executor:
+            check(executor)
+
+    def test_manifest(self):
+        self.adp.set_collection(colXXX)
+        path = self.adp.get_col_path(colXXX.id)
+        self.assertIn(path, manifest.load(self.adp.store.types, Xml50.__name__))
+        self.assertEqual(xml_.verify_manifest(self.adp.store)[Xml50.__name__], ([], []))
+        manifest.update(self.adp.store.types, Xml50.__name__, [])
+        self.assertEqual(xml_.verify_manifest(self.adp.store)[Xml50.__name__][0], sorted(self.adp.scan_types()), "drift")
+        xml_.rebuild_manifest(self.adp.store)
+        self.assertEqual(xml_.verify_manifest(self.adp.store)[Xml50.__name__], ([], []))
+        self.assertEqual(self.adp.get_col_path(colXXX.id), path)
+
+    def test_manifest_processes(self):
+        root = self.adp.store.types
+        manifest.update(root, Xml50.__name__, [])
+        names = [F"XXX/{n:02}.xml" for n in range(40)]
+        with ProcessPoolExecutor(4) as ex:
+            list(ex.map(add_types, [root] * 4, [names[n::4] for n in range(4)]))
+        self.assertEqual(manifest.load(root, Xml50.__name__), [root / name for name in names], "not lost by concurrent update")
+
+    @unittest.skipIf(manifest.fcntl is None, "lock by other process with fcntl")
+    def test_manifest_lock_timeout(self):
+        root = self.adp.store.types
+        manifest.update(root, Xml50.__name__, [])
+        with open(root / manifest.LOCK_NAME, "a+b") as f, mock.patch.object(manifest, "LOCK_TIMEOUT", 0.1):
+            manifest.fcntl.flock(f.fileno(), manifest.fcntl.LOCK_EX)
+            self.assertRaises(AdapterException, manifest.add, root, Xml50.__name__, root / "XXX" / "00.xml")
+        manifest.add(root, Xml50.__name__, root / "XXX" / "00.xml")
+        self.assertEqual(manifest.load(root, Xml50.__name__), [root / "XXX" / "00.xml"], "lock released")
+
+    def test_parent_encodings(self):
+        type_col = get_type_col()
+        type_col.get_object("0.0.1.0.0.255").set_attr(3, 120)
+        self.adp.set_collection(type_col)
+        enc = self.adp.get_parent_encodings(colXXX.id)
+        self.assertIs(self.adp.get_parent_encodings(colXXX.id), enc, "build once")
+        self.assertEqual(enc[bytes((0, 0, 1, 0, 0, 255))][3], cdt.Long(120).encoding)
+        type_col.get_object("0.0.1.0.0.255").set_attr(3, 60)
+        self.adp.set_collection(type_col)
+        self.assertEqual(self.adp.get_parent_encodings(colXXX.id)[bytes((0, 0, 1, 0, 0, 255))][3], cdt.Long(60).encoding, "invalidate by set_collection")
+
+    def test_save_plan(self):
+        type_col = get_type_col()
+        self.adp.set_collection(type_col)
+        plan = self.adp.get_save_plan(colXXX.id, 3)
+        self.assertIs(self.adp.get_save_plan(colXXX.id, 3), plan)
+        self.assertEqual(dict(plan.objects)[bytes((0, 0, 1, 0, 0, 255))], (3,), "without LN and DYNAMIC time")
+        self.assertNotIn(1, dict(plan.objects)[bytes((1, 0, 1, 8, 0, 255))])
+        self.adp.set_collection(type_col)
+        self.assertIsNot(self.adp.get_save_plan(colXXX.id, 3), plan, "invalidate by set_collection")
+
+    def test_template_stream(self):
+        type_col = get_type_col()
+        type_col.get_object("0.0.1.0.0.255").set_attr(3, 120)
+        self.adp.set_collection(type_col)
+        reg_ln = cst.LogicalName.from_obis("1.0.1.8.0.255")
+        used = {cst.LogicalName.from_obis("0.0.1.0.0.255"): {3}, reg_ln: {3}}
+        self.adp.set_template(collection.Template(name="template_stream", collections=[type_col], used=used))
+        path = self.adp._get_template_path("template_stream")
+        template = self.adp.get_template("template_stream")
+        self.assertEqual(template.used, used)
+        self.assertEqual(template.collections[0].get_object("0.0.1.0.0.255").get_attr(3), cdt.Long(120))
+        self.assertEqual(template.collections[0].get_object(reg_ln).get_attr(3), type_col.get_object(reg_ln).get_attr(3))
+        data = path.read_bytes()
+        with self.assertRaises(ValueError):
+            self.adp.set_template(collection.Template(name="template_stream", collections=[type_col], used={cst.LogicalName.from_obis("1.0.99.98.0.255"): {2}}))
+        self.assertEqual(path.read_bytes(), data, "keep old file if failed")
+
+    def test_template_cache(self):
+        type_col = get_type_col()
+        type_col.get_object("0.0.1.0.0.255").set_attr(3, 120)
+        self.adp.set_collection(type_col)
+        clock_ln = cst.LogicalName.from_obis("0.0.1.0.0.255")
+        self.adp.set_template(collection.Template(name="template_cache", collections=[type_col], used={clock_ln: {3}}))
+        misses = template_cache.stats.misses
+        t1 = self.adp.get_template("template_cache")
+        t2 = self.adp.get_template("template_cache")
+        self.assertEqual(template_cache.stats.misses, misses + 1, "parse once")
+        self.assertIsNot(t1.collections[0], t2.collections[0], "fresh collections")
+        type_col.get_object("0.0.1.0.0.255").set_attr(3, 60)
+        self.adp.set_template(collection.Template(name="template_cache", collections=[type_col], used={clock_ln: {3}}))
+        self.assertEqual(self.adp.get_template("template_cache").collections[0].get_object(clock_ln).get_attr(3), cdt.Long(60), "invalidate by set_template")
+        xml_.rebuild_manifest(self.adp.store)
+        misses = template_cache.stats.misses
+        self.adp.get_template("template_cache")
+        self.assertEqual(template_cache.stats.misses, misses + 1, "invalidate by rebuild_manifest")